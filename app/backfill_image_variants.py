@@ -0,0 +1,161 @@
+"""
+Generate resized WebP variants for Explore images uploaded before variants existed.
+
+    python -m app.backfill_image_variants --dry-run
+    python -m app.backfill_image_variants --workers 8
+    python -m app.backfill_image_variants --force      # re-render everything
+    python -m app.backfill_image_variants --batch 16   # fewer images in memory at once
+
+S3: every explore2 item with an image but no `variants` is downloaded,
+rendered in a process pool and its variants stored as content-addressed
+blobs (one reference each, see app/services/blobs.py).
+GridFS: every original in the images bucket without variant files gets
+them, linked through metadata.variant_of / metadata.width.
+
+Images go through the pools `--batch` at a time, so only one slice of
+originals and renders is held in memory however large the backlog is.
+"""
+import argparse
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import boto3
+import gridfs
+from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
+
+from app.services.blobs import put_blob, release_blobs
+from app.services.images import VARIANT_CONTENT_TYPE, render_variants, variant_key
+
+load_dotenv()
+
+BUCKET_NAME = "bitcoin-culture-hub-content-pictures"
+
+
+def _batches(seq: list, size: int):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def _pools(args):
+    # spawn: the download threads are already running when the workers start
+    return (
+        ThreadPoolExecutor(max_workers=args.workers),
+        ProcessPoolExecutor(max_workers=args.processes, mp_context=multiprocessing.get_context("spawn")),
+    )
+
+
+def s3_backfill(col, s3, args) -> int:
+    query = {"image_url": {"$nin": [None, ""]}}
+    if not args.force:
+        query["variants"] = {"$in": [None, {}]}
+    items = list(col.find(query, {"image_url": 1, "title": 1, "variants": 1}))
+    # GridFS-backed items store a route, not an S3 key
+    items = [item for item in items if not item["image_url"].startswith("/explore/image/")]
+    print(f"📋 {len(items)} S3 images need variants")
+    if args.dry_run or not items:
+        return 0
+
+    def download(item):
+        return s3.get_object(Bucket=BUCKET_NAME, Key=item["image_url"])["Body"].read()
+
+    def upload(data):
+        return put_blob(s3, BUCKET_NAME, blobs, data, VARIANT_CONTENT_TYPE)
+
+    blobs = col.database["image_blobs"]
+    count = 0
+    io_pool, cpu_pool = _pools(args)
+    with io_pool, cpu_pool:
+        for batch in _batches(items, args.batch):
+            updates, replaced = [], []
+            renders = [cpu_pool.submit(render_variants, data) for data in io_pool.map(download, batch)]
+            for item, future in zip(batch, renders):
+                try:
+                    rendered = future.result()
+                except Exception as e:
+                    print(f"⚠️ Skipping {item['image_url']}: {e}")
+                    continue
+                variants = dict(zip(map(str, rendered), io_pool.map(upload, rendered.values())))
+                updates.append(UpdateOne({"_id": item["_id"]}, {"$set": {"variants": variants}}))
+                replaced.extend((item.get("variants") or {}).values())  # only with --force
+                print(f"✅ {item['title']}: {', '.join(variants.values())}")
+
+            if updates:
+                col.bulk_write(updates, ordered=False)
+                release_blobs(blobs, replaced)
+                count += len(updates)
+    return count
+
+
+def gridfs_backfill(db, args) -> int:
+    files = db[f"{args.bucket}.files"]
+    fs = gridfs.GridFS(db, collection=args.bucket)
+
+    originals = list(files.find({"metadata.variant_of": {"$exists": False}}, {"filename": 1}))
+    if not args.force:
+        done = set(files.distinct("metadata.variant_of"))
+        originals = [f for f in originals if f["_id"] not in done]
+    print(f"📋 {len(originals)} GridFS images need variants")
+    if args.dry_run or not originals:
+        return 0
+
+    def download(doc):
+        out = fs.get(doc["_id"])
+        try:
+            return out.read()
+        finally:
+            out.close()
+
+    def upload(doc, width, data):
+        if args.force:
+            for old in files.find({"metadata.variant_of": doc["_id"], "metadata.width": width}, {"_id": 1}):
+                fs.delete(old["_id"])
+        fs.put(
+            data,
+            filename=variant_key(doc["filename"], width),
+            contentType=VARIANT_CONTENT_TYPE,
+            metadata={"variant_of": doc["_id"], "width": width, "contentType": VARIANT_CONTENT_TYPE},
+        )
+
+    count = 0
+    io_pool, cpu_pool = _pools(args)
+    with io_pool, cpu_pool:
+        for batch in _batches(originals, args.batch):
+            renders = [cpu_pool.submit(render_variants, data) for data in io_pool.map(download, batch)]
+            for doc, future in zip(batch, renders):
+                try:
+                    rendered = future.result()
+                except Exception as e:
+                    print(f"⚠️ Skipping {doc['filename']}: {e}")
+                    continue
+                list(io_pool.map(lambda w: upload(doc, w, rendered[w]), rendered))
+                count += 1
+                print(f"✅ {doc['filename']}: {len(rendered)} variants")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill resized Explore image variants")
+    parser.add_argument("--dry-run", action="store_true", help="count what would be rendered and exit")
+    parser.add_argument("--force", action="store_true", help="re-render items that already have variants")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent downloads / uploads")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2, help="resize processes")
+    parser.add_argument("--batch", type=int, default=32, help="images downloaded and rendered per slice")
+    parser.add_argument("--collection", default="explore2")
+    parser.add_argument("--bucket", default="images")
+    parser.add_argument("--skip-s3", action="store_true")
+    parser.add_argument("--skip-gridfs", action="store_true")
+    args = parser.parse_args()
+
+    client = MongoClient(os.getenv("MONGO_URI"))
+    db = client["BitcoinCultureHub"]
+    print("✅ Connected to MongoDB")
+
+    s3_done = 0 if args.skip_s3 else s3_backfill(db[args.collection], boto3.client("s3"), args)
+    gridfs_done = 0 if args.skip_gridfs else gridfs_backfill(db, args)
+    print(f"\n🎉 Rendered variants for {s3_done} S3 images and {gridfs_done} GridFS images")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Run the orphaned image sweep once, outside the API process.
+
+    python -m app.collect_orphan_images --dry-run
+    python -m app.collect_orphan_images --grace-hours 48 --batch 500
+
+The API runs the same sweep every IMAGE_GC_INTERVAL_SECONDS; this is for a
+first cleanup of an old bucket or for checking what would go. It takes the
+same `image_gc` lease, so it won't overlap a sweep already in progress.
+"""
+import argparse
+import os
+import socket
+from datetime import timedelta
+
+from app.config import settings
+from app.routers.explore import BUCKET_NAME, IMAGE_COLLECTIONS, blobs_col, db, s3_client
+from app.services.image_gc import acquire_lease, collect_garbage
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete S3 and GridFS images nothing references")
+    parser.add_argument("--dry-run", action="store_true", help="list orphans without deleting them")
+    parser.add_argument("--grace-hours", type=float, help="override IMAGE_GC_GRACE_SECONDS")
+    parser.add_argument("--batch", type=int, help="override IMAGE_GC_BATCH")
+    args = parser.parse_args()
+
+    if args.grace_hours is not None:
+        settings.IMAGE_GC_GRACE_SECONDS = int(args.grace_hours * 3600)
+    if args.batch is not None:
+        settings.IMAGE_GC_BATCH = args.batch
+
+    holder = f"{socket.gethostname()}:{os.getpid()}"
+    if not args.dry_run and not acquire_lease(db, "image_gc", holder, timedelta(hours=6)):
+        print("⚠️ Another sweep holds the image_gc lease; try again later")
+        return
+
+    try:
+        reports = collect_garbage(db, s3_client, BUCKET_NAME, IMAGE_COLLECTIONS, blobs_col, dry_run=args.dry_run)
+    finally:
+        if not args.dry_run:
+            db["locks"].delete_one({"_id": "image_gc", "holder": holder})
+
+    for report in reports:
+        if args.dry_run:
+            print(f"🧹 {report['store']}: scanned {report['scanned']}, would delete {report['orphans']}")
+        else:
+            print(f"🧹 {report['store']}: scanned {report['scanned']}, deleted {report['deleted']} "
+                  f"({report['bytes']} bytes, {report['failed']} failed)")
+
+
+if __name__ == "__main__":
+    main()
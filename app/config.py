@@ -16,4 +16,19 @@ class Settings(BaseModel):
     MAILERLITE_API: str = "https://connect.mailerlite.com/api/subscribers"
     MAILERLITE_TOKEN: str = os.getenv("MAILERLITE_TOKEN")
     MONGO_URI: str = os.getenv("MONGO_URI")
+    # response cache: in-process LRU unless REDIS_URL is set
+    REDIS_URL: str | None = os.getenv("REDIS_URL")
+    CACHE_TTL_SECONDS: int = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+    # per-request query headers on every response, /debug routes without a token
+    DEBUG_METRICS: bool = os.getenv("DEBUG_METRICS", "").lower() in ("1", "true", "yes")
+    DEBUG_QUERY_BUDGET: int = int(os.getenv("DEBUG_QUERY_BUDGET", "20"))
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "profiles")
+    # processes that resize uploaded images
+    IMAGE_WORKERS: int = int(os.getenv("IMAGE_WORKERS", "2"))
+    # orphaned image sweep (app/services/image_gc.py); interval 0 disables it
+    IMAGE_GC_INTERVAL_SECONDS: int = int(os.getenv("IMAGE_GC_INTERVAL_SECONDS", "3600"))
+    IMAGE_GC_GRACE_SECONDS: int = int(os.getenv("IMAGE_GC_GRACE_SECONDS", "86400"))
+    IMAGE_GC_BATCH: int = int(os.getenv("IMAGE_GC_BATCH", "1000"))
+    IMAGE_GC_DRY_RUN: bool = os.getenv("IMAGE_GC_DRY_RUN", "").lower() in ("1", "true", "yes")
 settings = Settings()
\ No newline at end of file
@@ -5,6 +5,7 @@ from .services.auth_service import get_current_user
 import os
 from sqlmodel import SQLModel
 from .config import settings
+from .services.metrics import instrument_engine, mongo_listener
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
@@ -12,7 +13,7 @@ import os
 # --------------------------
 # MongoDB setup
 # --------------------------
-client = MongoClient(settings.MONGO_URI)
+client = MongoClient(settings.MONGO_URI, event_listeners=[mongo_listener])
 
 # Specify database and collections
 db = client["BitcoinCultureHub"]
@@ -45,6 +46,7 @@ bookmark_collection = db["bookmarks"]
 DATABASE_URL = os.environ["DEPLOYED_DATABASE_URL"]
 
 engine = create_async_engine(DATABASE_URL, echo=True)
+instrument_engine(engine)
 AsyncSessionLocal = sessionmaker(
     bind=engine,
     class_=AsyncSession,   
@@ -0,0 +1,44 @@
+"""
+Remove duplicate bookmarks so the unique (user_email, title) index can be built.
+
+    python -m app.dedupe_bookmarks --dry-run
+    python -m app.dedupe_bookmarks
+
+Before the index existed, concurrent clicks could store the same bookmark
+twice. For every (user_email, title) pair the oldest bookmark is kept and
+the rest are deleted, then the bookmark indexes are created.
+"""
+import argparse
+
+from app.db import bookmark_collection
+from app.routers.item import ensure_indexes
+
+DELETE_BATCH = 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deduplicate bookmarks by (user_email, title)")
+    parser.add_argument("--dry-run", action="store_true", help="count duplicates without deleting them")
+    args = parser.parse_args()
+
+    duplicates = bookmark_collection.aggregate([
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": {"user_email": "$user_email", "title": "$title"}, "ids": {"$push": "$_id"}, "n": {"$sum": 1}}},
+        {"$match": {"n": {"$gt": 1}}},
+    ], allowDiskUse=True)
+
+    extra = [oid for group in duplicates for oid in group["ids"][1:]]
+    print(f"📋 {len(extra)} duplicate bookmarks")
+    if args.dry_run:
+        return
+
+    for i in range(0, len(extra), DELETE_BATCH):
+        bookmark_collection.delete_many({"_id": {"$in": extra[i:i + DELETE_BATCH]}})
+    print(f"🗑️ Deleted {len(extra)} duplicates")
+
+    ensure_indexes()
+    print("✅ Bookmark indexes in place")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,507 @@
+"""
+Synthetic data generator for capacity testing.
+
+    python -m app.generate_data \
+        --database-url postgresql+asyncpg://bench@localhost/bch_load \
+        --mongo-uri mongodb://localhost:27017 \
+        --users 1000000 --orgs 20000 --applications 5000000 --explore-items 500000 \
+        --workers 8
+
+Everything is derived from --seed: ids are uuid5 of (seed, entity, index),
+text comes from Faker seeded per chunk, and relations are computed from row
+indexes, so the same arguments always produce the same data regardless of
+how many workers run. Rows are written in chunks (COPY on Postgres,
+multi-row INSERT elsewhere; insert_many(ordered=False) for Mongo) by a
+process pool, one dependency stage at a time:
+
+    1. users + profiles, events, explore items
+    2. organizations + owners
+    3. opportunities + categories, bookmarks
+    4. applications
+    5. interview slots
+
+Targets must be passed explicitly (or via GENERATE_DATABASE_URL /
+GENERATE_MONGO_URI); the app's own DEPLOYED_DATABASE_URL and MONGO_URI are
+never used. The run refuses to write into a database that already has users
+unless --reset is given, which first empties every app table (search index
+included) and the generated collections. Search index and analytics rollups are not written here: the search
+backfill runs at startup on an empty index, and rollups are built on the
+first visit to an organization's analytics.
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import time
+import uuid
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from bson import ObjectId
+from faker import Faker
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
+from sqlalchemy import delete, func, insert, inspect, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel
+
+from app.models.model import (
+    Application,
+    Bitcoin_Events,
+    InterviewSlot,
+    Opportunity,
+    OpportunityCategory,
+    Organization,
+    OrganizationMember,
+    Profile,
+    User,
+)
+
+NAMESPACE = uuid.UUID("6f1d3c1e-3b7a-4c55-9a0e-6a3c1f0b8d42")
+MONGO_DB = "BitcoinCultureHub"
+EXPLORE_COLLECTION = "explore2"
+BOOKMARK_COLLECTION = "bookmarks"
+
+CATEGORIES = ["Design", "Development", "Education", "Events", "Marketing", "Research", "Translation", "Writing"]
+OPPORTUNITY_TYPES = ["Collaboration", "Volunteer", "Bounty", "Internship", "Job"]
+APPLICATION_STATUSES = ["applied", "applied", "applied", "interview", "accepted", "rejected"]
+EXPLORE_CATEGORIES = ["books", "podcasts", "art", "music", "films", "communities", "education", "tools"]
+TAGS = [
+    "lightning", "mining", "privacy", "history", "self-custody", "education", "nostr", "art",
+    "economics", "open-source", "energy", "circular-economy", "philosophy", "development",
+]
+CONTINENTS = ["Africa", "Asia", "Europe", "North America", "Oceania", "South America"]
+PASSWORD_HASH = "$2b$12$generated.data.cannot.log.in.................................."
+SLOTS_PER_INTERVIEW = 3
+# fixed "now" for generated timestamps, so output doesn't depend on the day it runs
+EPOCH = datetime(2026, 1, 1)
+NAME_POOL_SIZE = 1000
+
+
+
+@dataclass(frozen=True)
+class Plan:
+    seed: int
+    users: int
+    orgs: int
+    opportunities_per_org: int
+    applications: int
+    interview_ratio: float
+    events: int
+    explore_items: int
+    bookmarks: int
+    chunk_size: int
+    name_pool: tuple[str, ...]
+    title_pool: tuple[str, ...]
+
+    @property
+    def opportunities(self) -> int:
+        return self.orgs * self.opportunities_per_org
+
+
+def _id(plan: Plan, kind: str, i: int) -> str:
+    return str(uuid.uuid5(NAMESPACE, f"{plan.seed}:{kind}:{i}"))
+
+
+def _object_id(plan: Plan, kind: str, i: int) -> ObjectId:
+    # deterministic _id, so re-running a stage skips documents already written
+    return ObjectId(hashlib.md5(f"{plan.seed}:{kind}:{i}".encode()).digest()[:12])
+
+
+def _username(plan: Plan, i: int) -> str:
+    return f"{plan.name_pool[i % len(plan.name_pool)]}{i}"
+
+
+def _email(plan: Plan, i: int) -> str:
+    return f"{_username(plan, i)}@example.com"
+
+
+def _explore_title(plan: Plan, i: int) -> str:
+    return f"{plan.title_pool[i % len(plan.title_pool)]} #{i}"
+
+
+def _owner_index(plan: Plan, org: int) -> int:
+    # spread owners over the user range instead of the first N users
+    return (org * 7919) % plan.users
+
+
+def _pair(i: int, groups: int, members: int) -> tuple[int, int]:
+    """Map row i to a distinct (group, member) pair while i < groups * members."""
+    group = i % groups
+    member = (group * 7919 + i // groups) % members
+    return group, member
+
+
+def _chunk_tools(plan: Plan, kind: str, start: int) -> tuple[Faker, random.Random]:
+    key = zlib.crc32(f"{plan.seed}:{kind}:{start}".encode())
+    fake = Faker()
+    fake.seed_instance(key)
+    return fake, random.Random(key)
+
+
+# --------------------------
+# Generators: (plan, start, stop) -> {table or collection: rows}
+# --------------------------
+
+def gen_users(plan: Plan, start: int, stop: int) -> dict:
+    fake, rng = _chunk_tools(plan, "user", start)
+    users, profiles = [], []
+    for i in range(start, stop):
+        user_id = _id(plan, "user", i)
+        users.append({
+            "id": user_id,
+            "email": _email(plan, i),
+            "hashed_password": PASSWORD_HASH,
+            "created_at": fake.date_time_between(EPOCH - timedelta(days=3 * 365), EPOCH),
+        })
+        profiles.append({
+            "user_id": user_id,
+            "username": _username(plan, i),
+            "bio": fake.sentence(nb_words=12),
+            "location": fake.city(),
+            "profile_picture": None,
+            "resume_link": "",
+        })
+    return {User: users, Profile: profiles}
+
+
+def gen_events(plan: Plan, start: int, stop: int) -> dict:
+    fake, rng = _chunk_tools(plan, "event", start)
+    events = []
+    for i in range(start, stop):
+        starts = fake.date_between(date(2024, 1, 1), date(2027, 12, 31))
+        events.append({
+            "id": _id(plan, "event", i),
+            "event_name": f"{fake.city()} Bitcoin {rng.choice(['Meetup', 'Conference', 'Week', 'Summit'])}",
+            "city": fake.city(),
+            "country": fake.country(),
+            "continent": rng.choice(CONTINENTS),
+            "start_date": starts,
+            "end_date": starts + timedelta(days=rng.randint(0, 4)),
+            "twitter_url": None,
+            "website_url": fake.url(),
+            "updated_at": EPOCH,
+        })
+    return {Bitcoin_Events: events}
+
+
+def gen_orgs(plan: Plan, start: int, stop: int) -> dict:
+    fake, rng = _chunk_tools(plan, "org", start)
+    orgs, members = [], []
+    for i in range(start, stop):
+        org_id = _id(plan, "org", i)
+        owner_id = _id(plan, "user", _owner_index(plan, i))
+        submitted_at = fake.date_time_between(EPOCH - timedelta(days=2 * 365), EPOCH)
+        orgs.append({
+            "id": org_id,
+            "name": f"{fake.company()} {i}",
+            "type": rng.choice(["Community", "Company", "Non-profit", "Education"]),
+            "location": fake.city(),
+            "email": fake.company_email(),
+            "description": fake.paragraph(nb_sentences=4),
+            "status": "approved",
+            "owner_id": owner_id,
+            "meeting_link": None,
+            "submitted_at": submitted_at,
+        })
+        members.append({"org_id": org_id, "user_id": owner_id, "role": "owner", "joined_at": submitted_at})
+    return {Organization: orgs, OrganizationMember: members}
+
+
+def gen_opportunities(plan: Plan, start: int, stop: int) -> dict:
+    fake, rng = _chunk_tools(plan, "opportunity", start)
+    opps, cats = [], []
+    for i in range(start, stop):
+        org = i // plan.opportunities_per_org
+        opp_id = _id(plan, "opportunity", i)
+        opps.append({
+            "id": opp_id,
+            "org_id": _id(plan, "org", org),
+            "title": fake.job(),
+            "type": rng.choice(OPPORTUNITY_TYPES),
+            "description": fake.paragraph(nb_sentences=6),
+            "location": rng.choice(["Remote", fake.city()]),
+            "time_commitment": f"{rng.randint(2, 20)}h/week",
+            "created_at": fake.date_time_between(EPOCH - timedelta(days=365), EPOCH),
+            "created_by": _id(plan, "user", _owner_index(plan, org)),
+            "summary": None,
+            "skill_level": rng.choice(["Beginner", "Intermediate", "Advanced"]),
+            "estimated_hours": str(rng.randint(5, 80)),
+            "due_date": None,
+        })
+        cats += [{"opportunity_id": opp_id, "category": c} for c in rng.sample(CATEGORIES, rng.randint(1, 3))]
+    return {Opportunity: opps, OpportunityCategory: cats}
+
+
+def gen_applications(plan: Plan, start: int, stop: int) -> dict:
+    fake, rng = _chunk_tools(plan, "application", start)
+    applications = []
+    for i in range(start, stop):
+        opp, user = _pair(i, plan.opportunities, plan.users)
+        applied_at = fake.date_time_between(EPOCH - timedelta(days=365), EPOCH)
+        status = rng.choice(APPLICATION_STATUSES)
+        applications.append({
+            "id": _id(plan, "application", i),
+            "opportunity_id": _id(plan, "opportunity", opp),
+            "user_id": _id(plan, "user", user),
+            "applied_at": applied_at,
+            "email": _email(plan, user),
+            "username": _username(plan, user),
+            "location": None,
+            "avatar": None,
+            "status": status,
+            "decided_at": None if status == "applied" else applied_at + timedelta(hours=rng.randint(1, 500)),
+            "deleted_at": None,
+        })
+    return {Application: applications}
+
+
+def gen_interview_slots(plan: Plan, start: int, stop: int) -> dict:
+    """`start`/`stop` index applications; every 1/interview_ratio-th one gets slots."""
+    fake, rng = _chunk_tools(plan, "slot", start)
+    step = max(1, round(1 / plan.interview_ratio))
+    slots = []
+    for i in range(start, stop):
+        if i % step:
+            continue
+        opp, _ = _pair(i, plan.opportunities, plan.users)
+        booked = rng.random() < 0.5
+        first = fake.date_time_between(EPOCH - timedelta(days=30), EPOCH + timedelta(days=30))
+        for n in range(SLOTS_PER_INTERVIEW):
+            slots.append({
+                "id": _id(plan, "slot", i * SLOTS_PER_INTERVIEW + n),
+                "opportunity_id": _id(plan, "opportunity", opp),
+                "interview_datetime": first + timedelta(hours=n * 24),
+                "applicant_id": _id(plan, "application", i),
+                "status": ("booked" if n == 0 else "cancelled") if booked else "pending",
+            })
+    return {InterviewSlot: slots}
+
+
+def gen_explore(plan: Plan, start: int, stop: int) -> dict:
+    fake, rng = _chunk_tools(plan, "explore", start)
+    items = []
+    for i in range(start, stop):
+        items.append({
+            "_id": _object_id(plan, "explore", i),
+            "id": _id(plan, "explore", i),
+            "title": _explore_title(plan, i),
+            "category": rng.choice(EXPLORE_CATEGORIES),
+            "tags": rng.sample(TAGS, rng.randint(1, 4)),
+            "description": fake.paragraph(nb_sentences=5),
+            "summary": fake.sentence(nb_words=14),
+            "bio": fake.sentence(nb_words=20),
+            "image_url": None,
+            "status": "accepted",
+        })
+    return {EXPLORE_COLLECTION: items}
+
+
+def gen_bookmarks(plan: Plan, start: int, stop: int) -> dict:
+    fake, rng = _chunk_tools(plan, "bookmark", start)
+    bookmarks = []
+    for i in range(start, stop):
+        user, item = _pair(i, plan.users, plan.explore_items)
+        bookmarks.append({
+            "_id": _object_id(plan, "bookmark", i),
+            "title": _explore_title(plan, item),
+            "user_email": _email(plan, user),
+            "itemType": "explore",
+            "tags": rng.sample(TAGS, 2),
+            "created_at": fake.date_time_between(EPOCH - timedelta(days=365), EPOCH),
+        })
+    return {BOOKMARK_COLLECTION: bookmarks}
+
+
+# (entity, generator, row count, stage)
+def entities(plan: Plan) -> list[tuple[str, object, int, int]]:
+    return [
+        ("users", gen_users, plan.users, 1),
+        ("events", gen_events, plan.events, 1),
+        ("explore", gen_explore, plan.explore_items, 1),
+        ("orgs", gen_orgs, plan.orgs, 2),
+        ("opportunities", gen_opportunities, plan.opportunities, 3),
+        ("bookmarks", gen_bookmarks, plan.bookmarks, 3),
+        ("applications", gen_applications, plan.applications, 4),
+        ("interview_slots", gen_interview_slots, plan.applications, 5),
+    ]
+
+
+# --------------------------
+# Writers (one set per worker process)
+# --------------------------
+
+_engine = None
+_mongo = None
+
+
+def _init_worker(database_url: str | None, mongo_uri: str | None):
+    global _engine, _mongo
+    # NullPool: every chunk runs in its own event loop, so connections can't be reused
+    _engine = create_async_engine(database_url, poolclass=NullPool) if database_url else None
+    _mongo = MongoClient(mongo_uri)[MONGO_DB] if mongo_uri else None
+
+
+async def _write_sql(rows_by_table: dict) -> int:
+    written = 0
+    async with _engine.begin() as conn:
+        if _engine.dialect.name == "postgresql" and _engine.dialect.driver == "asyncpg":
+            raw = (await conn.get_raw_connection()).driver_connection
+            for model, rows in rows_by_table.items():
+                if not rows:
+                    continue
+                columns = list(rows[0])
+                await raw.copy_records_to_table(
+                    model.__tablename__,
+                    records=[tuple(row[c] for c in columns) for row in rows],
+                    columns=columns,
+                )
+                written += len(rows)
+        else:
+            for model, rows in rows_by_table.items():
+                if rows:
+                    await conn.execute(insert(model), rows)
+                    written += len(rows)
+    return written
+
+
+def _write_mongo(docs_by_collection: dict) -> int:
+    written = 0
+    for name, docs in docs_by_collection.items():
+        if not docs:
+            continue
+        try:
+            written += len(_mongo[name].insert_many(docs, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            # duplicates from an earlier, interrupted run are expected; anything else is not
+            errors = e.details.get("writeErrors", [])
+            if any(err.get("code") != 11000 for err in errors):
+                raise
+            written += e.details.get("nInserted", 0)
+    return written
+
+
+def run_chunk(plan: Plan, entity: str, generator, start: int, stop: int) -> tuple[str, int]:
+    rows = generator(plan, start, stop)
+    if all(isinstance(target, str) for target in rows):
+        if _mongo is None:
+            return entity, 0
+        return entity, _write_mongo(rows)
+    if _engine is None:
+        return entity, 0
+    return entity, asyncio.run(_write_sql(rows))
+
+
+# --------------------------
+# Orchestration
+# --------------------------
+
+async def prepare_sql(database_url: str, reset: bool):
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        existing = await conn.scalar(select(func.count()).select_from(User))
+        if existing and not reset:
+            raise SystemExit(f"{existing} users already in the target database; pass --reset to wipe it")
+        if reset:
+            # children first; covers the rollup, prompt and link tables too
+            for table in reversed(SQLModel.metadata.sorted_tables):
+                await conn.execute(delete(table))
+            # not a metadata table (FTS5 / tsvector DDL); emptied so the startup backfill reindexes
+            if await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table("search_index")):
+                await conn.execute(text("DELETE FROM search_index"))
+    await engine.dispose()
+
+
+def prepare_mongo(mongo_uri: str, reset: bool):
+    db = MongoClient(mongo_uri)[MONGO_DB]
+    if reset:
+        for name in (EXPLORE_COLLECTION, BOOKMARK_COLLECTION):
+            db[name].delete_many({})
+
+
+def build_plan(args) -> Plan:
+    if args.applications > args.users * args.orgs * args.opportunities_per_org:
+        raise SystemExit("--applications can't exceed users x opportunities (one per pair)")
+    # bookmarks point at explore items; without any there is nothing to bookmark
+    bookmarks = args.bookmarks if args.explore_items else 0
+    if bookmarks > args.users * args.explore_items:
+        raise SystemExit("--bookmarks can't exceed users x explore items (one per pair)")
+
+    fake = Faker()
+    fake.seed_instance(args.seed)
+    return Plan(
+        seed=args.seed,
+        users=args.users,
+        orgs=args.orgs,
+        opportunities_per_org=args.opportunities_per_org,
+        applications=args.applications,
+        interview_ratio=args.interview_ratio,
+        events=args.events,
+        explore_items=args.explore_items,
+        bookmarks=bookmarks,
+        chunk_size=args.chunk_size,
+        name_pool=tuple(fake.user_name() for _ in range(NAME_POOL_SIZE)),
+        title_pool=tuple(fake.catch_phrase() for _ in range(NAME_POOL_SIZE)),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate deterministic synthetic data for capacity tests")
+    parser.add_argument("--database-url", default=os.environ.get("GENERATE_DATABASE_URL"))
+    parser.add_argument("--mongo-uri", default=os.environ.get("GENERATE_MONGO_URI"))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--orgs", type=int, default=2_000)
+    parser.add_argument("--opportunities-per-org", type=int, default=10)
+    parser.add_argument("--applications", type=int, default=500_000)
+    parser.add_argument("--interview-ratio", type=float, default=0.1, help="share of applications with slots")
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--explore-items", type=int, default=50_000)
+    parser.add_argument("--bookmarks", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--reset", action="store_true", help="delete existing generated data first")
+    args = parser.parse_args()
+
+    if not args.database_url and not args.mongo_uri:
+        parser.error("pass --database-url and/or --mongo-uri (or GENERATE_DATABASE_URL / GENERATE_MONGO_URI)")
+
+    plan = build_plan(args)
+    if args.database_url:
+        asyncio.run(prepare_sql(args.database_url, args.reset))
+    if args.mongo_uri:
+        prepare_mongo(args.mongo_uri, args.reset)
+
+    started = time.perf_counter()
+    totals: dict[str, int] = {}
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_worker,
+        initargs=(args.database_url, args.mongo_uri),
+    ) as pool:
+        for stage in sorted({stage for *_, stage in entities(plan)}):
+            futures = [
+                pool.submit(run_chunk, plan, entity, generator, start, min(start + plan.chunk_size, count))
+                for entity, generator, count, entity_stage in entities(plan)
+                if entity_stage == stage
+                for start in range(0, count, plan.chunk_size)
+            ]
+            for future in as_completed(futures):
+                entity, written = future.result()
+                totals[entity] = totals.get(entity, 0) + written
+            elapsed = time.perf_counter() - started
+            written_so_far = sum(totals.values())
+            print(f"[generate] stage {stage} done: {written_so_far:,} rows in {elapsed:.0f}s "
+                  f"({written_so_far / elapsed:,.0f} rows/s)")
+
+    for entity, written in totals.items():
+        print(f"  {entity:<16} {written:>12,}")
+
+
+if __name__ == "__main__":
+    main()
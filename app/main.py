@@ -1,9 +1,15 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.routers import  health, users, explore,item,opportunity2,organization2,profile2,auth3,general_organization,events,email
-from app.db import db, engine
+from app.routers import  health, users, explore,item,opportunity2,organization2,profile2,auth3,general_organization,events,email,search,metrics,debug
+from app.db import engine
+from app.services.debug import DEBUG_HEADERS, DebugMiddleware
+from app.services.image_gc import run_periodically as run_image_gc
+from app.services.images import shutdown_pool
+from app.services.metrics import MetricsMiddleware
+from app.services.search import ensure_search_index
 from sqlmodel import SQLModel
 
 
@@ -11,7 +17,18 @@ from sqlmodel import SQLModel
 async def lifespan(app: FastAPI):
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
+        await ensure_search_index(conn)
+    await asyncio.to_thread(explore.ensure_indexes)
+    await asyncio.to_thread(item.ensure_indexes)
+    image_gc = None
+    if settings.IMAGE_GC_INTERVAL_SECONDS > 0:
+        image_gc = asyncio.create_task(run_image_gc(
+            explore.db, explore.s3_client, explore.BUCKET_NAME, explore.IMAGE_COLLECTIONS, explore.blobs_col
+        ))
     yield
+    if image_gc:
+        image_gc.cancel()
+    shutdown_pool()
 
 
 app = FastAPI(title="Bitcoin Culture Hub API", lifespan=lifespan)
@@ -26,7 +43,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=DEBUG_HEADERS,
 )
+# added last = outermost: MetricsMiddleware sets up the stats DebugMiddleware reports
+app.add_middleware(DebugMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # routers
 app.include_router(health.router)       # GET /        # /auth/*
@@ -39,13 +60,7 @@ app.include_router(auth3.router)
 app.include_router(general_organization.router)
 app.include_router(events.router)
 app.include_router(email.router)
-@app.get("/debug/db")
-def debug_db():
-    try:
-        return {
-            "db_name": db.name,
-            "collections": db.list_collection_names()
-        }
-    except Exception as e:
-        return {"error": str(e)}
+app.include_router(search.router)
+app.include_router(metrics.router)
+app.include_router(debug.router)
 app.include_router(item.router)
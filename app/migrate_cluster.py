@@ -0,0 +1,401 @@
+"""
+Copy Explore data between MongoDB clusters (and, optionally, S3 buckets).
+
+    export SOURCE_MONGO_URI=mongodb+srv://...   DEST_MONGO_URI=mongodb+srv://...
+    python -m app.migrate_cluster \
+        --collection explore:explore2 --image-basename \
+        --gridfs images \
+        --s3 old-pictures-bucket:bitcoin-culture-hub-content-pictures
+
+Documents are streamed in _id order, --batch-size at a time, and written with
+unordered ReplaceOne upserts, so re-copying a batch is harmless. GridFS files
+are streamed chunk by chunk from bucket to bucket, keeping their original
+files document (contentType, uploadDate), and S3 objects are copied
+server-side (or streamed with --s3-stream when the two buckets need different
+credentials), both by a pool of --workers threads.
+
+Progress is written to --checkpoint after every batch; running the same
+command again resumes after the last finished batch. At the end every
+collection, GridFS bucket and S3 prefix is verified: counts always, and with
+--verify checksums (the default) a SHA-256 over every document / file on both
+sides. Connection strings come only from the environment; S3 uses the normal
+boto3 credential chain, with SOURCE_AWS_PROFILE / DEST_AWS_PROFILE to split
+accounts.
+
+Replaces export_bch_data.py and import_to_new_cluster.py.
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.exceptions import ClientError
+from bson import encode, json_util
+from gridfs import GridFSBucket
+from gridfs.errors import NoFile
+from pymongo import MongoClient, ReplaceOne
+
+DEFAULT_CHECKPOINT = "migrate_checkpoint.json"
+
+
+# --------------------------
+# Checkpoint
+# --------------------------
+
+class Checkpoint:
+    """Per-task resume positions, rewritten atomically after every batch."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.state: dict = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.state = json_util.loads(f.read())
+            print(f"[checkpoint] resuming from {path}")
+
+    def get(self, task: str) -> dict:
+        return self.state.setdefault(task, {"position": None, "copied": 0, "done": False})
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(json_util.dumps(self.state, indent=2))
+        os.replace(tmp, self.path)
+
+
+# --------------------------
+# Documents
+# --------------------------
+
+def _transform(doc: dict, image_basename: bool) -> dict:
+    # the new cluster stores the bare S3 key, not the old /explore/image/... path
+    if image_basename and isinstance(doc.get("image_url"), str):
+        doc["image_url"] = doc["image_url"].split("/")[-1]
+    return doc
+
+
+def _batches(collection, batch_size: int, after=None):
+    """Yield lists of documents in _id order, starting after `after`."""
+    while True:
+        query = {"_id": {"$gt": after}} if after is not None else {}
+        batch = list(collection.find(query).sort("_id", 1).limit(batch_size))
+        if not batch:
+            return
+        yield batch
+        after = batch[-1]["_id"]
+
+
+def copy_collection(source_db, dest_db, source_name: str, dest_name: str, args, checkpoint: Checkpoint):
+    task = f"collection:{source_name}->{dest_name}"
+    progress = checkpoint.get(task)
+    if progress["done"]:
+        print(f"[{task}] already copied ({progress['copied']} documents)")
+        return
+
+    source, dest = source_db[source_name], dest_db[dest_name]
+    started = time.perf_counter()
+    for batch in _batches(source, args.batch_size, progress["position"]):
+        requests = [
+            ReplaceOne({"_id": doc["_id"]}, _transform(doc, args.image_basename), upsert=True)
+            for doc in batch
+        ]
+        dest.bulk_write(requests, ordered=False)
+
+        progress["position"] = batch[-1]["_id"]
+        progress["copied"] += len(batch)
+        checkpoint.save()
+        rate = progress["copied"] / (time.perf_counter() - started)
+        print(f"[{task}] {progress['copied']} documents ({rate:,.0f}/s)")
+
+    progress["done"] = True
+    checkpoint.save()
+
+
+def _collection_digest(collection, batch_size: int, image_basename: bool | None) -> tuple[int, str]:
+    digest, count = hashlib.sha256(), 0
+    for batch in _batches(collection, batch_size):
+        for doc in batch:
+            if image_basename is not None:
+                doc = _transform(doc, image_basename)
+            digest.update(encode(doc))
+            count += 1
+    return count, digest.hexdigest()
+
+
+def verify_collection(source_db, dest_db, source_name: str, dest_name: str, args) -> list[str]:
+    source, dest = source_db[source_name], dest_db[dest_name]
+    if args.verify == "checksums":
+        source_count, source_digest = _collection_digest(source, args.batch_size, args.image_basename)
+        dest_count, dest_digest = _collection_digest(dest, args.batch_size, None)
+    else:
+        source_count, dest_count = source.count_documents({}), dest.count_documents({})
+        source_digest = dest_digest = None
+
+    problems = []
+    # the destination may already hold other documents, so only "fewer" is an error
+    if dest_count < source_count:
+        problems.append(f"{source_name}->{dest_name}: {source_count} source documents, {dest_count} copied")
+    elif source_digest != dest_digest and dest_count == source_count:
+        problems.append(f"{source_name}->{dest_name}: checksum mismatch")
+    print(f"[verify] {source_name}->{dest_name}: {source_count} / {dest_count} documents")
+    return problems
+
+
+# --------------------------
+# GridFS
+# --------------------------
+
+def _copy_gridfs_file(source_bucket: GridFSBucket, dest_bucket: GridFSBucket, dest_files, file_doc: dict):
+    file_id = file_doc["_id"]
+    # the files document is written last, as a copy of the source one, so an
+    # identical document means the chunks before it are complete too
+    if dest_files.find_one({"_id": file_id}) == file_doc:
+        return
+
+    # clears chunks left behind by an interrupted upload of the same id
+    try:
+        dest_bucket.delete(file_id)
+    except NoFile:
+        pass
+
+    stream = source_bucket.open_download_stream(file_id)
+    try:
+        dest_bucket.upload_from_stream_with_id(
+            file_id,
+            file_doc["filename"],
+            stream,  # read chunk_size bytes at a time, never the whole file
+            chunk_size_bytes=file_doc.get("chunkSize"),
+            metadata=file_doc.get("metadata"),
+        )
+    finally:
+        stream.close()
+    # upload_from_stream_with_id writes a fresh files document: keep the
+    # original contentType (serve_image reads it) and uploadDate (the orphan
+    # sweep's grace period runs from it)
+    dest_files.replace_one({"_id": file_id}, file_doc)
+
+
+def copy_gridfs(source_db, dest_db, bucket_name: str, args, checkpoint: Checkpoint, pool: ThreadPoolExecutor):
+    task = f"gridfs:{bucket_name}"
+    progress = checkpoint.get(task)
+    if progress["done"]:
+        print(f"[{task}] already copied ({progress['copied']} files)")
+        return
+
+    source_bucket = GridFSBucket(source_db, bucket_name=bucket_name)
+    dest_bucket = GridFSBucket(dest_db, bucket_name=bucket_name)
+    files, dest_files = source_db[f"{bucket_name}.files"], dest_db[f"{bucket_name}.files"]
+
+    started = time.perf_counter()
+    for batch in _batches(files, args.file_batch_size, progress["position"]):
+        # a batch is checkpointed only once every file in it is copied
+        list(pool.map(lambda doc: _copy_gridfs_file(source_bucket, dest_bucket, dest_files, doc), batch))
+
+        progress["position"] = batch[-1]["_id"]
+        progress["copied"] += len(batch)
+        checkpoint.save()
+        rate = progress["copied"] / (time.perf_counter() - started)
+        print(f"[{task}] {progress['copied']} files ({rate:,.1f}/s)")
+
+    progress["done"] = True
+    checkpoint.save()
+
+
+def _stream_digest(bucket: GridFSBucket, file_id) -> str:
+    digest = hashlib.sha256()
+    stream = bucket.open_download_stream(file_id)
+    try:
+        while chunk := stream.readchunk():
+            digest.update(chunk)
+    finally:
+        stream.close()
+    return digest.hexdigest()
+
+
+def verify_gridfs(source_db, dest_db, bucket_name: str, args, pool: ThreadPoolExecutor) -> list[str]:
+    source_bucket = GridFSBucket(source_db, bucket_name=bucket_name)
+    dest_bucket = GridFSBucket(dest_db, bucket_name=bucket_name)
+    problems, checked = [], 0
+
+    for batch in _batches(source_db[f"{bucket_name}.files"], args.file_batch_size):
+        dest_docs = {
+            doc["_id"]: doc
+            for doc in dest_db[f"{bucket_name}.files"].find(
+                {"_id": {"$in": [doc["_id"] for doc in batch]}}, {"length": 1, "contentType": 1, "uploadDate": 1}
+            )
+        }
+
+        def check(doc):
+            file_id = doc["_id"]
+            copied = dest_docs.get(file_id) or {}
+            if copied.get("length") != doc["length"]:
+                return f"gridfs {bucket_name}: {doc['filename']} ({file_id}) missing or truncated"
+            for field in ("contentType", "uploadDate"):
+                if copied.get(field) != doc.get(field):
+                    return f"gridfs {bucket_name}: {doc['filename']} ({file_id}) {field} differs"
+            if args.verify == "checksums" and _stream_digest(source_bucket, file_id) != _stream_digest(dest_bucket, file_id):
+                return f"gridfs {bucket_name}: {doc['filename']} ({file_id}) checksum mismatch"
+            return None
+
+        problems += [p for p in pool.map(check, batch) if p]
+        checked += len(batch)
+
+    print(f"[verify] gridfs {bucket_name}: {checked} files checked")
+    return problems
+
+
+# --------------------------
+# S3
+# --------------------------
+
+def _s3_client(profile_env: str):
+    session = boto3.session.Session(profile_name=os.environ.get(profile_env))
+    return session.client("s3")
+
+
+def _list_keys(s3, bucket: str, prefix: str, start_after: str | None):
+    """Yield pages of {Key, Size, ETag} in key order."""
+    kwargs = {"Bucket": bucket, "Prefix": prefix}
+    if start_after:
+        kwargs["StartAfter"] = start_after
+    for page in s3.get_paginator("list_objects_v2").paginate(**kwargs):
+        contents = page.get("Contents", [])
+        if contents:
+            yield contents
+
+
+def _copy_s3_object(source_s3, dest_s3, source_bucket: str, dest_bucket: str, obj: dict, stream: bool):
+    try:
+        head = dest_s3.head_object(Bucket=dest_bucket, Key=obj["Key"])
+        if head["ContentLength"] == obj["Size"]:
+            return
+    except ClientError:
+        pass
+
+    if stream:
+        # different credentials: pipe the body through in multipart-sized pieces
+        body = source_s3.get_object(Bucket=source_bucket, Key=obj["Key"])["Body"]
+        dest_s3.upload_fileobj(body, dest_bucket, obj["Key"])
+    else:
+        # server-side (multipart for large objects), nothing passes through this host
+        dest_s3.copy({"Bucket": source_bucket, "Key": obj["Key"]}, dest_bucket, obj["Key"], SourceClient=source_s3)
+
+
+def copy_s3(mapping: str, args, checkpoint: Checkpoint, pool: ThreadPoolExecutor):
+    source_bucket, dest_bucket = mapping.split(":", 1)
+    task = f"s3:{source_bucket}->{dest_bucket}/{args.s3_prefix}"
+    progress = checkpoint.get(task)
+    if progress["done"]:
+        print(f"[{task}] already copied ({progress['copied']} objects)")
+        return
+
+    source_s3, dest_s3 = _s3_client("SOURCE_AWS_PROFILE"), _s3_client("DEST_AWS_PROFILE")
+    started = time.perf_counter()
+    for page in _list_keys(source_s3, source_bucket, args.s3_prefix, progress["position"]):
+        list(pool.map(
+            lambda obj: _copy_s3_object(source_s3, dest_s3, source_bucket, dest_bucket, obj, args.s3_stream),
+            page,
+        ))
+        progress["position"] = page[-1]["Key"]
+        progress["copied"] += len(page)
+        checkpoint.save()
+        rate = progress["copied"] / (time.perf_counter() - started)
+        print(f"[{task}] {progress['copied']} objects ({rate:,.1f}/s)")
+
+    progress["done"] = True
+    checkpoint.save()
+
+
+def verify_s3(mapping: str, args) -> list[str]:
+    source_bucket, dest_bucket = mapping.split(":", 1)
+    source_s3, dest_s3 = _s3_client("SOURCE_AWS_PROFILE"), _s3_client("DEST_AWS_PROFILE")
+
+    dest = {}
+    for page in _list_keys(dest_s3, dest_bucket, args.s3_prefix, None):
+        dest.update({obj["Key"]: obj for obj in page})
+
+    problems, checked = [], 0
+    for page in _list_keys(source_s3, source_bucket, args.s3_prefix, None):
+        for obj in page:
+            checked += 1
+            copied = dest.get(obj["Key"])
+            if copied is None or copied["Size"] != obj["Size"]:
+                problems.append(f"s3 {obj['Key']}: missing or wrong size in {dest_bucket}")
+            # ETags are MD5s only for single-part objects; multipart ones are compared by size
+            elif args.verify == "checksums" and "-" not in obj["ETag"] and "-" not in copied["ETag"]:
+                if obj["ETag"] != copied["ETag"]:
+                    problems.append(f"s3 {obj['Key']}: checksum mismatch")
+    print(f"[verify] s3 {source_bucket}->{dest_bucket}: {checked} objects checked")
+    return problems
+
+
+# --------------------------
+# Entry point
+# --------------------------
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Stream Explore data from one cluster to another")
+    parser.add_argument("--source-db", default="bch")
+    parser.add_argument("--dest-db", default="BitcoinCultureHub")
+    parser.add_argument("--collection", action="append", default=[], metavar="SOURCE[:DEST]",
+                        help="collection to copy (repeatable)")
+    parser.add_argument("--image-basename", action="store_true",
+                        help="rewrite image_url to its last path segment (the S3 key)")
+    parser.add_argument("--gridfs", action="append", default=[], metavar="BUCKET",
+                        help="GridFS bucket to copy (repeatable)")
+    parser.add_argument("--s3", action="append", default=[], metavar="SOURCE_BUCKET:DEST_BUCKET")
+    parser.add_argument("--s3-prefix", default="")
+    parser.add_argument("--s3-stream", action="store_true",
+                        help="download and re-upload instead of server-side copy")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--file-batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--verify", choices=["none", "counts", "checksums"], default="checksums")
+    args = parser.parse_args()
+
+    if not (args.collection or args.gridfs or args.s3):
+        parser.error("nothing to copy: pass --collection, --gridfs and/or --s3")
+
+    source_db = dest_db = None
+    if args.collection or args.gridfs:
+        source_uri, dest_uri = os.environ.get("SOURCE_MONGO_URI"), os.environ.get("DEST_MONGO_URI")
+        if not source_uri or not dest_uri:
+            parser.error("set SOURCE_MONGO_URI and DEST_MONGO_URI")
+        source_db = MongoClient(source_uri)[args.source_db]
+        dest_db = MongoClient(dest_uri)[args.dest_db]
+
+    collections = [spec.split(":", 1) if ":" in spec else [spec, spec] for spec in args.collection]
+
+    checkpoint = Checkpoint(args.checkpoint)
+    problems = []
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for source_name, dest_name in collections:
+            copy_collection(source_db, dest_db, source_name, dest_name, args, checkpoint)
+        for bucket in args.gridfs:
+            copy_gridfs(source_db, dest_db, bucket, args, checkpoint, pool)
+        for mapping in args.s3:
+            copy_s3(mapping, args, checkpoint, pool)
+
+        if args.verify != "none":
+            for source_name, dest_name in collections:
+                problems += verify_collection(source_db, dest_db, source_name, dest_name, args)
+            for bucket in args.gridfs:
+                problems += verify_gridfs(source_db, dest_db, bucket, args, pool)
+            for mapping in args.s3:
+                problems += verify_s3(mapping, args)
+
+    if problems:
+        print("\n❌ verification failed:")
+        for problem in problems:
+            print(f"  - {problem}")
+        return 1
+    print("\n✅ migration complete")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
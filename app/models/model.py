@@ -2,7 +2,9 @@ from unicodedata import category
 from sqlmodel import Relationship, SQLModel, Field
 from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import DDL, Index, String, UniqueConstraint, event, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
 import uuid
 from datetime import date
 import boto3
@@ -44,6 +46,28 @@ class Profile(SQLModel, table=True):
     resume_link: Optional[str] = ""
 
 
+class lower_bytewise(FunctionElement):
+    """lower(x) ordered by raw bytes, so one btree serves both prefix ranges and ORDER BY."""
+
+    type = String()
+    inherit_cache = True
+
+
+@compiles(lower_bytewise)
+def _compile_lower_bytewise(element, compiler, **kw):
+    return "lower(%s)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(lower_bytewise, "postgresql")
+def _compile_lower_bytewise_pg(element, compiler, **kw):
+    return 'lower(%s) COLLATE "C"' % compiler.process(element.clauses, **kw)
+
+
+# Case-insensitive prefix search and keyset pagination on the /users directory
+Index("ix_profile_username_lower", lower_bytewise(Profile.username), Profile.user_id)
+Index("ix_profile_location_lower", lower_bytewise(Profile.location), Profile.user_id)
+
+
 class ProfileLink(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: str = Field(foreign_key="profile.user_id")
@@ -142,8 +166,45 @@ class Application(SQLModel, table=True):
     location: Optional[str]
     avatar: Optional[str]
     status:Optional[str]
+    # first time the org moved the application off its initial status
+    decided_at: Optional[datetime] = None
     deleted_at: Optional[datetime] = None
-    
+
+
+class OpportunityStatusRollup(SQLModel, table=True):
+    """Per-opportunity, per-status application counts; see app/services/analytics.py."""
+    __tablename__ = "opportunity_status_rollup"
+
+    opportunity_id: str = Field(foreign_key="opportunity.id", primary_key=True)
+    status: str = Field(primary_key=True)
+    org_id: str = Field(foreign_key="organization.id", index=True)
+    applicants: int = 0
+    decided: int = 0
+    decision_seconds: float = 0
+    refreshed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class OpportunityInterviewRollup(SQLModel, table=True):
+    """Per-opportunity interview slot counts; see app/services/analytics.py."""
+    __tablename__ = "opportunity_interview_rollup"
+
+    opportunity_id: str = Field(foreign_key="opportunity.id", primary_key=True)
+    org_id: str = Field(foreign_key="organization.id", index=True)
+    applicants_offered: int = 0
+    applicants_booked: int = 0
+    slots_total: int = 0
+    slots_booked: int = 0
+    slots_cancelled: int = 0
+    refreshed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class OrganizationRollupMarker(SQLModel, table=True):
+    """When an organization's rollups were last rebuilt, even if it had nothing to roll up."""
+    __tablename__ = "organization_rollup_marker"
+
+    org_id: str = Field(foreign_key="organization.id", primary_key=True)
+    refreshed_at: datetime = Field(default_factory=datetime.utcnow)
+
 
 
 
@@ -191,10 +252,52 @@ class Bitcoin_Events(SQLModel, table=True):
 
     twitter_url: Optional[str] = None
     website_url: Optional[str] = None
-    
+
+    # bumped on every write; drives the ETag of the iCalendar feed
+    updated_at: Optional[datetime] = Field(
+        default_factory=datetime.utcnow, index=True, sa_column_kwargs={"onupdate": datetime.utcnow}
+    )
+
+
+# onupdate only covers writes made through SQLAlchemy; the triggers also catch
+# edits from psql, imports and other services. Created with the table, so
+# existing databases need the same statements run once by hand.
+event.listen(Bitcoin_Events.__table__, "after_create", DDL("""
+    CREATE OR REPLACE FUNCTION bitcoin_events_touch() RETURNS trigger AS $$
+    BEGIN
+        NEW.updated_at := now() AT TIME ZONE 'utc';
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+""").execute_if(dialect="postgresql"))
+event.listen(Bitcoin_Events.__table__, "after_create", DDL("""
+    CREATE TRIGGER bitcoin_events_touch BEFORE UPDATE ON bitcoin_events
+    FOR EACH ROW EXECUTE FUNCTION bitcoin_events_touch()
+""").execute_if(dialect="postgresql"))
+event.listen(Bitcoin_Events.__table__, "after_create", DDL("""
+    CREATE TRIGGER bitcoin_events_touch AFTER UPDATE ON bitcoin_events
+    FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+    BEGIN
+        UPDATE bitcoin_events SET updated_at = strftime('%%Y-%%m-%%d %%H:%%M:%%f', 'now') WHERE id = NEW.id;
+    END
+""").execute_if(dialect="sqlite"))
+
 
 class InterviewSlot(SQLModel, table=True):
     __tablename__ = "interview_slots"
+    __table_args__ = (
+        # at most one booked slot per application and opportunity
+        # MySQL has no partial indexes, where this would forbid a second slot
+        # altogether; pick_interview_time locks the application's slots there
+        Index(
+            "uq_interview_slots_booked",
+            "applicant_id",
+            "opportunity_id",
+            unique=True,
+            postgresql_where=text("status = 'booked'"),
+            sqlite_where=text("status = 'booked'"),
+        ).ddl_if(dialect=("postgresql", "sqlite")),
+    )
 
     id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
     opportunity_id: str = Field(foreign_key="opportunity.id", index=True)
@@ -0,0 +1,112 @@
+"""
+Move existing Explore images onto content-addressed S3 keys.
+
+    python -m app.rekey_explore_images --dry-run
+    python -m app.rekey_explore_images --workers 8
+    python -m app.rekey_explore_images --delete-old   # also remove the filename keys afterwards
+
+Items uploaded before content addressing point at `Key=file.filename`
+(and `photo-256w.webp` style variant keys). Each such key is downloaded
+once, stored under its content hash via put_blob (one reference per item
+that uses it) and the item is repointed, but only if it still references
+the old key; otherwise the references just taken are released again.
+Re-running skips items that are already rekeyed. GridFS-backed items are
+left alone.
+"""
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.exceptions import ClientError
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+from app.services.blobs import blob_sha256, is_blob_key, item_keys, put_blob, release_blobs
+
+load_dotenv()
+
+BUCKET_NAME = "bitcoin-culture-hub-content-pictures"
+DELETE_BATCH = 1000  # delete_objects limit
+
+
+def legacy_items(col) -> list[dict]:
+    items = col.find(
+        {"image_url": {"$nin": [None, ""], "$not": {"$regex": r"^(blobs/|/explore/image/)"}}},
+        {"image_url": 1, "variants": 1, "title": 1},
+    )
+    return list(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rekey Explore images to content-hash S3 keys")
+    parser.add_argument("--dry-run", action="store_true", help="count what would move and exit")
+    parser.add_argument("--delete-old", action="store_true", help="delete filename keys nothing references any more")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent S3 transfers")
+    parser.add_argument("--collection", default="explore2")
+    args = parser.parse_args()
+
+    client = MongoClient(os.getenv("MONGO_URI"))
+    db = client["BitcoinCultureHub"]
+    col = db[args.collection]
+    blobs = db["image_blobs"]
+    s3 = boto3.client("s3")
+    print("✅ Connected to MongoDB")
+
+    items = legacy_items(col)
+    old_keys = sorted({key for item in items for key in item_keys(item) if not is_blob_key(key)})
+    print(f"📋 {len(items)} items reference {len(old_keys)} filename keys")
+    if args.dry_run or not items:
+        return
+
+    def fetch(key):
+        try:
+            obj = s3.get_object(Bucket=BUCKET_NAME, Key=key)
+        except ClientError as e:
+            print(f"⚠️ Cannot read {key}: {e.response.get('Error', {}).get('Code')}")
+            return key, None
+        return key, (obj["Body"].read(), obj.get("ContentType"))
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        # shared filenames are downloaded once
+        contents = {key: content for key, content in pool.map(fetch, old_keys) if content}
+
+        def rekey(item):
+            keys = item_keys(item)
+            if any(key not in contents for key in keys if not is_blob_key(key)):
+                return "skipped"
+            new = {key: key if is_blob_key(key) else put_blob(s3, BUCKET_NAME, blobs, *contents[key]) for key in keys}
+            taken = [new[key] for key in keys if not is_blob_key(key)]
+            result = col.update_one(
+                {"_id": item["_id"], "image_url": item["image_url"]},
+                {"$set": {
+                    "image_url": new[item["image_url"]],
+                    "image_id": blob_sha256(new[item["image_url"]]),
+                    "variants": {w: new[k] for w, k in (item.get("variants") or {}).items()},
+                }},
+            )
+            if result.modified_count == 0:
+                release_blobs(blobs, taken)  # changed underneath us
+                return "raced"
+            return "rekeyed"
+
+        outcomes = list(pool.map(rekey, items))
+
+    for outcome in ("rekeyed", "skipped", "raced"):
+        print(f"   {outcome}: {outcomes.count(outcome)}")
+
+    if args.delete_old:
+        still_used = {key for item in legacy_items(col) for key in item_keys(item)}
+        doomed = [key for key in contents if key not in still_used]
+        for i in range(0, len(doomed), DELETE_BATCH):
+            s3.delete_objects(
+                Bucket=BUCKET_NAME,
+                Delete={"Objects": [{"Key": key} for key in doomed[i:i + DELETE_BATCH]], "Quiet": True},
+            )
+        print(f"🗑️ Deleted {len(doomed)} filename keys")
+
+    print("\n🎉 Rekey complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,14 +5,17 @@ from pydantic import BaseModel, EmailStr
 from sqlmodel import SQLModel, Field, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 import secrets
+import uuid
 import boto3
 import os
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from app.db import get_session
 from app.models.model import User, Profile, OrganizationMember
 from app.services.password import hash_password, verify_password
 from app.services.auth_service import create_access_token
 from app.services.auth_service import get_current_user_optional
+from app.services.metrics import instrument_boto3_client
 
 router = APIRouter(prefix="/authorize", tags=["auth"])
 
@@ -57,12 +60,12 @@ class ResetPasswordRequest(BaseModel):
 RESET_TOKEN_EXPIRE_MINUTES = 30
 SENDER_EMAIL = "noreply@bitcoinculturehub.com"
 
-ses_client = boto3.client(
+ses_client = instrument_boto3_client(boto3.client(
     "ses",
     region_name="us-east-2",
     aws_access_key_id=os.environ.get("BITCOIN_AWS_ACCESS_KEY"),
     aws_secret_access_key=os.environ.get("BITCOIN_AWS_SECRET_ACCESS_KEY"),
-)
+))
 
 
 @router.post("/invite/create")
@@ -102,12 +105,26 @@ async def accept_invite(
 
     return {"action": "SIGNUP_REQUIRED", "invite_token": token}
 
+def _unique_violation(e: IntegrityError) -> str | None:
+    """The unique index `e` tripped over (lowercased), or None for any other integrity error."""
+    orig = e.orig
+    cause = getattr(orig, "__cause__", None)
+    # Postgres: asyncpg's UniqueViolationError carries the index name
+    if "23505" in (getattr(orig, "sqlstate", None), getattr(cause, "sqlstate", None), getattr(orig, "pgcode", None)):
+        return (getattr(cause, "constraint_name", None) or str(orig)).lower()
+    # MySQL: ER_DUP_ENTRY, "Duplicate entry '…' for key 'user.ix_user_email'"
+    args = getattr(orig, "args", ())
+    if args and args[0] == 1062:
+        return str(args[-1]).rsplit(" for key ", 1)[-1].lower()
+    # SQLite: "UNIQUE constraint failed: user.email"
+    message = str(orig)
+    if message.startswith("UNIQUE constraint failed"):
+        return message.split(":", 1)[-1].strip().lower()
+    return None
+
+
 @router.post("/signup")
 async def signup(user: UserCreate, session: AsyncSession = Depends(get_session)):
-    existing = (await session.exec(select(User).where(User.email == user.email))).first()
-    if existing:
-        raise HTTPException(409, "Email already registered")
-
     invite = None
 
     if user.invite_token:
@@ -115,38 +132,62 @@ async def signup(user: UserCreate, session: AsyncSession = Depends(get_session))
         if not invite: raise HTTPException(400, "Invalid invite")
         if invite.expires_at < datetime.utcnow(): raise HTTPException(400, "Invite expired")
 
-    db_user = User(email=user.email, hashed_password=hash_password(user.password))
-    session.add(db_user)
-    await session.commit()
-    await session.refresh(db_user)
-
-    session.add(Profile(user_id=db_user.id, username=user.username))
-
-    if invite:
-        session.add(OrganizationMember(org_id=invite.org_id, user_id=db_user.id, role=invite.role))
-        session.add(invite)
+    # user, profile and membership commit together; the unique indexes on
+    # user.email and profile.username catch duplicates, no pre-check SELECT
+    db_user = User(id=str(uuid.uuid4()), email=user.email, hashed_password=hash_password(user.password))
+    try:
+        session.add(db_user)
+        # the models declare no relationship(), so the unit of work won't order
+        # these INSERTs by foreign key; write the user row first ourselves
+        await session.flush()
+        session.add(Profile(user_id=db_user.id, username=user.username))
+        if invite:
+            session.add(OrganizationMember(org_id=invite.org_id, user_id=db_user.id, role=invite.role))
+        await session.commit()
+    except IntegrityError as e:
+        await session.rollback()
+        index = _unique_violation(e)
+        if index is None:
+            raise
+        if "email" in index:
+            raise HTTPException(409, "Email already registered")
+        if "username" in index:
+            raise HTTPException(409, "Username already taken")
+        raise HTTPException(409, "Account already exists")
 
-    await session.commit()
     token = create_access_token({"sub": str(db_user.id)})
     return {"access_token": token, "user_id": db_user.id, "org_id": invite.org_id if invite else None}
 
 
 @router.post("/login")
 async def login(data: UserLogin, session: AsyncSession = Depends(get_session)):
-    user = (await session.exec(select(User).where(User.email == data.email))).first()
-    if not user or not verify_password(data.password, user.hashed_password):
+    row = (
+        await session.execute(
+            select(
+                User.id,
+                User.email,
+                User.hashed_password,
+                Profile.username,
+                Profile.bio,
+                Profile.location,
+                Profile.profile_picture,
+            )
+            .outerjoin(Profile, Profile.user_id == User.id)
+            .where(User.email == data.email)
+        )
+    ).first()
+    if not row or not verify_password(data.password, row.hashed_password):
         raise HTTPException(401, "Invalid credentials")
 
-    profile = await session.get(Profile, user.id)
-    token = create_access_token({"sub": str(user.id)})
+    token = create_access_token({"sub": str(row.id)})
     return {
         "access_token": token,
-        "user_id": user.id,
-        "email": user.email,
-        "username": profile.username,
-        "bio": profile.bio,
-        "location": profile.location,
-        "profile_picture": profile.profile_picture,
+        "user_id": row.id,
+        "email": row.email,
+        "username": row.username,
+        "bio": row.bio,
+        "location": row.location,
+        "profile_picture": row.profile_picture,
     }
 
 
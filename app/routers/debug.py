@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from app.config import settings
+from app.db import db
+from app.services.debug import has_debug_access
+
+
+def require_debug(request: Request):
+    # pretend the routes don't exist unless debug mode or a signed token is present
+    if not (settings.DEBUG_METRICS or has_debug_access(request)):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+router = APIRouter(prefix="/debug", tags=["debug"], dependencies=[Depends(require_debug)], include_in_schema=False)
+
+
+@router.get("/db")
+def debug_db():
+    try:
+        return {
+            "db_name": db.name,
+            "collections": db.list_collection_names()
+        }
+    except Exception as e:
+        return {"error": str(e)}
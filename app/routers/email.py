@@ -3,12 +3,13 @@ from fastapi.responses import JSONResponse, PlainTextResponse
 import boto3
 from pydantic import BaseModel, EmailStr
 import os
+from app.services.metrics import instrument_boto3_client
 
 
 
 router = APIRouter(prefix="/email", tags=["email"])
-ses_client = boto3.client("ses", region_name="us-east-2",aws_access_key_id=os.environ["BITCOIN_AWS_ACCESS_KEY"],
-    aws_secret_access_key=os.environ["BITCOIN_AWS_SECRET_ACCESS_KEY"])
+ses_client = instrument_boto3_client(boto3.client("ses", region_name="us-east-2",aws_access_key_id=os.environ["BITCOIN_AWS_ACCESS_KEY"],
+    aws_secret_access_key=os.environ["BITCOIN_AWS_SECRET_ACCESS_KEY"]))
 
 
 class JoinOrgEmailRequest(BaseModel):
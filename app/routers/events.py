@@ -1,9 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
-from app.db import get_session
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+from app.db import AsyncSessionLocal, get_session
+from app.services.cache import cached_response
+from app.services.http_cache import etag_matches, make_etag
 from ..models.model import Organization, OrganizationMember, OrganizationRead,Bitcoin_Events
 from app.services.auth_service import get_current_user
 from pydantic import BaseModel
@@ -18,30 +23,169 @@ router = APIRouter(prefix="/events", tags=["events"])
 
 @router.get("/")
 async def get_events(
+    request: Request,
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
     session: AsyncSession = Depends(get_session),
 ):
-    offset = (page - 1) * page_size
+    async def load():
+        offset = (page - 1) * page_size
 
-    total = await session.scalar(
-        select(func.count()).select_from(Bitcoin_Events)
-    )
+        total = await session.scalar(
+            select(func.count()).select_from(Bitcoin_Events)
+        )
+
+        # paginated query
+        result = await session.execute(
+            select(Bitcoin_Events)
+            .order_by(Bitcoin_Events.start_date, Bitcoin_Events.id)
+            .offset(offset)
+            .limit(page_size)
+        )
+
+        events = result.scalars().all()
+
+        return {
+            "page": page,
+            "page_size": page_size,
+            "total": total,
+            "total_pages": (total + page_size - 1) // page_size,
+            "items": events,
+        }
+
+    return await cached_response(request, ["events"], load)
+
+ICS_PRODID = "-//Bitcoin Culture Hub//Events//EN"
+ICS_BATCH_SIZE = 500
 
-    # paginated query
-    result = await session.execute(
-        select(Bitcoin_Events)
-        .order_by(Bitcoin_Events.start_date, Bitcoin_Events.id)
-        .offset(offset)
-        .limit(page_size)
+
+def _event_filters(
+    continent: str | None,
+    country: str | None,
+    start: date | None,
+    end: date | None,
+):
+    filters = []
+    if continent:
+        filters.append(func.lower(Bitcoin_Events.continent) == continent.strip().lower())
+    if country:
+        filters.append(func.lower(Bitcoin_Events.country) == country.strip().lower())
+    if start:
+        # keep multi-day events that are still running on the start day
+        filters.append(func.coalesce(Bitcoin_Events.end_date, Bitcoin_Events.start_date) >= start)
+    if end:
+        filters.append(Bitcoin_Events.start_date <= end)
+    return filters
+
+
+def _ics_escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
     )
 
-    events = result.scalars().all()
 
-    return {
-        "page": page,
-        "page_size": page_size,
-        "total": total,
-        "total_pages": (total + page_size - 1) // page_size,
-        "items": events,
-    }
\ No newline at end of file
+def _ics_line(line: str) -> str:
+    """Fold a content line at 75 octets as required by RFC 5545."""
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line + "\r\n"
+
+    parts = []
+    chunk = b""
+    limit = 75
+    for ch in line:
+        encoded = ch.encode("utf-8")
+        if len(chunk) + len(encoded) > limit:
+            parts.append(chunk.decode("utf-8"))
+            chunk = b""
+            limit = 74  # continuation lines start with a space
+        chunk += encoded
+    parts.append(chunk.decode("utf-8"))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _vevent(event: Bitcoin_Events) -> str:
+    stamp = (event.updated_at or datetime.utcnow()).strftime("%Y%m%dT%H%M%SZ")
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{event.id}@bitcoinculturehub.com",
+        f"DTSTAMP:{stamp}",
+        f"SUMMARY:{_ics_escape(event.event_name)}",
+    ]
+    if event.start_date:
+        # all-day events: DTEND is exclusive
+        last_day = event.end_date or event.start_date
+        lines.append(f"DTSTART;VALUE=DATE:{event.start_date.strftime('%Y%m%d')}")
+        lines.append(f"DTEND;VALUE=DATE:{(last_day + timedelta(days=1)).strftime('%Y%m%d')}")
+
+    location = ", ".join(p for p in (event.city, event.country) if p)
+    if location:
+        lines.append(f"LOCATION:{_ics_escape(location)}")
+    if event.website_url:
+        lines.append(f"URL:{event.website_url}")
+    if event.twitter_url:
+        lines.append(f"DESCRIPTION:{_ics_escape(event.twitter_url)}")
+    lines.append("END:VEVENT")
+    return "".join(_ics_line(line) for line in lines)
+
+
+async def _stream_calendar(filters):
+    # The request-scoped session is closed before a streaming body is sent,
+    # so the feed opens its own and reads through a server-side cursor.
+    yield _ics_line("BEGIN:VCALENDAR")
+    yield _ics_line("VERSION:2.0")
+    yield _ics_line(f"PRODID:{ICS_PRODID}")
+    yield _ics_line("CALSCALE:GREGORIAN")
+    yield _ics_line("X-WR-CALNAME:Bitcoin Culture Hub Events")
+
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(
+            select(Bitcoin_Events)
+            .where(*filters)
+            .order_by(Bitcoin_Events.start_date, Bitcoin_Events.id)
+            .execution_options(yield_per=ICS_BATCH_SIZE)
+        )
+        async for partition in result.scalars().partitions(ICS_BATCH_SIZE):
+            yield "".join(_vevent(event) for event in partition)
+
+    yield _ics_line("END:VCALENDAR")
+
+
+@router.get("/feed.ics")
+async def events_calendar_feed(
+    request: Request,
+    continent: str | None = Query(None),
+    country: str | None = Query(None),
+    start: date | None = Query(None, description="Only events running on or after this day"),
+    end: date | None = Query(None, description="Only events starting on or before this day"),
+    session: AsyncSession = Depends(get_session),
+):
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    filters = _event_filters(continent, country, start, end)
+
+    # one cheap aggregate decides whether the calendar changed at all
+    count, last_change = (
+        await session.execute(
+            select(func.count(), func.max(Bitcoin_Events.updated_at)).where(*filters)
+        )
+    ).one()
+    etag = make_etag(count, last_change, continent, country, start, end)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=300",
+    }
+
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    return StreamingResponse(
+        _stream_calendar(filters),
+        media_type="text/calendar; charset=utf-8",
+        headers={**headers, "Content-Disposition": 'inline; filename="bch-events.ics"'},
+    )
@@ -1,57 +1,196 @@
+import asyncio
 import io
 import os
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query
+import time
+from functools import lru_cache
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import Response
 from pymongo import MongoClient
 from bson import ObjectId
 import gridfs
-import boto3, uuid
+import boto3
+from pymongo import ReturnDocument
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+from app.services.blobs import IMMUTABLE_CACHE_CONTROL, blob_sha256, item_keys, put_blob, release_blobs
+from app.services.cache import cached_response, invalidate, invalidate_from_thread
+from app.services.images import VARIANT_CONTENT_TYPE, VARIANT_WIDTHS, make_variants, pick_width
+from app.services.metrics import instrument_boto3_client, mongo_listener
 router = APIRouter(prefix="/explore", tags=["Explore"])
 
 # Mongo setup
-client = MongoClient(os.getenv("MONGO_URI"))
+client = MongoClient(os.getenv("MONGO_URI"), event_listeners=[mongo_listener])
 db = client["BitcoinCultureHub"]
 col = db["explore2"]
+# every collection whose items may point at stored images; the orphan sweep keeps what any of them reference
+IMAGE_COLLECTIONS = [col, db["explore"]]
 fs = gridfs.GridFS(db, collection="images")
+blobs_col = db["image_blobs"]  # S3 key -> reference count, see app/services/blobs.py
 BUCKET_NAME = "bitcoin-culture-hub-content-pictures"
 
-s3_client = boto3.client(
+s3_client = instrument_boto3_client(boto3.client(
     "s3",
     aws_access_key_id=os.environ["AWS_ACCESS_KEY_ID"],
     aws_secret_access_key=os.environ["AWS_SECRET_ACCESS_KEY"],
     region_name="us-east-2"
-)
+))
+TEXT_INDEX_FIELDS = ("title", "description", "summary", "bio", "tags")
+TAG_FACET_LIMIT = 50
+GRIDFS_ROUTE = "/explore/image/"
+FALLBACK_CACHE_CONTROL = "public, max-age=300"
+PRESIGN_EXPIRES = 3600
+# a URL is reused for one window, so it always has at least half its life left
+PRESIGN_WINDOW = PRESIGN_EXPIRES // 2
+
+
+def ensure_indexes():
+    """Create the Explore indexes; called once at startup (no-op when they exist)."""
+    col.create_index(
+        [(field, "text") for field in TEXT_INDEX_FIELDS],
+        name="explore_text",
+        weights={"title": 10, "tags": 5, "summary": 3, "description": 2, "bio": 1},
+        default_language="english",
+    )
+    col.create_index("tags", name="explore_tags")  # multikey: one entry per tag
+    col.create_index("category", name="explore_category")
+    col.create_index("title", name="explore_title")  # bookmark $lookup
+    db["images.files"].create_index(
+        [("metadata.variant_of", 1), ("metadata.width", 1)], name="images_variant_of", sparse=True
+    )
+    blobs_col.create_index("orphaned_at", name="image_blobs_orphaned_at", sparse=True)
+    # reference lookups for the orphan sweep
+    col.create_index("image_id", name="explore_image_id", sparse=True)
+    col.create_index("image_url", name="explore_image_url", sparse=True)
+    for width in VARIANT_WIDTHS:
+        col.create_index(f"variants.{width}", name=f"explore_variant_{width}", sparse=True)
+
+
+def _explore_filter(category: str | None, tags: list[str] | None) -> dict:
+    q = {}
+    if category:
+        cleaned = category.strip().rstrip(",").lower()
+        q["category"] = {"$regex": f"^{cleaned}", "$options": "i"}
+    cleaned_tags = [t.strip() for t in tags or [] if t.strip()]
+    if cleaned_tags:
+        q["tags"] = {"$all": cleaned_tags}
+    return q
+
+
+@lru_cache(maxsize=8192)
+def _presign(key: str, window: int) -> str:
+    return s3_client.generate_presigned_url(
+        "get_object",
+        Params={"Bucket": BUCKET_NAME, "Key": key},
+        ExpiresIn=PRESIGN_EXPIRES,
+    )
+
+
+def image_url_for(item: dict, size: int | None = None) -> str | None:
+    """Browser URL for an item's image: a cached presigned S3 URL, or the GridFS route."""
+    key = item.get("image_url")
+    if not key:
+        return None
+    width = pick_width(size)
+    if key.startswith(GRIDFS_ROUTE):
+        return f"{key}?size={width}" if width else key
+    # fall back to the original when the item has no variants yet
+    if width:
+        key = (item.get("variants") or {}).get(str(width), key)
+    return _presign(key, int(time.time() // PRESIGN_WINDOW))
+
+
+def _attach_image_url(item: dict, size: int | None = None) -> dict:
+    if item.get("image_url"):
+        item["image_url"] = image_url_for(item, size)
+    return item
+
+
 @router.get("/", response_model=list[dict])
-def list_items(category: str | None = Query(default=None)):
+async def list_items(
+    request: Request,
+    category: str | None = Query(default=None),
+    tag: list[str] | None = Query(default=None),
+    size: int | None = Query(default=None, ge=1, le=4096, description="Display width; picks the closest variant"),
+):
     """
-    Return all explore items, optionally filtered by category,
-    and attach a proper MongoDB GridFS image URL.
+    Return all explore items, optionally filtered by category and tags,
+    and attach a presigned S3 image URL (of the `size` variant if given).
     """
+    q = _explore_filter(category, tag)
 
-    base_url = "https://bch-backend-7vjs.onrender.com"  # change when deploying
-   # base_url = os.getenv("BASE_URL", "http://localhost:8000")
+    def load():
+        items = [_attach_image_url(item, size) for item in col.find(q, {"_id": 0})]
+        print(f"[Explore] Returning {len(items)} items (filter={category}, tags={tag})")
+        return items
 
-    q = {}
+    # presigned URLs live for an hour, so keep cached copies well below that
+    return await cached_response(request, ["explore"], load, ttl=600)
 
-    if category:
-        cleaned = category.strip().rstrip(",").lower()
-        q = {"category": {"$regex": f"^{cleaned}", "$options": "i"}}
 
-    items = list(col.find(q, {"_id": 0}))
-    print(items)
-    for item in items:
-            print(item)
-            url = s3_client.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": BUCKET_NAME, "Key": item["image_url"]},
-            ExpiresIn=3600  
-                )
-            item["image_url"] = url
-    print(items)
-    print(f"[Explore] Returning {len(items)} items (filter={category})")
-    return items
+@router.get("/search", response_model=dict)
+def search_items(
+    q: str | None = Query(default=None, description="Text search over title, description, summary, bio and tags"),
+    category: str | None = Query(default=None),
+    tag: list[str] | None = Query(default=None),
+    limit: int = Query(default=24, ge=1, le=100),
+    skip: int = Query(default=0, ge=0),
+    size: int | None = Query(default=None, ge=1, le=4096),
+):
+    """
+    One aggregation round trip: the ranked results page plus per-category and
+    per-tag counts for everything that matched.
+    """
+    match = _explore_filter(category, tag)
+    pipeline = []
+
+    if q and q.strip():
+        # $text has to be in the first $match of the pipeline
+        match["$text"] = {"$search": q.strip()}
+        pipeline.append({"$match": match})
+        pipeline.append({"$addFields": {"score": {"$meta": "textScore"}}})
+        sort = {"score": -1, "title": 1}
+    else:
+        pipeline.append({"$match": match})
+        sort = {"title": 1}
+
+    pipeline.append({
+        "$facet": {
+            "items": [
+                {"$sort": sort},
+                {"$skip": skip},
+                {"$limit": limit},
+                {"$project": {"_id": 0}},
+            ],
+            "total": [{"$count": "count"}],
+            "categories": [
+                {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+            ],
+            "tags": [
+                {"$unwind": "$tags"},
+                {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                {"$limit": TAG_FACET_LIMIT},
+            ],
+        }
+    })
+
+    result = next(col.aggregate(pipeline), None) or {}
+    total = result.get("total") or [{"count": 0}]
+
+    return {
+        "total": total[0]["count"],
+        "limit": limit,
+        "skip": skip,
+        "items": [_attach_image_url(item, size) for item in result.get("items", [])],
+        "facets": {
+            "categories": [
+                {"category": c["_id"], "count": c["count"]} for c in result.get("categories", [])
+            ],
+            "tags": [{"tag": t["_id"], "count": t["count"]} for t in result.get("tags", [])],
+        },
+    }
 
 
 
@@ -76,6 +215,7 @@ def accept_item_by_title(title: str):
 
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Item not found")
+    invalidate_from_thread("explore")
 
     # Return the updated document
     item = col.find_one({"title": title}, {"_id": 0})
@@ -86,34 +226,37 @@ def delete_item_by_title(title: str):
     Delete the first document in the collection matching the given title.
     """
     
-    # find the image url from the title. so we can delete the image in the s3 bucket for memory constraints
-    found_item = col.find_one({"title":title})
-    image_title = found_item["image_url"]
-    result = col.delete_one({"title": title})
-    # s3 interaction 
-    s3_client.delete_object(
-    Bucket=BUCKET_NAME,
-    Key=image_title,
-    )
-
-    if result.deleted_count == 0:
+    found_item = col.find_one_and_delete({"title": title}, {"image_url": 1, "variants": 1})
+    if found_item is None:
         raise HTTPException(status_code=404, detail="Item not found")
+    # stored images are reclaimed by the orphan sweep (app/services/image_gc.py)
+    release_blobs(blobs_col, item_keys(found_item))
+    invalidate_from_thread("explore")
 
-    return {"ok": True, "title": title, "deleted_count": result.deleted_count}
+    return {"ok": True, "title": title, "deleted_count": 1}
 
 @router.get("/image/{image_id}")
-def serve_image(image_id: str):
+def serve_image(image_id: str, size: int | None = Query(default=None, ge=1, le=4096)):
     """
-    Serve image files from MongoDB GridFS using their ObjectId.
+    Serve image files from MongoDB GridFS using their ObjectId, or the
+    resized WebP variant closest to `size` when one exists.
     """
     try:
         oid = ObjectId(image_id)
-        file = fs.get(oid)
+        variant = None
+        if size:
+            variant = db["images.files"].find_one(
+                {"metadata.variant_of": oid, "metadata.width": pick_width(size)}, {"_id": 1}
+            )
+        file = fs.get(variant["_id"] if variant else oid)
 
         content_type = getattr(file, "content_type", None) or "image/png"
 
+        # GridFS files are never rewritten in place, so an id always means the
+        # same bytes; but a ?size= URL served the original only until the
+        # variant exists, so that fallback mustn't be cached for long
         headers = {
-            "Cache-Control": "public, max-age=3600",
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if not size or variant else FALLBACK_CACHE_CONTROL,
             "Content-Disposition": f'inline; filename="{file.filename}"'
         }
 
@@ -136,16 +279,26 @@ async def create_item(
     tags: str | None = Form(None),
     file: UploadFile | None = File(None),
 ):
-    image_id = uuid.uuid4()
+    image_key = None
+    variants = {}
 
-    content = await file.read()
+    if file:
+        content = await file.read()
+        try:
+            rendered = await make_variants(content)
+        except Exception as e:
+            # not an image Pillow can read; keep the original only
+            print(f"[Explore] no variants for {file.filename}: {e}")
+            rendered = {}
 
-    s3_client.put_object(
-            Bucket=BUCKET_NAME,
-            Key=file.filename,
-            Body=content,
-            ContentType=file.content_type,
-        )
+        # content-hash keys: a blob S3 already has costs a HEAD, not a PUT
+        uploads = [(content, file.content_type)] + [(data, VARIANT_CONTENT_TYPE) for data in rendered.values()]
+        keys = await asyncio.gather(*(
+            run_in_threadpool(put_blob, s3_client, BUCKET_NAME, blobs_col, body, content_type)
+            for body, content_type in uploads
+        ))
+        image_key = keys[0]
+        variants = {str(width): key for width, key in zip(rendered, keys[1:])}
 
     doc: dict = {
         "id": "-".join(title.lower().split()),
@@ -154,10 +307,18 @@ async def create_item(
         "category": category,
         "type": type,
         "tags": [t.strip() for t in (tags or "").split(",") if t.strip()],
-        "image_id": str(image_id) if image_id else None,
-        "image_url": f"{file.filename}" if image_id else None,
+        "image_id": blob_sha256(image_key) if image_key else None,
+        "image_url": image_key,
+        "variants": variants,
         "accepted":False
     }
     print(doc)
-    col.update_one({"id": doc["id"]}, {"$set": doc}, upsert=True)
+    previous = col.find_one_and_update(
+        {"id": doc["id"]}, {"$set": doc}, upsert=True,
+        projection={"image_url": 1, "variants": 1}, return_document=ReturnDocument.BEFORE,
+    )
+    if previous:
+        # re-posting an item replaces its image
+        release_blobs(blobs_col, item_keys(previous))
+    await invalidate("explore")
     return {"ok": True, "id": doc["id"], "image_id": doc["image_id"]}
@@ -1,21 +1,25 @@
-from collections import defaultdict
 from typing import List, Optional
 import uuid
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from boto3.dynamodb.conditions import Key,Attr
 from pydantic import BaseModel
 
-from app.routers.opportunity2 import ensure_member
+from fastapi.responses import ORJSONResponse
+from app.routers.opportunity2 import ensure_member, load_opportunity_rows
 
 from ..services.auth_service import get_current_user
-from ..models.model import OpportunityCategory, OpportunityRead, Organization,Opportunity
+from ..models.model import OpportunityRead, Organization,Opportunity
 import boto3
 import os
+from sqlalchemy import func, update
 from sqlmodel import SQLModel, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from ..services.auth_service import get_current_user
 from app.db import get_session
+from app.services.analytics import refresh_opportunity_rollups
+from app.services.applicant_dashboard import load_applications
+from app.services.cache import cached_response
 from ..models.model import OrganizationMember, Application
 router = APIRouter(prefix="/general", tags=["organizations"])
 from fastapi import Query
@@ -40,47 +44,27 @@ class UpdateApplicationStatusPayload(BaseModel):
 
 @router.get("/orgs")
 async def all_orgs(
+    request: Request,
     session: AsyncSession = Depends(get_session)
 ):
-    print(session)
-    result = await session.exec(
-        select(Organization).where(Organization.deleted_at.is_(None))
-    )
-    return result.all()
+    async def load():
+        result = await session.exec(
+            select(Organization).where(Organization.deleted_at.is_(None))
+        )
+        return result.all()
+
+    return await cached_response(request, ["orgs"], load)
 
 
 
 
 
 @router.get("/opportunity", response_model=List[OpportunityRead])
-async def all_opportunities(session: AsyncSession = Depends(get_session)):
-    stmt = (
-        select(Opportunity, Organization.name.label("org_name"))
-        .join(Organization, Organization.id == Opportunity.org_id).where(Opportunity.deleted_at.is_(None))
-    )
-    results = await session.exec(stmt)
-    opportunities_with_org = results.all()
-
-    stmt_cats = select(OpportunityCategory)
-    cats_result = await session.exec(stmt_cats)
-    all_cats = cats_result.all()
-
-    cats_map = defaultdict(list)
-    for oc in all_cats:
-        cats_map[oc.opportunity_id].append(oc.category)
-
-    final_list = []
-    for opp, org_name in opportunities_with_org:
-        categories = cats_map.get(opp.id, [])
-        final_list.append(
-            OpportunityRead(
-                **opp.dict(),
-                org_name=org_name,
-                categories=categories
-            )
-        )
+async def all_opportunities(request: Request, session: AsyncSession = Depends(get_session)):
+    async def load():
+        return await load_opportunity_rows(session, Opportunity.deleted_at.is_(None))
 
-    return final_list
+    return await cached_response(request, ["opportunities", "orgs"], load)
 
 
 @router.get("/myapplications", response_model=List[ApplicationRead])
@@ -88,28 +72,7 @@ async def user_applicants(
     user=Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
-    user_id = user["user_id"]
-
-    stmt = (
-        select(
-            Application,
-            Opportunity.title.label("opportunity_name"),
-            Opportunity.type.label("opportunity_type")
-        )
-        .join(Opportunity, Opportunity.id == Application.opportunity_id)
-        .where(Application.user_id == user_id,Application.deleted_at.is_(None))# changed here
-    )
-
-    result = await session.exec(stmt)
-
-    return [
-        ApplicationRead(
-            **application.dict(),
-            opportunity_name=opportunity_name,
-            opportunity_type=opportunity_type
-        )
-        for application, opportunity_name, opportunity_type in result.all()
-    ]
+    return ORJSONResponse(await load_applications(session, user["user_id"]))
 
 @router.put("/applications/{app_id}/status", response_model=dict)
 async def update_application_status(
@@ -118,30 +81,34 @@ async def update_application_status(
     user=Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
-    result = await session.exec(
-        select(Application).where(Application.id == app_id)
-    )
-    print(result, ' is the result')
-    app = result.one_or_none()
-
-    if not app:
-        raise HTTPException(status_code=404, detail="Application not found")
-
-
     action = payload.action.lower()
 
-    if action == "in_progress":
-        app.status = "in_progress"
-    elif action == "rejected":
-        app.status = "rejected"
-    else:
+    if action not in ("in_progress", "rejected"):
         raise HTTPException(
             status_code=400,
             detail="Invalid action. Must be 'in_progress' or 'rejected'.",
         )
 
+    # single UPDATE instead of load + mutate + commit + refresh
+    stmt = (
+        update(Application)
+        .where(Application.id == app_id)
+        .values(
+            status=action,
+            decided_at=func.coalesce(Application.decided_at, datetime.utcnow()),
+        )
+    )
+    if session.get_bind().dialect.update_returning:
+        result = await session.execute(stmt.returning(Application.opportunity_id))
+    else:
+        await session.execute(stmt)
+        result = await session.execute(select(Application.opportunity_id).where(Application.id == app_id))
+    opp_id = result.scalar_one_or_none()
+    if opp_id is None:
+        raise HTTPException(status_code=404, detail="Application not found")
+
+    await refresh_opportunity_rollups(session, [opp_id])
     await session.commit()
-    await session.refresh(app)
 
-    return {"id": app.id, "status": app.status}
+    return {"id": app_id, "status": action}
 
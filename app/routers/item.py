@@ -1,57 +1,181 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError, OperationFailure
 from ..db import bookmark_collection
 from .. import schemas
+from app.routers import explore
+from app.services.pagination import decode_cursor, encode_cursor
 from datetime import datetime
-from typing import List
 from bson import ObjectId
+from bson.errors import InvalidId
 
 router = APIRouter(prefix="/bookmarks", tags=["bookmarks"])
 
+DEFAULT_PAGE_SIZE = 50
+MAX_LOOKUP_TITLES = 200
+CARD_DESCRIPTION_CHARS = 280
+# what an Explore card renders; variants only to pick the image size
+CARD_FIELDS = ("id", "title", "summary", "category", "type", "tags", "image_url", "variants", "description")
+
+
+def ensure_indexes():
+    """
+    Bookmark indexes; called once at startup (no-op when they exist).
+
+    Refuses to start without the unique index: create_bookmark relies on it,
+    and duplicates would pile up unnoticed.
+    """
+    # listing: a user's bookmarks newest first
+    bookmark_collection.create_index(
+        [("user_email", ASCENDING), ("_id", DESCENDING)], name="bookmarks_user_recent"
+    )
+    try:
+        # one bookmark per user and title; also answers the membership lookup
+        bookmark_collection.create_index(
+            [("user_email", ASCENDING), ("title", ASCENDING)], name="bookmarks_user_title", unique=True
+        )
+    except OperationFailure as e:
+        raise RuntimeError(f"bookmark unique index not created, run `python -m app.dedupe_bookmarks` first: {e}") from e
+
+
+def _page_query(user_email: str, cursor: str | None) -> dict:
+    query = {"user_email": user_email}
+    if cursor:
+        (last_id,) = decode_cursor(cursor, 1)
+        try:
+            query["_id"] = {"$lt": ObjectId(last_id)}
+        except (InvalidId, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return query
+
+
+def _bookmark_out(b: dict) -> dict:
+    return {
+        "id": str(b["_id"]),
+        "title": b["title"],
+        "itemType": b.get("itemType", ""),
+        "tags": b.get("tags", []),
+        "user": {"email": b["user_email"]},
+        "created_at": b["created_at"]
+    }
+
+
 @router.post("/", response_model=schemas.BookmarkOut, status_code=status.HTTP_201_CREATED)
 async def create_bookmark(bookmark: schemas.BookmarkCreate):
-    # Check if the bookmark already exists for the same user and title
-    existing = bookmark_collection.find_one({
-        "title": bookmark.title,
-        "user_email": bookmark.user_email
-    })
-    if existing:
-        raise HTTPException(status_code=409, detail="Bookmark already exists")
-
+    key = {"title": bookmark.title, "user_email": bookmark.user_email}
     new_bookmark = {
-        "title": bookmark.title,
-        "user_email": bookmark.user_email,
         "itemType": bookmark.itemType,
         "tags": bookmark.tags or [],
         "created_at": datetime.utcnow()
     }
 
-    result = bookmark_collection.insert_one(new_bookmark)
-    new_bookmark["_id"] = str(result.inserted_id)
-    print(result)
-    return {
-        "id": new_bookmark["_id"],
-        "title": new_bookmark["title"],
-        "itemType": new_bookmark["itemType"],
-        "tags": new_bookmark["tags"],
-        "user": {"email": new_bookmark["user_email"]},
-        "created_at": new_bookmark["created_at"]
-    }
+    # an existing bookmark is left untouched (upserted_id is None); the unique
+    # (user_email, title) index settles clicks that race past the lookup
+    try:
+        result = bookmark_collection.update_one(key, {"$setOnInsert": new_bookmark}, upsert=True)
+    except DuplicateKeyError:
+        result = None
+    if result is None or result.upserted_id is None:
+        raise HTTPException(status_code=409, detail="Bookmark already exists")
+    return _bookmark_out({"_id": result.upserted_id, **key, **new_bookmark})
+
+
+@router.get("/{user_email}", response_model=list[schemas.BookmarkOut] | schemas.BookmarkPage)
+async def get_user_bookmarks(
+    user_email: str,
+    cursor: str | None = Query(None),
+    limit: int | None = Query(None, ge=1, le=200, description="Opt in to pages of {items, next_cursor}"),
+):
+    """
+    A user's bookmarks. Without `limit` or `cursor` this is the plain list
+    existing clients expect; with either it is keyset-paginated newest first
+    on _id, `limit` (default 50) per page.
+    """
+    if limit is None and cursor is None:
+        return [_bookmark_out(b) for b in bookmark_collection.find({"user_email": user_email})]
+
+    limit = limit or DEFAULT_PAGE_SIZE
+    query = _page_query(user_email, cursor)
+
+    # one extra document tells us whether there is a next page
+    bookmarks = list(bookmark_collection.find(query).sort("_id", DESCENDING).limit(limit + 1))
+
+    next_cursor = None
+    if len(bookmarks) > limit:
+        bookmarks = bookmarks[:limit]
+        next_cursor = encode_cursor(str(bookmarks[-1]["_id"]))
 
+    return {"items": [_bookmark_out(b) for b in bookmarks], "next_cursor": next_cursor}
 
-@router.get("/{user_email}", response_model=List[schemas.BookmarkOut])
-async def get_user_bookmarks(user_email: str):
-    bookmarks = list(bookmark_collection.find({"user_email": user_email}))
-    return [
-        {
-            "id": str(b["_id"]),
-            "title": b["title"],
-            "itemType": b.get("itemType", ""),
-            "tags": b.get("tags", []),
-            "user": {"email": b["user_email"]},
-            "created_at": b["created_at"]
-        }
-        for b in bookmarks
+
+@router.get("/{user_email}/items", response_model=schemas.SavedItemPage)
+def get_saved_items(
+    user_email: str,
+    cursor: str | None = Query(None),
+    limit: int = Query(24, ge=1, le=100),
+    size: int | None = Query(None, ge=1, le=4096, description="Card image width; picks the closest variant"),
+):
+    """
+    A page of the user's bookmarks with their Explore cards, in one
+    aggregation: the page is cut first, then each bookmark is joined to its
+    item through the explore2 title index and only the card fields are kept.
+
+    The plain localField/foreignField $lookup runs on any MongoDB since 3.2
+    (and under mongomock); the description is cut to card length here.
+    """
+    pipeline = [
+        {"$match": _page_query(user_email, cursor)},
+        {"$sort": {"_id": -1}},
+        {"$limit": limit + 1},
+        {"$lookup": {
+            "from": explore.col.name,
+            "localField": "title",
+            "foreignField": "title",
+            "as": "item",
+        }},
+        {"$project": {
+            "title": 1, "itemType": 1, "tags": 1, "created_at": 1,
+            **{f"item.{field}": 1 for field in CARD_FIELDS},
+        }},
     ]
+    rows = list(bookmark_collection.aggregate(pipeline))
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(str(rows[-1]["_id"]))
+
+    items = []
+    for row in rows:
+        card = next(iter(row.get("item") or []), None)
+        if card:
+            card["description"] = (card.get("description") or "")[:CARD_DESCRIPTION_CHARS]
+            card["image_url"] = explore.image_url_for(card, size)
+            card.pop("variants", None)
+        items.append({
+            "bookmark_id": str(row["_id"]),
+            "title": row["title"],
+            "itemType": row.get("itemType", ""),
+            "tags": row.get("tags", []),
+            "created_at": row["created_at"],
+            "item": card,
+        })
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.post("/{user_email}/lookup", response_model=schemas.BookmarkMembership)
+async def lookup_bookmarks(user_email: str, body: schemas.BookmarkLookup):
+    """Which of these explore items has the user bookmarked? One indexed $in query for a whole grid."""
+    titles = list(dict.fromkeys(body.titles))
+    if len(titles) > MAX_LOOKUP_TITLES:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_LOOKUP_TITLES} titles per lookup")
+    if not titles:
+        return {"bookmarked": {}}
+
+    found = bookmark_collection.find(
+        {"user_email": user_email, "title": {"$in": titles}}, {"title": 1}
+    )
+    return {"bookmarked": {b["title"]: str(b["_id"]) for b in found}}
 
 # Delete a bookmark by ID
 @router.delete("/{bookmark_id}", status_code=200)
@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Response
+
+from app.services.metrics import metrics_payload
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = metrics_payload()
+    return Response(content=body, media_type=content_type)
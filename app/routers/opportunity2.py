@@ -1,13 +1,20 @@
+import csv
+import io
+from collections import defaultdict
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from sqlalchemy import delete, select
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from sqlalchemy import delete, func, insert, select, update
 from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime
 import uuid
 from ..models.model import Organization, OrganizationMember, OpportunityCategory, Opportunity,Application,OpportunityRead,Tools,OutputType,Profile,UpdateStatusRequest, InterviewSlot
 from ..db import get_session
 from ..services.auth_service import get_current_user
+from ..services import search as search_index
+from ..services.cache import invalidate
+from ..services.analytics import refresh_opportunity_rollups
 
 BUCKET_NAME = 'bitcoin-culture-hub-resumes'
 
@@ -28,10 +35,23 @@ class OpportunityCreate(BaseModel):
     time_commitment: str | None = None
     categories: List[str] | None = None
     skill_level:str|None = None
-    estimated_hours:int|None = None
-    due_date : str | None = None
+    # the column is a string ("10", "5-10"); older clients still send a number
+    estimated_hours:str|None = None
+    due_date : datetime | None = None
     tools:List[str] | None = None
     output_type:List[str]| None = None
+
+    @field_validator("estimated_hours", mode="before")
+    @classmethod
+    def _hours_as_text(cls, value):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        return value
+
+    @field_validator("due_date", mode="before")
+    @classmethod
+    def _blank_due_date(cls, value):
+        return None if value == "" else value
     
 class OpportunityUpdate(BaseModel):
     title: str | None = None
@@ -72,7 +92,230 @@ class CreateInterviewSlotsRequest(BaseModel):
     
 class ReadInterviewRequest(BaseModel):
     slot_id:str
-    
+
+
+BULK_IMPORT_MAX_ROWS = 1000
+
+# CSV columns holding several values use ";" between them
+CSV_LIST_COLUMNS = ("categories", "tools", "output_type")
+
+
+class BulkStatusUpdateRequest(BaseModel):
+    application_ids: List[str] = Field(..., min_length=1, max_length=1000)
+    status: str
+
+
+async def set_applicants_status(
+    session: AsyncSession,
+    opp_id: str,
+    application_ids: List[str],
+    new_status: str,
+) -> dict:
+    """
+    Move applications of one opportunity to `new_status` and drop their
+    interview slots, set-based: one SELECT to classify the ids, one UPDATE
+    and one DELETE for everything that actually changes. Does not commit.
+    Returns {application_id: "updated" | "unchanged" | "not_found"}.
+    """
+    ids = list(dict.fromkeys(application_ids))
+
+    result = await session.execute(
+        select(Application.id, Application.status).where(
+            Application.id.in_(ids),
+            Application.opportunity_id == opp_id,
+        )
+    )
+    current = dict(result.all())
+
+    outcomes = {}
+    changed = []
+    for app_id in ids:
+        if app_id not in current:
+            outcomes[app_id] = "not_found"
+        elif current[app_id] == new_status:
+            outcomes[app_id] = "unchanged"
+        else:
+            outcomes[app_id] = "updated"
+            changed.append(app_id)
+
+    if changed:
+        await session.execute(
+            update(Application)
+            .where(Application.id.in_(changed))
+            .values(
+                status=new_status,
+                decided_at=func.coalesce(Application.decided_at, datetime.utcnow()),
+            )
+        )
+        await session.execute(
+            delete(InterviewSlot).where(
+                InterviewSlot.applicant_id.in_(changed),
+                InterviewSlot.opportunity_id == opp_id,
+            )
+        )
+        await refresh_opportunity_rollups(session, [opp_id])
+
+    return outcomes
+
+
+# Exactly the OpportunityRead fields, selected as plain columns so list
+# endpoints never build ORM instances or pydantic models per row.
+OPPORTUNITY_READ_COLUMNS = (
+    Opportunity.id,
+    Opportunity.org_id,
+    Opportunity.title,
+    Opportunity.type,
+    Opportunity.description,
+    Opportunity.location,
+    Opportunity.time_commitment,
+    Opportunity.created_at,
+    Opportunity.created_by,
+    Organization.name.label("org_name"),
+)
+
+
+async def load_opportunity_rows(session: AsyncSession, *criteria) -> list[dict]:
+    """
+    OpportunityRead-shaped dicts for every opportunity matching `criteria`,
+    in two queries (rows + their categories). The output is already in
+    response shape; return it through ORJSONResponse to skip re-validation.
+    """
+    stmt = (
+        select(*OPPORTUNITY_READ_COLUMNS)
+        .join(Organization, Organization.id == Opportunity.org_id)
+        .where(*criteria)
+    )
+    rows = [row._asdict() for row in (await session.execute(stmt)).all()]
+    if not rows:
+        return rows
+
+    matching_ids = (
+        select(Opportunity.id)
+        .join(Organization, Organization.id == Opportunity.org_id)
+        .where(*criteria)
+    )
+    cats_result = await session.execute(
+        select(OpportunityCategory.opportunity_id, OpportunityCategory.category).where(
+            OpportunityCategory.opportunity_id.in_(matching_ids)
+        )
+    )
+    cats_map = defaultdict(list)
+    for opp_id, category in cats_result.all():
+        cats_map[opp_id].append(category)
+
+    for row in rows:
+        row["categories"] = cats_map.get(row["id"], [])
+    return rows
+
+
+async def insert_opportunities(
+    session: AsyncSession,
+    org_id: str,
+    user_id: str,
+    items: List[OpportunityCreate],
+) -> List[Opportunity]:
+    """
+    Insert opportunities with their categories, tools and output types using
+    one multi-row INSERT per table, and index them for search. Ids are
+    generated here so nothing has to be flushed or read back. Does not commit.
+    """
+    now = datetime.utcnow()
+    opps, cat_rows, tool_rows, output_rows, indexed = [], [], [], [], []
+
+    for data in items:
+        opp = Opportunity(
+            id=str(uuid.uuid4()),
+            org_id=org_id,
+            title=data.title,
+            type=data.type,
+            description=data.description,
+            location=data.location.text if data.location else "Remote",
+            time_commitment=data.time_commitment,
+            skill_level=data.skill_level,
+            estimated_hours=data.estimated_hours,
+            due_date=data.due_date,
+            created_at=now,
+            created_by=user_id,
+        )
+        opps.append(opp)
+
+        # (opportunity_id, category) is the primary key
+        categories = list(dict.fromkeys(data.categories or []))
+        cat_rows += [{"opportunity_id": opp.id, "category": c} for c in categories]
+        tool_rows += [{"opportunity_id": opp.id, "tool_name": t} for t in data.tools or []]
+        output_rows += [{"opportunity_id": opp.id, "output_type": o} for o in data.output_type or []]
+        indexed.append((opp, categories))
+
+    if not opps:
+        return []
+
+    await session.execute(
+        insert(Opportunity),
+        [opp.model_dump(exclude={"summary", "deleted_at"}) for opp in opps],
+    )
+    for model, rows in ((OpportunityCategory, cat_rows), (Tools, tool_rows), (OutputType, output_rows)):
+        if rows:
+            await session.execute(insert(model), rows)
+
+    await search_index.index_opportunities(session, indexed)
+    return opps
+
+
+def _csv_rows(raw: bytes) -> List[dict]:
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(400, "CSV must be UTF-8 encoded")
+
+    rows = []
+    for record in csv.DictReader(io.StringIO(text)):
+        row = {k.strip(): (v or "").strip() for k, v in record.items() if k}
+        for column in CSV_LIST_COLUMNS:
+            if column in row:
+                row[column] = [v.strip() for v in row[column].split(";") if v.strip()]
+        if row.get("location"):
+            row["location"] = {"type": row.pop("location_type", "") or "onsite", "text": row["location"]}
+        else:
+            row.pop("location", None)
+            row.pop("location_type", None)
+        # empty cells mean "not set", not an empty string
+        rows.append({k: v for k, v in row.items() if v not in ("", [])})
+    return rows
+
+
+async def import_opportunities(
+    org_id: str,
+    raw_rows: List[dict],
+    user_id: str,
+    session: AsyncSession,
+) -> dict:
+    if not raw_rows:
+        raise HTTPException(400, "No rows to import")
+    if len(raw_rows) > BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(413, f"At most {BULK_IMPORT_MAX_ROWS} rows per import")
+
+    valid, positions, errors = [], [], []
+    for position, raw in enumerate(raw_rows, start=1):
+        try:
+            valid.append(OpportunityCreate.model_validate(raw))
+            positions.append(position)
+        except ValidationError as e:
+            errors.append({"row": position, "errors": e.errors(include_url=False, include_context=False)})
+
+    opps = await insert_opportunities(session, org_id, user_id, valid)
+    await session.commit()
+    if opps:
+        await invalidate("opportunities")
+
+    return {
+        "created": [
+            {"row": position, "id": opp.id, "title": opp.title}
+            for position, opp in zip(positions, opps)
+        ],
+        "errors": errors,
+    }
+
+
 async def ensure_member(org_id: str, user_id: str, session: AsyncSession):
     result = await session.exec(
         select(OrganizationMember).where(
@@ -94,49 +337,43 @@ async def create_opportunity(
 ):
     await ensure_member(org_id, user["user_id"], session)
 
-    opp = Opportunity(
-        org_id=org_id,
-        title=data.title,
-        type=data.type,
-        description=data.description,
-        location=data.location.text if data.location else "Remote",
-        time_commitment=data.time_commitment,
-        skill_level=data.skill_level,
-        estimated_hours=data.estimated_hours,
-        due_date=data.due_date,
-        created_at=datetime.utcnow(),
-        created_by=user["user_id"],
-    )
+    [opp] = await insert_opportunities(session, org_id, user["user_id"], [data])
+    await session.commit()
+    await invalidate("opportunities")
+    return opp
 
-    session.add(opp)
-    await session.flush()  # This ensures opp.id is available
 
-    for category in data.categories or []:
-        session.add(
-            OpportunityCategory(
-                opportunity_id=opp.id,
-                category=category
-            )
-        )
+@router.post("/bulk")
+async def bulk_create_opportunities(
+    org_id: str,
+    rows: List[dict],
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Create many opportunities at once from a JSON array of OpportunityCreate
+    objects. Invalid rows are reported (1-based) and skipped; the valid ones
+    are inserted together in one transaction.
+    """
+    await ensure_member(org_id, user["user_id"], session)
+    return await import_opportunities(org_id, rows, user["user_id"], session)
 
-    for tool in data.tools or []:
-        session.add(
-            Tools(
-                opportunity_id=opp.id,
-                tool_name=tool
-            )
-        )
 
-    for output in data.output_type or []:
-        session.add(
-            OutputType(
-                opportunity_id=opp.id,
-                output_type=output
-            )
-        )
-    await session.commit()
-    await session.refresh(opp) 
-    return opp
+@router.post("/bulk/csv")
+async def bulk_create_opportunities_csv(
+    org_id: str,
+    file: UploadFile = File(...),
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Same as /bulk, from a spreadsheet export. Columns are the OpportunityCreate
+    fields plus an optional location_type; categories, tools and output_type
+    take several values separated by ";".
+    """
+    await ensure_member(org_id, user["user_id"], session)
+    rows = _csv_rows(await file.read())
+    return await import_opportunities(org_id, rows, user["user_id"], session)
 
 
 @router.delete("/{opportunity_id}")
@@ -170,7 +407,9 @@ async def delete_opportunity(
     )
 
     await session.delete(opp)
+    await search_index.remove_from_index(session, search_index.OPPORTUNITY, opportunity_id)
     await session.commit()
+    await invalidate("opportunities")
 
     return {"detail": "Opportunity deleted successfully"}
 
@@ -182,33 +421,12 @@ async def list_opportunities(
     org_id: str,
     session: AsyncSession = Depends(get_session),
 ):
-    stmt = (
-        select(
-            Opportunity,
-            Organization.name.label("org_name")
-        )
-        .join(Organization, Organization.id == Opportunity.org_id)
-        .where(Opportunity.org_id == org_id,Organization.deleted_at.is_(None))
+    rows = await load_opportunity_rows(
+        session,
+        Opportunity.org_id == org_id,
+        Organization.deleted_at.is_(None),
     )
-
-    results = await session.exec(stmt)
-    opportunities_with_org = results.all()
-
-    final_list = []
-    for opportunity, org_name in opportunities_with_org:
-        cat_stmt = select(OpportunityCategory.category).where(
-            OpportunityCategory.opportunity_id == opportunity.id
-        )
-        categories_result = await session.exec(cat_stmt)
-        categories = [c[0] for c in categories_result.all()]
-        final_list.append(
-            OpportunityRead(
-                **opportunity.dict(),
-                org_name=org_name,
-                categories=categories
-            )
-        )
-    return final_list
+    return ORJSONResponse(rows)
 
 
 
@@ -222,56 +440,60 @@ async def patch_opportunity(
     data: OpportunityUpdate,
     session: AsyncSession = Depends(get_session),
 ):
-    opportunity = await session.get(Opportunity, opp_id)
+    update_data = data.dict(exclude_unset=True)
+    values = {k: v for k, v in update_data.items() if k != "categories"}
+
+    # the response comes straight out of the UPDATE (RETURNING, org name via a
+    # correlated subquery); dialects without UPDATE ... RETURNING re-select once
+    org_name = (
+        select(Organization.name)
+        .where(Organization.id == Opportunity.org_id)
+        .correlate(Opportunity)
+        .scalar_subquery()
+    )
+    columns = (*OPPORTUNITY_READ_COLUMNS[:-1], org_name.label("org_name"))
+    where = (Opportunity.id == opp_id, Opportunity.org_id == org_id)
 
-    if not opportunity or opportunity.org_id != org_id:
-        raise HTTPException(status_code=404, detail="Opportunity not found")
+    if values and session.get_bind().dialect.update_returning:
+        result = await session.execute(
+            update(Opportunity).where(*where).values(**values).returning(*columns)
+        )
+    else:
+        if values:
+            await session.execute(update(Opportunity).where(*where).values(**values))
+        result = await session.execute(select(*columns).where(*where))
 
-    update_data = data.dict(exclude_unset=True)
-    
-    for field, value in update_data.items():
-        if field != "categories":
-            setattr(opportunity, field, value)
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Opportunity not found")
+    opportunity = row._asdict()
+    org_name = opportunity.pop("org_name")
 
     if "categories" in update_data:
-        new_categories = update_data["categories"]
+        categories = list(dict.fromkeys(update_data["categories"] or []))
 
         await session.execute(
             delete(OpportunityCategory).where(
                 OpportunityCategory.opportunity_id == opp_id
             )
         )
-
-        session.add_all(
-            OpportunityCategory(opportunity_id=opp_id, category=cat)
-            for cat in new_categories
-        )
-    await session.commit()
-    await session.refresh(opportunity)
-
-    stmt = (
-        select(
-            Opportunity,
-            Organization.name.label("org_name")
+        if categories:
+            await session.execute(
+                insert(OpportunityCategory),
+                [{"opportunity_id": opp_id, "category": cat} for cat in categories],
+            )
+    else:
+        cat_stmt = select(OpportunityCategory.category).where(
+            OpportunityCategory.opportunity_id == opp_id
         )
-        .join(Organization, Organization.id == Opportunity.org_id)
-        .where(Opportunity.id == opp_id)
-    )
-
-    result = await session.exec(stmt)
-    opportunity, org_name = result.one()
+        categories_result = await session.exec(cat_stmt)
+        categories = [c[0] for c in categories_result.all()]
 
-    cat_stmt = select(OpportunityCategory.category).where(
-    OpportunityCategory.opportunity_id == opp_id
-)
-    categories_result = await session.exec(cat_stmt)
-    categories = [c[0] for c in categories_result.all()]  
+    await search_index.index_opportunity(session, Opportunity(**opportunity), categories)
+    await session.commit()
+    await invalidate("opportunities")
 
-    return OpportunityRead(
-        **opportunity.dict(),
-        org_name=org_name,
-        categories=categories
-    )
+    return ORJSONResponse({**opportunity, "org_name": org_name, "categories": categories})
 
 @router.get("/{opp_id}", response_model=OpportunityRead)
 async def get_opportunity(
@@ -324,10 +546,13 @@ async def apply(
     print(application)
     session.add(application)
     try:
-        await session.commit()
+        await session.flush()
     except Exception:
         raise HTTPException(400, "Already applied")
 
+    await refresh_opportunity_rollups(session, [opp_id])
+    await session.commit()
+
     return {"message": "Application submitted"}
 
 
@@ -365,36 +590,46 @@ async def update_applicant_status(
 ):
     await ensure_member(payload.org_id, user["user_id"], session)
 
-    # Fetch the application
-    result = await session.exec(
-        select(Application).where(Application.id == payload.applicant_id)
+    outcomes = await set_applicants_status(
+        session, payload.opp_id, [payload.applicant_id], payload.status
     )
-    app = result.scalar_one_or_none()
-    if not app:
+    outcome = outcomes[payload.applicant_id]
+
+    if outcome == "not_found":
         raise HTTPException(status_code=404, detail="Applicant not found")
-    old_status = app.status
-    new_status = payload.status
-
-    if old_status == new_status:
-        return {"id": app.id, "status": "nothing changed"}
-    # Delete all interview slots for this applicant and opportunity
-    cancel_interview = await session.exec(
-        select(InterviewSlot).where(
-            InterviewSlot.applicant_id == payload.applicant_id,
-            InterviewSlot.opportunity_id == payload.opp_id
-        )
-    )
-    interviews = cancel_interview.scalars().all()
+    if outcome == "unchanged":
+        return {"id": payload.applicant_id, "status": "nothing changed"}
+
+    await session.commit()
+
+    return {"id": payload.applicant_id, "status": payload.status}
 
-    for interview in interviews:
-        await session.delete(interview)
 
-    app.status = payload.status
+@router.put("/{opp_id}/applicants/bulk")
+async def bulk_update_applicant_status(
+    org_id: str,
+    opp_id: str,
+    payload: BulkStatusUpdateRequest,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    """Apply one status to many applications of this opportunity in a single transaction."""
+    await ensure_member(org_id, user["user_id"], session)
+
+    opp = await session.get(Opportunity, opp_id)
+    if not opp or opp.org_id != org_id:
+        raise HTTPException(status_code=404, detail="Opportunity not found")
 
+    outcomes = await set_applicants_status(
+        session, opp_id, payload.application_ids, payload.status
+    )
     await session.commit()
-    await session.refresh(app)
 
-    return {"id": app.id, "status": app.status}
+    return {
+        "status": payload.status,
+        "updated": sum(1 for o in outcomes.values() if o == "updated"),
+        "results": [{"id": app_id, "outcome": o} for app_id, o in outcomes.items()],
+    }
 
 
 @router.post("/{opp_id}/assign-slot")
@@ -429,6 +664,7 @@ async def assign_interview_slots(
         session.add(slot)
         created_slots.append(slot)
 
+    await refresh_opportunity_rollups(session, [opp_id])
     await session.commit()
 
     return {"created_count": len(created_slots)}
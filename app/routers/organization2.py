@@ -1,14 +1,18 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlmodel import Session, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime
+import uuid
 from fastapi import Depends, HTTPException, status
 from app.db import get_session
 from ..models.model import InterviewSlot, OpportunityCategory, Organization, OrganizationMember, OrganizationRead,Opportunity,Application, OrganizationPrompts, Profile
 from app.services.auth_service import get_current_user
+from app.services import search as search_index
+from app.services.analytics import org_analytics, rebuild_org_rollups
+from app.services.cache import cached_response, invalidate
 from pydantic import BaseModel
-from sqlalchemy import func
+from sqlalchemy import func, update
 
 router = APIRouter(prefix="/org", tags=["organizations"])
 
@@ -100,7 +104,9 @@ async def create_org(
 
     session.add(org)
     session.add(member)
+    await search_index.index_organization(session, org)
     await session.commit()
+    await invalidate("orgs")
     return org
 
 
@@ -149,16 +155,16 @@ async def get_org(
 @router.get("/{org_id}/public")
 async def get_org(
     org_id: str,
+    request: Request,
     session: AsyncSession = Depends(get_session),
 ):
-    org = await session.get(Organization, org_id)
-    if not org:
-        raise HTTPException(404, "Organization not found")
-    
-    # filter 
-    # get all corresponding opportunities for the org
-    
-    return org
+    async def load():
+        org = await session.get(Organization, org_id)
+        if not org:
+            raise HTTPException(404, "Organization not found")
+        return org
+
+    return await cached_response(request, [f"org:{org_id}"], load)
 
 
 
@@ -168,16 +174,30 @@ async def edit_organizations(
     data: OrgUpdate,
     session: AsyncSession = Depends(get_session),
 ):
-    org = await session.get(Organization, org_id)
+    update_data = data.dict(exclude_unset=True)
+
+    # read the new state back from the UPDATE itself where the dialect allows it
+    if update_data and session.get_bind().dialect.update_returning:
+        result = await session.execute(
+            update(Organization)
+            .where(Organization.id == org_id)
+            .values(**update_data)
+            .returning(Organization)
+        )
+        org = result.scalars().first()
+    else:
+        if update_data:
+            await session.execute(
+                update(Organization).where(Organization.id == org_id).values(**update_data)
+            )
+        org = await session.get(Organization, org_id, populate_existing=True)
+
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
 
-    update_data = data.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(org, field, value)
-
+    await search_index.index_organization(session, org)
     await session.commit()
-    await session.refresh(org)
+    await invalidate("orgs", f"org:{org_id}", "opportunities")
 
     return OrganizationRead.from_orm(org)
 
@@ -239,9 +259,9 @@ async def add_member(
         role=payload.role,
     )
 
+    # joined_at is set by the model default, and the session doesn't expire on commit
     session.add(member)
     await session.commit()
-    await session.refresh(member)
 
     return {
         "user_id": member.user_id,
@@ -336,6 +356,8 @@ async def archive_organization(
         )
         
 
+    await invalidate("orgs", f"org:{org_id}", "opportunities")
+
     return {
         "message": f"Organization {org.name} and all related data archived successfully"
     }
@@ -385,36 +407,60 @@ async def unarchive_organization(
 
             opp.deleted_at = None
 
+    await invalidate("orgs", f"org:{org_id}", "opportunities")
+
     return {
         "message": f"Organization {org.name} has been unarchived."
     }
+DEFAULT_PROMPTS = [
+    {"prompt_key": "what_it_is", "custom_text": "What It Is"},
+    {"prompt_key": "who_its_for", "custom_text": "Who It's For"},
+    {"prompt_key": "why_it_exists", "custom_text": "Why It Exists"},
+    {"prompt_key": "how_it_operates", "custom_text": "How It Operates"},
+]
+
+
+def _prompts_upsert(dialect: str, rows: list[dict]):
+    """One multi-row INSERT that updates custom_text when (organization_id, prompt_key) already exists."""
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        stmt = mysql_insert(OrganizationPrompts).values(rows)
+        return stmt.on_duplicate_key_update(custom_text=stmt.inserted.custom_text)
+
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+    stmt = dialect_insert(OrganizationPrompts).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[OrganizationPrompts.organization_id, OrganizationPrompts.prompt_key],
+        set_={"custom_text": stmt.excluded.custom_text},
+    )
+
+
 @router.get("/{org_id}/prompts")
 async def get_org_prompts(
     org_id: str,
+    request: Request,
     user=Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
-
-    result = await session.exec(
-        select(OrganizationPrompts).where(
-            OrganizationPrompts.organization_id == org_id
+    async def load():
+        result = await session.exec(
+            select(OrganizationPrompts.prompt_key, OrganizationPrompts.custom_text).where(
+                OrganizationPrompts.organization_id == org_id
+            )
         )
-    )
-    prompts: list[OrganizationPrompts] = result.all()
-    print(prompts)
-    if not prompts:
-        default_prompts = [
-            {"prompt_key": "what_it_is", "custom_text": "What It Is"},
-            {"prompt_key": "who_its_for", "custom_text": "Who It's For"},
-            {"prompt_key": "why_it_exists", "custom_text": "Why It Exists"},
-            {"prompt_key": "how_it_operates", "custom_text": "How It Operates"},
+        prompts = [
+            {"prompt_key": prompt_key, "custom_text": custom_text}
+            for prompt_key, custom_text in result.all()
         ]
-        return default_prompts
+        return prompts or DEFAULT_PROMPTS
 
-    return [
-        {"prompt_key": p.prompt_key, "custom_text": p.custom_text}
-        for p in prompts
-    ]
+    # authenticated: never let a shared cache keep it
+    return await cached_response(request, [f"org-prompts:{org_id}"], load, private=True)
 
 
 @router.put("/{org_id}/prompts")
@@ -432,30 +478,49 @@ async def upsert_org_prompts(
     else:
         prompts_to_upsert = [data]
 
-    for p in prompts_to_upsert:
-        result = await session.exec(
-            select(OrganizationPrompts).where(
-                OrganizationPrompts.organization_id == org_id,
-                OrganizationPrompts.prompt_key == p.prompt_key,
-            )
-        )
-        prompt = result.first()
-
-        if prompt:
-            prompt.custom_text = p.custom_text
-        else:
-            prompt = OrganizationPrompts(
-                organization_id=org_id,
-                prompt_key=p.prompt_key,
-                custom_text=p.custom_text,
-            )
-            session.add(prompt)
+    # a key repeated in one request would hit the same row twice in a single
+    # statement (Postgres rejects that); the last value wins, as it did before
+    texts = {p.prompt_key: p.custom_text for p in prompts_to_upsert}
+    if not texts:
+        return {"message": "Prompt(s) saved"}
 
+    rows = [
+        {"id": str(uuid.uuid4()), "organization_id": org_id, "prompt_key": key, "custom_text": text}
+        for key, text in texts.items()
+    ]
+    dialect = session.get_bind().dialect.name
+    await session.execute(_prompts_upsert(dialect, rows))
     await session.commit()
+
+    await invalidate(f"org-prompts:{org_id}")
     return {"message": "Prompt(s) saved"}
 
 
 
+@router.get("/{org_id}/analytics")
+async def get_org_analytics(
+    org_id: str,
+    refresh: bool = False,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Applicants per opportunity and status, average time to decision and
+    interview booking rates, read from the rollup tables. `refresh=true`
+    rebuilds the rollups for the whole organization first.
+    """
+    await ensure_member(org_id, user["user_id"], session)
+
+    data = await org_analytics(session, org_id)
+    if refresh or data["refreshed_at"] is None:
+        # first visit for an org whose history predates the rollups
+        await rebuild_org_rollups(session, org_id)
+        await session.commit()
+        data = await org_analytics(session, org_id)
+
+    return data
+
+
 @router.get("/{org_id}/is-owner")
 async def is_org_owner(
     org_id: str,
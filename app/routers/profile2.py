@@ -1,23 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import ORJSONResponse, Response
+from sqlalchemy import case, exists, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from pydantic import BaseModel
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query
 from typing import List, Optional
 from app.db import get_session
-from app.models.model import Application, InterviewSlot, Opportunity, Organization, OrganizationMember, Profile
+from app.models.model import Application, InterviewSlot, OrganizationMember, Profile
 from app.services.auth_service import get_current_user
+from app.services.analytics import refresh_opportunity_rollups
+from app.services.applicant_dashboard import load_dashboard, load_slots
+from app.services.http_cache import etag_matches, make_etag
+from app.services.metrics import instrument_boto3_client
 import boto3, uuid
+import hashlib
+import orjson
 import os
 import re
+from typing import NamedTuple
 router = APIRouter(prefix="/profile", tags=["profile"])
 
-s3_client = boto3.client(
+s3_client = instrument_boto3_client(boto3.client(
     "s3",
     aws_access_key_id=os.environ["BITCOIN_AWS_ACCESS_KEY"],
     aws_secret_access_key=os.environ["BITCOIN_AWS_SECRET_ACCESS_KEY"],
     region_name="us-east-2"
-)
+))
 BUCKET_NAME = 'bitcoin-culture-hub-resumes'
 
 class ProfileUpdate(BaseModel):
@@ -29,6 +40,54 @@ class ProfileUpdate(BaseModel):
 class ReadInterviewRequest(BaseModel):
     slot_id:str
     org_id:str
+
+
+class SlotChange(NamedTuple):
+    id: str
+    status: str
+    opportunity_id: str
+
+
+async def _book_slot_locking(session: AsyncSession, slot_id: str, user_id: str) -> list[SlotChange]:
+    """pick_interview_time for dialects without UPDATE … RETURNING (MySQL).
+
+    MySQL also refuses an UPDATE whose WHERE selects from the same table, so
+    lock the application's slots first and decide in Python; a concurrent
+    pick blocks on the lock until we commit and then sees the booked sibling.
+    """
+    group = (
+        await session.execute(
+            select(InterviewSlot.applicant_id, InterviewSlot.opportunity_id).where(
+                InterviewSlot.id == slot_id,
+                InterviewSlot.applicant_id.in_(select(Application.id).where(Application.user_id == user_id)),
+            )
+        )
+    ).first()
+    if group is None:
+        return []
+
+    in_group = (
+        InterviewSlot.applicant_id == group.applicant_id,
+        InterviewSlot.opportunity_id == group.opportunity_id,
+    )
+    slots = (
+        await session.execute(select(InterviewSlot.id, InterviewSlot.status).where(*in_group).with_for_update())
+    ).all()
+    statuses = {row.id: row.status for row in slots}
+    if statuses.get(slot_id) != "pending" or "booked" in statuses.values():
+        return []
+
+    await session.execute(
+        update(InterviewSlot)
+        .where(*in_group, InterviewSlot.status == "pending")
+        .values(status=case((InterviewSlot.id == slot_id, "booked"), else_="cancelled"))
+        .execution_options(synchronize_session=False)
+    )
+    return [
+        SlotChange(id, "booked" if id == slot_id else "cancelled", group.opportunity_id)
+        for id, status in statuses.items()
+        if status == "pending"
+    ]
     
 
 async def ensure_member(org_id: str, user_id: str, session: AsyncSession):
@@ -171,69 +230,104 @@ async def pick_interview_time(
     user=Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
-    # ensure user is the admin for the organization
-    # select the application that is being accepted
-    # Check that the applicant has an application for this opportunity
-    result = await session.exec(
-        select(InterviewSlot).where(
+    # Book the slot and cancel its pending siblings in one conditional UPDATE.
+    # It only matches while the picked slot is still pending, belongs to one of
+    # this user's applications and no sibling is booked yet. A concurrent booking
+    # that commits first leaves no pending rows for us (Postgres re-checks the
+    # row predicate after waiting on the lock), so the loser updates nothing.
+    dialect = session.get_bind().dialect
+    picked = aliased(InterviewSlot)
+    sibling = aliased(InterviewSlot)
+
+    picked_group = select(picked.applicant_id, picked.opportunity_id).where(
+        picked.id == payload.slot_id,
+        picked.status == "pending",
+        picked.applicant_id.in_(
+            select(Application.id).where(Application.user_id == user["user_id"])
+        ),
+        ~exists().where(
+            sibling.applicant_id == picked.applicant_id,
+            sibling.opportunity_id == picked.opportunity_id,
+            sibling.status == "booked",
+        ),
+    )
+
+    stmt = (
+        update(InterviewSlot)
+        .where(
+            tuple_(InterviewSlot.applicant_id, InterviewSlot.opportunity_id).in_(picked_group),
+            InterviewSlot.status == "pending",
+        )
+        .values(
+            status=case((InterviewSlot.id == payload.slot_id, "booked"), else_="cancelled")
+        )
+        .returning(InterviewSlot.id, InterviewSlot.status, InterviewSlot.opportunity_id)
+        .execution_options(synchronize_session=False)
+    )
+
+    try:
+        if dialect.update_returning:
+            rows = (await session.execute(stmt)).all()
+        else:
+            rows = await _book_slot_locking(session, payload.slot_id, user["user_id"])
+        booked = any(row.id == payload.slot_id and row.status == "booked" for row in rows)
+        if booked:
+            await refresh_opportunity_rollups(session, [rows[0].opportunity_id])
+            await session.commit()
+    except IntegrityError:
+        # the one-booked-slot-per-application index caught a concurrent booking
+        await session.rollback()
+        booked = False
+
+    if booked:
+        return {
+            "id": payload.slot_id,
+            "status": "booked",
+            "cancelled": len(rows) - 1,
+        }
+
+    await session.rollback()
+
+    # lost the race or the slot is gone: tell the two apart for the client
+    owned = await session.exec(
+        select(InterviewSlot.status)
+        .join(Application, Application.id == InterviewSlot.applicant_id)
+        .where(
             InterviewSlot.id == payload.slot_id,
+            Application.user_id == user["user_id"],
         )
     )
-    
-    
-    application = result.one()
-    if not application:
+    if owned.first() is None:
         raise HTTPException(status_code=404, detail="interview time not found for this applicant")
-    # get the opp id the job wants
-    application.status = "booked"
-    app_id = application.applicant_id 
-    opp_id = application.opportunity_id
-    others_result  = await session.exec(
-        select(InterviewSlot).where(InterviewSlot.id != application.id, 
-                                    InterviewSlot.applicant_id == app_id, 
-                                    InterviewSlot.opportunity_id == opp_id)
-        )
-    for other in others_result.all():
-        other.status = "cancelled"
 
-    await session.commit()
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="This interview slot is no longer available",
+    )
     
     
-@router.get("/my-interviews")
-async def get_my_booked_interviews(
+@router.get("/dashboard")
+async def get_applicant_dashboard(
+    request: Request,
     user=Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
 ):
-    result = await session.exec(
-        select(Application.id).where(
-            Application.user_id == user["user_id"],Application.deleted_at == None
-        )
-    )
-    application_ids = result.all()
+    """Applications, pending slot picks and booked interviews in one response."""
+    data = await load_dashboard(user["user_id"])
+    body = orjson.dumps(data)
+    etag = make_etag(user["user_id"], hashlib.sha1(body).hexdigest())
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
 
-    if not application_ids:
-        return []
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
-    slots_result = await session.exec(
-        select(InterviewSlot,Opportunity.title, Organization.name,Organization.meeting_link)
-        .join(Opportunity, InterviewSlot.opportunity_id == Opportunity.id)
-        .join(Organization,Opportunity.org_id == Organization.id)
-        .where(
-            InterviewSlot.applicant_id.in_(application_ids),
-            InterviewSlot.status == "booked"
-        ).order_by(InterviewSlot.interview_datetime)
-    )
 
-    booked_slots = slots_result.all()
-    return [
-        {
-            **slot.model_dump(),
-            "opportunity_title": title,
-            "org_name": org_name,
-            "meeting_link":meeting_link
-        }
-        for slot, title, org_name,meeting_link in booked_slots
-    ]
+@router.get("/my-interviews")
+async def get_my_booked_interviews(
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    return ORJSONResponse(await load_slots(session, user["user_id"], "booked"))
 
 
 @router.get("/pending-selection")
@@ -242,34 +336,4 @@ async def get_pending_interview_slots(
     session: AsyncSession = Depends(get_session),
 ):
     """Get all interview slots where the user needs to select a time (status: pending)"""
-    result = await session.exec(
-        select(Application.id).where(
-            Application.user_id == user["user_id"],Application.deleted_at == None 
-        )
-    )
-    application_ids = result.all()
-
-    if not application_ids:
-        return []
-
-    slots_result = await session.exec(
-        select(InterviewSlot, Opportunity.title, Organization.name)
-        .join(Opportunity, InterviewSlot.opportunity_id == Opportunity.id)
-        .join(Organization, Opportunity.org_id == Organization.id)
-        .where(
-            InterviewSlot.applicant_id.in_(application_ids),
-            InterviewSlot.status == "pending"
-        )
-        .order_by(InterviewSlot.interview_datetime)
-    )
-
-    pending_slots = slots_result.all()
-
-    return [
-        {
-            **slot.model_dump(),
-            "opportunity_title": title,
-            "org_name": org_name,
-        }
-        for slot, title, org_name in pending_slots
-    ]
\ No newline at end of file
+    return ORJSONResponse(await load_slots(session, user["user_id"], "pending"))
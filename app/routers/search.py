@@ -0,0 +1,72 @@
+from collections import defaultdict
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db import get_session
+from app.services import search as search_index
+from ..models.model import Opportunity, OpportunityCategory, OpportunityRead, Organization
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("/")
+async def search(
+    q: str = Query(..., min_length=1),
+    type: Literal["organization", "opportunity"] | None = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    session: AsyncSession = Depends(get_session),
+):
+    hits = await search_index.search(session, q, entity_type=type, limit=limit, offset=offset)
+
+    org_ids = [entity_id for kind, entity_id, _ in hits if kind == search_index.ORG]
+    opp_ids = [entity_id for kind, entity_id, _ in hits if kind == search_index.OPPORTUNITY]
+
+    orgs = {}
+    if org_ids:
+        result = await session.exec(
+            select(Organization).where(
+                Organization.id.in_(org_ids),
+                Organization.deleted_at.is_(None),
+            )
+        )
+        orgs = {org.id: org for org in result.all()}
+
+    opps = {}
+    if opp_ids:
+        result = await session.exec(
+            select(Opportunity, Organization.name)
+            .join(Organization, Organization.id == Opportunity.org_id)
+            .where(
+                Opportunity.id.in_(opp_ids),
+                Opportunity.deleted_at.is_(None),
+                Organization.deleted_at.is_(None),
+            )
+        )
+        rows = result.all()
+
+        cats_result = await session.exec(
+            select(OpportunityCategory.opportunity_id, OpportunityCategory.category).where(
+                OpportunityCategory.opportunity_id.in_(opp_ids)
+            )
+        )
+        cats_map = defaultdict(list)
+        for opp_id, category in cats_result.all():
+            cats_map[opp_id].append(category)
+
+        opps = {
+            opp.id: OpportunityRead(**opp.dict(), org_name=org_name, categories=cats_map[opp.id])
+            for opp, org_name in rows
+        }
+
+    # keep the index ranking; hits for archived/deleted rows simply drop out
+    results = []
+    for kind, entity_id, rank in hits:
+        item = orgs.get(entity_id) if kind == search_index.ORG else opps.get(entity_id)
+        if item is not None:
+            results.append({"type": kind, "id": entity_id, "rank": rank, "item": item})
+
+    return {"q": q, "limit": limit, "offset": offset, "results": results}
@@ -1,19 +1,111 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import and_, literal, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
-from typing import List
-from ..models.model import Profile
+from typing import List, Optional
+from pydantic import BaseModel
+from ..models.model import Profile, lower_bytewise
 from app.services.auth_service import get_current_user
+from app.services.pagination import decode_cursor, encode_cursor
 from app.db import get_session
 
 
 router = APIRouter()
 
-@router.get("/users", response_model=List[Profile])
+TYPEAHEAD_LIMIT = 10
+MAX_CODE_POINT = "\U0010ffff"
+
+
+class UserPage(BaseModel):
+    items: List[Profile]
+    next_cursor: Optional[str] = None
+
+
+class UserSuggestion(BaseModel):
+    user_id: str
+    username: str
+    profile_picture: Optional[str] = None
+
+
+def _prefix_range(column, prefix: str):
+    """`lower(column)` starts with `lower(prefix)`, as a range the prefix index can seek into."""
+    prefix = prefix.strip()
+    expr = lower_bytewise(column)
+    # both bounds go through the database's lower(), which doesn't fold the
+    # same characters as Python's; the highest code point caps every match
+    lower = lower_bytewise(literal(prefix))
+    upper = lower_bytewise(literal(prefix + MAX_CODE_POINT))
+    return and_(expr >= lower, expr < upper)
+
+
+def directory_query(
+    q: str | None = None,
+    location: str | None = None,
+    cursor: str | None = None,
+    limit: int = 50,
+):
+    """
+    Keyset-paginated directory query, ordered by (lower(username), user_id).
+
+    Rows are (Profile, sort_key): the cursor has to carry the database's
+    lower(), which doesn't fold the same characters as Python's.
+    """
+    sort_key = lower_bytewise(Profile.username)
+    stmt = select(Profile, sort_key.label("sort_key"))
+
+    if q and q.strip():
+        stmt = stmt.where(_prefix_range(Profile.username, q))
+    if location and location.strip():
+        stmt = stmt.where(_prefix_range(Profile.location, location))
+    if cursor:
+        last_username, last_user_id = decode_cursor(cursor, 2)
+        stmt = stmt.where(
+            or_(
+                sort_key > last_username,
+                and_(sort_key == last_username, Profile.user_id > last_user_id),
+            )
+        )
+
+    # one extra row tells us whether there is a next page
+    return stmt.order_by(sort_key, Profile.user_id).limit(limit + 1)
+
+
+@router.get("/users", response_model=UserPage)
 async def get_all_users(
+    q: str | None = Query(None, description="Username prefix"),
+    location: str | None = Query(None, description="Location prefix"),
+    cursor: str | None = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    session: AsyncSession = Depends(get_session),
+):
+    result = await session.exec(directory_query(q, location, cursor, limit))
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last, last_key = rows[-1]
+        next_cursor = encode_cursor(last_key, last.user_id)
+
+    return {"items": [profile for profile, _ in rows], "next_cursor": next_cursor}
+
+
+@router.get("/users/typeahead", response_model=List[UserSuggestion])
+async def typeahead_users(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(TYPEAHEAD_LIMIT, ge=1, le=25),
     session: AsyncSession = Depends(get_session),
 ):
+    if not q.strip():
+        return []
 
-    result = await session.exec(select(Profile))
-    users = result.all()
-    return users
+    result = await session.exec(
+        select(Profile.user_id, Profile.username, Profile.profile_picture)
+        .where(_prefix_range(Profile.username, q))
+        .order_by(lower_bytewise(Profile.username), Profile.user_id)
+        .limit(limit)
+    )
+    return [
+        {"user_id": user_id, "username": username, "profile_picture": picture}
+        for user_id, username, picture in result.all()
+    ]
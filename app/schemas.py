@@ -53,4 +53,32 @@ class BookmarkOut(BaseModel):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class BookmarkPage(BaseModel):
+    items: List[BookmarkOut]
+    next_cursor: Optional[str] = None
+
+
+class BookmarkLookup(BaseModel):
+    titles: List[str]
+
+
+class BookmarkMembership(BaseModel):
+    # title -> bookmark id, only for the titles the user has bookmarked
+    bookmarked: Dict[str, str]
+
+
+class SavedItem(BaseModel):
+    bookmark_id: str
+    title: str
+    itemType: str
+    tags: List[str]
+    created_at: datetime
+    # card fields of the Explore item; None when the item no longer exists
+    item: Optional[Dict[str, Any]] = None
+
+
+class SavedItemPage(BaseModel):
+    items: List[SavedItem]
+    next_cursor: Optional[str] = None
@@ -1,8 +1,9 @@
+import argparse
 import os
 import json
 import gridfs
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import MongoClient, ReplaceOne
 
 # Load environment variables
 load_dotenv()
@@ -24,19 +25,39 @@ print("🚀 Starting Explore data seeding...")
 with open(DATA_FILE, "r") as f:
     explore_data = json.load(f)
 
-# Optional: clear old data
-col.delete_many({})
+parser = argparse.ArgumentParser(description="Load explore_data.json into MongoDB")
+parser.add_argument("--reset", action="store_true", help="delete every existing explore document first")
+args = parser.parse_args()
+
+# Wiping is opt-in: this runs against whatever MONGO_URI points at
+if args.reset:
+    host = client.address[0] if client.address else MONGO_URI
+    print(f"⚠️ Deleting all documents in {db.name}.{col.name} on {host}")
+    col.delete_many({})
+
+# Titles are the natural key (bookmarks join on them), so re-running the seed
+# replaces each item in place instead of adding a second copy
+existing = {doc["title"]: doc.get("image_id") for doc in col.find({}, {"title": 1, "image_id": 1})}
 
-# Insert new data
 for item in explore_data:
     image_path = item.get("image_url")
-    if image_path and os.path.exists(image_path):
+    image_id = existing.get(item.get("title"))
+    if image_id:
+        item["image_id"] = image_id
+        item["image_url"] = f"/explore/image/{image_id}"
+    elif image_path and os.path.exists(image_path):
         with open(image_path, "rb") as img_file:
             image_id = fs.put(img_file, filename=os.path.basename(image_path))
             item["image_id"] = str(image_id)
             item["image_url"] = f"/explore/image/{image_id}"  # you can adjust route
     else:
         print(f"⚠️ Image not found for: {item.get('title', 'Unknown')}")
-    col.insert_one(item)
-print("✅ Finished seeding!")
-print(f"✅ Inserted {len(explore_data)} documents into MongoDB.")
+
+if explore_data:
+    result = col.bulk_write(
+        [ReplaceOne({"title": item["title"]}, item, upsert=True) for item in explore_data], ordered=False
+    )
+    print("✅ Finished seeding!")
+    print(f"✅ Inserted {result.upserted_count} and replaced {result.modified_count} documents in MongoDB.")
+else:
+    print("✅ Nothing to seed.")
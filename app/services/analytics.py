@@ -0,0 +1,224 @@
+"""
+Organization analytics: applicants per opportunity and status, time to
+decision and interview booking rates.
+
+The numbers are GROUP BY aggregates materialized into two small rollup tables
+(one row per opportunity x status, one row per opportunity). Every write that
+touches Application or InterviewSlot calls refresh_opportunity_rollups for the
+opportunities it changed, inside its own transaction, so the dashboard reads a
+handful of rows no matter how much history an organization has.
+Organizations whose history predates the rollups are rebuilt once, on their
+first dashboard visit; a per-organization marker records that it happened, so
+an organization with nothing to roll up isn't rebuilt on every visit.
+"""
+from datetime import datetime
+
+from sqlalchemy import case, delete, distinct, func, insert, literal, select, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.model import (
+    Application,
+    InterviewSlot,
+    Opportunity,
+    OpportunityInterviewRollup,
+    OpportunityStatusRollup,
+    Organization,
+    OrganizationRollupMarker,
+)
+
+
+def _seconds_between(dialect: str, start, end):
+    if dialect == "postgresql":
+        return func.extract("epoch", end - start)
+    if dialect == "mysql":
+        return func.timestampdiff(text("SECOND"), start, end)
+    return (func.julianday(end) - func.julianday(start)) * 86400
+
+
+async def refresh_opportunity_rollups(session: AsyncSession, opportunity_ids):
+    """Recompute the rollup rows of the given opportunities. Does not commit."""
+    opportunity_ids = list({opp_id for opp_id in opportunity_ids if opp_id})
+    if not opportunity_ids:
+        return
+
+    dialect = session.get_bind().dialect.name
+    now = literal(datetime.utcnow())
+
+    # serialize refreshes of the same opportunity; otherwise two concurrent
+    # delete+insert rounds collide on the rollup primary keys
+    await session.execute(
+        select(Opportunity.id)
+        .where(Opportunity.id.in_(opportunity_ids))
+        .order_by(Opportunity.id)
+        .with_for_update()
+    )
+
+    await session.execute(
+        delete(OpportunityStatusRollup).where(
+            OpportunityStatusRollup.opportunity_id.in_(opportunity_ids)
+        )
+    )
+    await session.execute(
+        delete(OpportunityInterviewRollup).where(
+            OpportunityInterviewRollup.opportunity_id.in_(opportunity_ids)
+        )
+    )
+
+    status = func.coalesce(Application.status, "unknown")
+    await session.execute(
+        insert(OpportunityStatusRollup).from_select(
+            ["opportunity_id", "status", "org_id", "applicants", "decided", "decision_seconds", "refreshed_at"],
+            select(
+                Application.opportunity_id,
+                status,
+                Opportunity.org_id,
+                func.count(),
+                func.count(Application.decided_at),
+                func.coalesce(
+                    func.sum(_seconds_between(dialect, Application.applied_at, Application.decided_at)), 0
+                ),
+                now,
+            )
+            .join(Opportunity, Opportunity.id == Application.opportunity_id)
+            .where(Application.opportunity_id.in_(opportunity_ids))
+            .group_by(Application.opportunity_id, status, Opportunity.org_id),
+        )
+    )
+
+    is_booked = InterviewSlot.status == "booked"
+    await session.execute(
+        insert(OpportunityInterviewRollup).from_select(
+            [
+                "opportunity_id", "org_id", "applicants_offered", "applicants_booked",
+                "slots_total", "slots_booked", "slots_cancelled", "refreshed_at",
+            ],
+            select(
+                InterviewSlot.opportunity_id,
+                Opportunity.org_id,
+                func.count(distinct(InterviewSlot.applicant_id)),
+                func.count(distinct(case((is_booked, InterviewSlot.applicant_id)))),
+                func.count(),
+                func.sum(case((is_booked, 1), else_=0)),
+                func.sum(case((InterviewSlot.status == "cancelled", 1), else_=0)),
+                now,
+            )
+            .join(Opportunity, Opportunity.id == InterviewSlot.opportunity_id)
+            .where(InterviewSlot.opportunity_id.in_(opportunity_ids))
+            .group_by(InterviewSlot.opportunity_id, Opportunity.org_id),
+        )
+    )
+
+
+async def rebuild_org_rollups(session: AsyncSession, org_id: str):
+    """Recompute every rollup row of the organization and mark it refreshed. Does not commit."""
+    # serialize rebuilds of the same organization, for the marker's delete+insert
+    await session.execute(select(Organization.id).where(Organization.id == org_id).with_for_update())
+
+    result = await session.execute(select(Opportunity.id).where(Opportunity.org_id == org_id))
+    await refresh_opportunity_rollups(session, result.scalars().all())
+
+    await session.execute(delete(OrganizationRollupMarker).where(OrganizationRollupMarker.org_id == org_id))
+    await session.execute(insert(OrganizationRollupMarker).values(org_id=org_id, refreshed_at=datetime.utcnow()))
+
+
+def _rate(part: int, whole: int) -> float | None:
+    return round(part / whole, 4) if whole else None
+
+
+def _hours(seconds: float, count: int) -> float | None:
+    return round(seconds / count / 3600, 2) if count else None
+
+
+async def org_analytics(session: AsyncSession, org_id: str) -> dict:
+    status_rows = (
+        await session.execute(
+            select(OpportunityStatusRollup).where(OpportunityStatusRollup.org_id == org_id)
+        )
+    ).scalars().all()
+    interview_rows = (
+        await session.execute(
+            select(OpportunityInterviewRollup).where(OpportunityInterviewRollup.org_id == org_id)
+        )
+    ).scalars().all()
+    marker = (
+        await session.execute(
+            select(OrganizationRollupMarker.refreshed_at).where(OrganizationRollupMarker.org_id == org_id)
+        )
+    ).scalar_one_or_none()
+    titles = dict(
+        (
+            await session.execute(
+                select(Opportunity.id, Opportunity.title).where(Opportunity.org_id == org_id)
+            )
+        ).all()
+    )
+
+    per_opp: dict[str, dict] = {}
+
+    def entry(opp_id: str) -> dict:
+        if opp_id not in per_opp:
+            per_opp[opp_id] = {
+                "opportunity_id": opp_id,
+                "title": titles.get(opp_id),
+                "applicants": 0,
+                "by_status": {},
+                "_decided": 0,
+                "_decision_seconds": 0.0,
+                "interviews": {
+                    "applicants_offered": 0,
+                    "applicants_booked": 0,
+                    "booking_rate": None,
+                    "slots_total": 0,
+                    "slots_booked": 0,
+                    "slots_cancelled": 0,
+                },
+            }
+        return per_opp[opp_id]
+
+    for row in status_rows:
+        e = entry(row.opportunity_id)
+        e["applicants"] += row.applicants
+        e["by_status"][row.status] = row.applicants
+        e["_decided"] += row.decided
+        e["_decision_seconds"] += row.decision_seconds
+
+    for row in interview_rows:
+        interviews = entry(row.opportunity_id)["interviews"]
+        interviews.update(
+            applicants_offered=row.applicants_offered,
+            applicants_booked=row.applicants_booked,
+            booking_rate=_rate(row.applicants_booked, row.applicants_offered),
+            slots_total=row.slots_total,
+            slots_booked=row.slots_booked,
+            slots_cancelled=row.slots_cancelled,
+        )
+
+    totals = {
+        "applicants": 0,
+        "by_status": {},
+        "avg_time_to_decision_hours": None,
+        "interview_booking_rate": None,
+    }
+    decided = decision_seconds = offered = booked = 0
+    for e in per_opp.values():
+        totals["applicants"] += e["applicants"]
+        for status, count in e["by_status"].items():
+            totals["by_status"][status] = totals["by_status"].get(status, 0) + count
+        decided += e["_decided"]
+        decision_seconds += e["_decision_seconds"]
+        offered += e["interviews"]["applicants_offered"]
+        booked += e["interviews"]["applicants_booked"]
+        e["avg_time_to_decision_hours"] = _hours(e.pop("_decision_seconds"), e.pop("_decided"))
+
+    totals["avg_time_to_decision_hours"] = _hours(decision_seconds, decided)
+    totals["interview_booking_rate"] = _rate(booked, offered)
+
+    refreshed = [r.refreshed_at for r in (*status_rows, *interview_rows)]
+    if marker is not None:
+        refreshed.append(marker)
+    return {
+        "org_id": org_id,
+        "refreshed_at": max(refreshed) if refreshed else None,
+        "totals": totals,
+        "opportunities": sorted(per_opp.values(), key=lambda e: e["applicants"], reverse=True),
+    }
@@ -0,0 +1,84 @@
+"""
+Data loader behind the applicant UI: applications, interview slots waiting for
+a pick, and booked interviews. Each list is one joined query keyed on
+Application.user_id (no id pre-fetch + IN). load_dashboard runs the three on
+separate sessions concurrently; the single-purpose endpoints call the loaders
+directly.
+"""
+import asyncio
+
+from sqlalchemy import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db import AsyncSessionLocal
+from app.models.model import Application, InterviewSlot, Opportunity, Organization
+
+SLOT_COLUMNS = (
+    InterviewSlot.id,
+    InterviewSlot.opportunity_id,
+    InterviewSlot.interview_datetime,
+    InterviewSlot.applicant_id,
+    InterviewSlot.status,
+    Opportunity.title.label("opportunity_title"),
+    Organization.name.label("org_name"),
+)
+
+
+async def load_applications(session: AsyncSession, user_id: str) -> list[dict]:
+    result = await session.execute(
+        select(
+            Application.id,
+            Application.opportunity_id,
+            Application.user_id,
+            Application.applied_at,
+            Application.email,
+            Application.username,
+            Application.location,
+            Application.avatar,
+            Application.status,
+            Opportunity.title.label("opportunity_name"),
+            Opportunity.type.label("opportunity_type"),
+        )
+        .join(Opportunity, Opportunity.id == Application.opportunity_id)
+        .where(Application.user_id == user_id, Application.deleted_at.is_(None))
+    )
+    return [row._asdict() for row in result.all()]
+
+
+async def load_slots(session: AsyncSession, user_id: str, status: str) -> list[dict]:
+    columns = SLOT_COLUMNS
+    if status == "booked":
+        columns += (Organization.meeting_link,)
+
+    result = await session.execute(
+        select(*columns)
+        .join(Application, Application.id == InterviewSlot.applicant_id)
+        .join(Opportunity, InterviewSlot.opportunity_id == Opportunity.id)
+        .join(Organization, Opportunity.org_id == Organization.id)
+        .where(
+            Application.user_id == user_id,
+            Application.deleted_at.is_(None),
+            InterviewSlot.status == status,
+        )
+        .order_by(InterviewSlot.interview_datetime)
+    )
+    return [row._asdict() for row in result.all()]
+
+
+async def _with_session(loader, *args):
+    # an AsyncSession can't run statements concurrently, so each query gets its own
+    async with AsyncSessionLocal() as session:
+        return await loader(session, *args)
+
+
+async def load_dashboard(user_id: str) -> dict:
+    applications, pending, booked = await asyncio.gather(
+        _with_session(load_applications, user_id),
+        _with_session(load_slots, user_id, "pending"),
+        _with_session(load_slots, user_id, "booked"),
+    )
+    return {
+        "applications": applications,
+        "pending_slots": pending,
+        "booked_slots": booked,
+    }
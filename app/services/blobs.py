@@ -0,0 +1,172 @@
+"""
+Content-addressed S3 storage for Explore images.
+
+Objects are keyed by the SHA-256 of their bytes (`blobs/ab/abcd….png`), so
+the same image is stored once however many items use it and a key never
+changes content; that is what lets the objects carry a year-long immutable
+Cache-Control. Every use is counted in the `image_blobs` collection:
+
+    {_id: key, sha256, size, content_type, refs, created_at, orphaned_at?, sweeping?, sweeping_at?}
+
+The reference is taken before the object is written, so a blob that is being
+uploaded always has refs > 0. Releasing the last reference only stamps
+`orphaned_at`; the object itself is removed later by the orphan sweep, after
+a grace period, never inline.
+
+The sweep claims a blob (`sweeping`, only while refs <= 0) before deleting
+its object and drops the claim afterwards. put_blob reviving a claimed blob
+waits for the claim to go and then uploads again, since the object may be
+gone by then.
+"""
+import hashlib
+import mimetypes
+import time
+from datetime import datetime, timedelta, timezone
+
+from botocore.exceptions import ClientError
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+KEY_PREFIX = "blobs/"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# a claim older than this belongs to a sweep that died
+SWEEP_CLAIM_TTL = timedelta(minutes=5)
+SWEEP_POLL_SECONDS = 0.2
+
+# mimetypes picks odd extensions for a few common types
+_EXTENSIONS = {"image/jpeg": ".jpg", "image/svg+xml": ".svg", "image/webp": ".webp"}
+
+
+def blob_key(data: bytes, content_type: str | None = None) -> str:
+    digest = hashlib.sha256(data).hexdigest()
+    ext = _EXTENSIONS.get(content_type or "") or mimetypes.guess_extension(content_type or "") or ""
+    return f"{KEY_PREFIX}{digest[:2]}/{digest}{ext}"
+
+
+def is_blob_key(key: str | None) -> bool:
+    return bool(key) and key.startswith(KEY_PREFIX)
+
+
+def blob_sha256(key: str) -> str:
+    return key.rsplit("/", 1)[-1].split(".", 1)[0]
+
+
+def _exists(s3, bucket: str, key: str) -> bool:
+    try:
+        s3.head_object(Bucket=bucket, Key=key)
+        return True
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+
+
+def put_blob(s3, bucket: str, blobs, data: bytes, content_type: str | None) -> str:
+    """Take a reference on the blob for `data`, uploading it only if S3 doesn't have it yet."""
+    key = blob_key(data, content_type)
+    now = datetime.now(timezone.utc)
+    before = blobs.find_one_and_update(
+        {"_id": key},
+        {
+            "$inc": {"refs": 1},
+            "$unset": {"orphaned_at": ""},
+            "$setOnInsert": {
+                "sha256": blob_sha256(key),
+                "size": len(data),
+                "content_type": content_type,
+                "created_at": now,
+            },
+        },
+        upsert=True,
+        projection={"orphaned_at": 1, "sweeping": 1},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if before is not None and "sweeping" in before:
+        # the sweep may delete the object after our HEAD; upload once it's done
+        _wait_for_sweep(blobs, key)
+    # a released blob may be mid-sweep, so don't trust a HEAD for it
+    revived = before is not None and ("orphaned_at" in before or "sweeping" in before)
+    if revived or not _exists(s3, bucket, key):
+        s3.put_object(
+            Bucket=bucket,
+            Key=key,
+            Body=data,
+            ContentType=content_type or "application/octet-stream",
+            CacheControl=IMMUTABLE_CACHE_CONTROL,
+        )
+    return key
+
+
+def _wait_for_sweep(blobs, key: str):
+    """Block until no live sweep claims `key`; a dead sweep's claim expires after SWEEP_CLAIM_TTL."""
+    while True:
+        live = datetime.now(timezone.utc) - SWEEP_CLAIM_TTL
+        if blobs.find_one({"_id": key, "sweeping_at": {"$gte": live}}, {"_id": 1}) is None:
+            return
+        time.sleep(SWEEP_POLL_SECONDS)
+
+
+def claim_for_sweep(blobs, keys: list[str], released_before: datetime, token: str) -> set[str]:
+    """Claim the unreferenced blobs among `keys` for deletion; returns the keys this sweep now owns.
+
+    Blob keys with no refcount document at all get one (refs 0) so that a
+    concurrent put_blob sees the claim too.
+    """
+    keys = [key for key in keys if is_blob_key(key)]
+    if not keys:
+        return set()
+    now = datetime.now(timezone.utc)
+    untracked = set(keys) - {doc["_id"] for doc in blobs.find({"_id": {"$in": keys}}, {"_id": 1})}
+    if untracked:
+        try:
+            blobs.insert_many(
+                [{"_id": key, "refs": 0, "orphaned_at": released_before} for key in untracked], ordered=False
+            )
+        except BulkWriteError:
+            pass  # put_blob created some of them first; those are referenced
+    blobs.update_many(
+        {
+            "_id": {"$in": keys},
+            "refs": {"$lte": 0},
+            "orphaned_at": {"$lte": released_before},
+            "$or": [{"sweeping": {"$exists": False}}, {"sweeping_at": {"$lt": now - SWEEP_CLAIM_TTL}}],
+        },
+        {"$set": {"sweeping": token, "sweeping_at": now}},
+    )
+    return {doc["_id"] for doc in blobs.find({"_id": {"$in": keys}, "sweeping": token}, {"_id": 1})}
+
+
+def finish_sweep(blobs, keys, token: str, deleted) -> None:
+    """Forget deleted blobs still unreferenced and release every claim; revived blobs are re-uploaded by put_blob."""
+    keys, deleted = list(keys), list(deleted)
+    if deleted:
+        blobs.delete_many({"_id": {"$in": deleted}, "sweeping": token, "refs": {"$lte": 0}})
+    if keys:
+        blobs.update_many(
+            {"_id": {"$in": keys}, "sweeping": token}, {"$unset": {"sweeping": "", "sweeping_at": ""}}
+        )
+
+
+def release_blobs(blobs, keys) -> int:
+    """Drop one reference per key (repeats count); returns how many blobs became unreferenced."""
+    keys = [key for key in keys if is_blob_key(key)]
+    if not keys:
+        return 0
+    counts: dict[str, int] = {}
+    for key in keys:
+        counts[key] = counts.get(key, 0) + 1
+    blobs.bulk_write(
+        [UpdateOne({"_id": key}, {"$inc": {"refs": -n}}) for key, n in counts.items()],
+        ordered=False,
+    )
+    result = blobs.update_many(
+        {"_id": {"$in": list(counts)}, "refs": {"$lte": 0}, "orphaned_at": {"$exists": False}},
+        {"$set": {"orphaned_at": datetime.now(timezone.utc)}},
+    )
+    return result.modified_count
+
+
+def item_keys(item: dict) -> list[str]:
+    """Every S3 key an Explore item references: the original plus its variants."""
+    keys = [item["image_url"]] if item.get("image_url") else []
+    return keys + list((item.get("variants") or {}).values())
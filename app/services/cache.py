@@ -0,0 +1,168 @@
+"""
+Shared response cache for public, read-heavy endpoints.
+
+Entries are keyed by route + query string + the current version of every tag
+the route depends on. Writers call `invalidate(*tags)` after committing, which
+bumps those versions: every key built from the old versions simply stops being
+looked up and ages out of the LRU / Redis TTL. Bodies are stored already
+serialized together with their ETag, so a hit (or a 304) never touches the
+database or the JSON encoder.
+"""
+import hashlib
+import inspect
+import time
+from collections import OrderedDict
+
+import orjson
+from anyio import from_thread
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+
+from app.config import settings
+from app.services.http_cache import etag_matches, make_etag
+
+KEY_PREFIX = "bch:cache:"
+
+
+class LRUBackend:
+    """Per-process cache; fine for a single pod and for local runs."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str, bytes]] = OrderedDict()
+        self._versions: dict[str, int] = {}
+
+    async def get(self, key: str) -> tuple[str, bytes] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, etag, body = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return etag, body
+
+    async def set(self, key: str, etag: str, body: bytes, ttl: int):
+        self._entries[key] = (time.monotonic() + ttl, etag, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def versions(self, tags: list[str]) -> list[int]:
+        return [self._versions.get(tag, 0) for tag in tags]
+
+    async def bump(self, tags: list[str]):
+        for tag in tags:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+
+
+class RedisBackend:
+    """Cache shared by every pod; tag versions are plain Redis counters."""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str) -> tuple[str, bytes] | None:
+        raw = await self._redis.get(KEY_PREFIX + key)
+        if raw is None:
+            return None
+        etag, _, body = raw.partition(b"\n")
+        return etag.decode("ascii"), body
+
+    async def set(self, key: str, etag: str, body: bytes, ttl: int):
+        await self._redis.set(KEY_PREFIX + key, etag.encode("ascii") + b"\n" + body, ex=ttl)
+
+    async def versions(self, tags: list[str]) -> list[int]:
+        if not tags:
+            return []
+        values = await self._redis.mget([f"{KEY_PREFIX}tag:{tag}" for tag in tags])
+        return [int(v) if v is not None else 0 for v in values]
+
+    async def bump(self, tags: list[str]):
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(f"{KEY_PREFIX}tag:{tag}")
+            await pipe.execute()
+
+
+def _make_backend():
+    if settings.REDIS_URL:
+        return RedisBackend(settings.REDIS_URL)
+    return LRUBackend(settings.CACHE_MAX_ENTRIES)
+
+
+backend = _make_backend()
+
+
+def serialize(data) -> bytes:
+    # plain dict/list/datetime rows go through orjson natively; models fall back to FastAPI's encoder
+    return orjson.dumps(data, default=jsonable_encoder)
+
+
+def _cache_key(request: Request, tags: list[str], versions: list[int]) -> str:
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    tag_part = ",".join(f"{tag}:{version}" for tag, version in zip(tags, versions))
+    raw = f"{request.url.path}?{query}|{tag_part}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _response(request: Request, etag: str, body: bytes, private: bool = False) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache" if private else "public, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def cached_response(
+    request: Request, tags: list[str], loader, ttl: int | None = None, private: bool = False
+) -> Response:
+    """
+    Serve `loader()` through the cache. `loader` may be sync (run in the
+    threadpool, e.g. for PyMongo) or async. A cache outage never fails the
+    request; it just falls through to the loader.
+
+    `private` is for routes behind authentication: browsers may still
+    revalidate with the ETag, but shared caches must not store the response.
+    """
+    key = None
+    try:
+        versions = await backend.versions(tags)
+        key = _cache_key(request, tags, versions)
+        hit = await backend.get(key)
+        if hit is not None:
+            return _response(request, *hit, private=private)
+    except Exception as e:
+        print(f"[cache] lookup failed: {e}")
+
+    if inspect.iscoroutinefunction(loader):
+        data = await loader()
+    else:
+        data = await run_in_threadpool(loader)
+
+    body = serialize(data)
+    etag = make_etag(hashlib.sha1(body).hexdigest())
+
+    if key is not None:
+        try:
+            await backend.set(key, etag, body, ttl or settings.CACHE_TTL_SECONDS)
+        except Exception as e:
+            print(f"[cache] store failed: {e}")
+
+    return _response(request, etag, body, private=private)
+
+
+async def invalidate(*tags: str):
+    """Drop every cached response that depends on any of `tags`. Call after commit."""
+    try:
+        await backend.bump(list(tags))
+    except Exception as e:
+        print(f"[cache] invalidate failed: {e}")
+
+
+def invalidate_from_thread(*tags: str):
+    """`invalidate` for sync (threadpool) endpoints such as the PyMongo-backed ones."""
+    from_thread.run(invalidate, *tags)
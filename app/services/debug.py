@@ -0,0 +1,165 @@
+"""
+Development aids: per-request dependency counts as response headers, and an
+opt-in profile of a single request.
+
+Headers are added to every response when DEBUG_METRICS is on, and to any
+request that carries a valid debug token otherwise. A profile is written only
+for requests with a valid token *and* `_profile=1` (or `X-Profile: 1`), so
+production can be inspected without exposing anything to regular clients.
+
+Tokens are `<expires>.<hmac>` signed with SECRET_KEY and can be minted with
+
+    python -m app.services.debug --minutes 30
+
+then sent as `X-Debug-Token: ...` or `?_debug=...`.
+"""
+import argparse
+import cProfile
+import hashlib
+import hmac
+import os
+import re
+import time
+
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.config import settings
+from app.services.metrics import current_stats
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # optional; cProfile output works with snakeviz / flameprof
+    Profiler = None
+
+DEBUG_HEADERS = [
+    "X-DB-Queries",
+    "X-DB-Time-ms",
+    "X-Mongo-Commands",
+    "X-Mongo-Time-ms",
+    "X-External-Calls",
+    "X-External-Time-ms",
+    "X-Profile-File",
+    "Server-Timing",
+]
+
+# placeholders from config.py and .env.example; anything short is guessable too
+_INSECURE_KEYS = {"", "secret", "super-secret-key", "changeme"}
+MIN_KEY_LENGTH = 32
+
+
+def _key_is_usable(key: str) -> bool:
+    return key not in _INSECURE_KEYS and len(key) >= MIN_KEY_LENGTH and len(set(key)) >= 8
+
+
+def _signature(expires: int) -> str:
+    return hmac.new(settings.SECRET_KEY.encode(), f"debug|{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def make_debug_token(minutes: int = 30) -> str:
+    expires = int(time.time()) + minutes * 60
+    return f"{expires}.{_signature(expires)}"
+
+
+def verify_debug_token(token: str | None) -> bool:
+    # never accept tokens signed with a placeholder or weak key
+    if not token or not _key_is_usable(settings.SECRET_KEY):
+        return False
+    expires, _, signature = token.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, _signature(int(expires)))
+
+
+def has_debug_access(request: Request) -> bool:
+    return verify_debug_token(request.headers.get("x-debug-token") or request.query_params.get("_debug"))
+
+
+def _wants_profile(request: Request) -> bool:
+    return "1" in (request.headers.get("x-profile"), request.query_params.get("_profile"))
+
+
+def _profile_path(request: Request, suffix: str) -> str:
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", request.url.path).strip("-") or "root"
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.method}-{slug}.{suffix}"
+    return os.path.join(settings.PROFILE_DIR, name)
+
+
+async def _profiled(request: Request, call_next):
+    if Profiler is not None:
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        try:
+            response = await call_next(request)
+        finally:
+            profiler.stop()
+        path = _profile_path(request, "html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(profiler.output_html())
+    else:
+        # cProfile sees the whole thread, so concurrent requests leak into it
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = await call_next(request)
+        finally:
+            profiler.disable()
+        path = _profile_path(request, "prof")
+        profiler.dump_stats(path)
+
+    response.headers["X-Profile-File"] = os.path.basename(path)
+    return response
+
+
+def _add_stats_headers(request: Request, response, stats):
+    db_ms = stats.db_seconds * 1000
+    mongo_ms = stats.mongo_seconds * 1000
+    external_ms = stats.external_seconds * 1000
+    response.headers["X-DB-Queries"] = str(stats.db_queries)
+    response.headers["X-DB-Time-ms"] = f"{db_ms:.1f}"
+    response.headers["X-Mongo-Commands"] = str(stats.mongo_commands)
+    response.headers["X-Mongo-Time-ms"] = f"{mongo_ms:.1f}"
+    response.headers["X-External-Calls"] = str(stats.external_calls)
+    response.headers["X-External-Time-ms"] = f"{external_ms:.1f}"
+    # shows up in the browser devtools timing tab
+    response.headers["Server-Timing"] = (
+        f"db;dur={db_ms:.1f}, mongo;dur={mongo_ms:.1f}, aws;dur={external_ms:.1f}"
+    )
+
+    if stats.db_queries > settings.DEBUG_QUERY_BUDGET:
+        print(
+            f"[debug] {request.method} {request.url.path} ran {stats.db_queries} SQL statements "
+            f"(budget {settings.DEBUG_QUERY_BUDGET})"
+        )
+
+
+class DebugMiddleware(BaseHTTPMiddleware):
+    """Must sit inside MetricsMiddleware, which owns the per-request stats."""
+
+    async def dispatch(self, request: Request, call_next):
+        authorized = has_debug_access(request)
+        if not (settings.DEBUG_METRICS or authorized):
+            return await call_next(request)
+
+        if authorized and _wants_profile(request):
+            response = await _profiled(request, call_next)
+        else:
+            response = await call_next(request)
+
+        stats = current_stats()
+        if stats is not None:
+            _add_stats_headers(request, response, stats)
+        return response
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mint a debug token")
+    parser.add_argument("--minutes", type=int, default=30)
+    args = parser.parse_args()
+    if not _key_is_usable(settings.SECRET_KEY):
+        raise SystemExit(
+            f"SECRET_KEY is a placeholder or shorter than {MIN_KEY_LENGTH} characters; debug tokens are disabled. "
+            "Generate one with: python -c 'import secrets; print(secrets.token_urlsafe(32))'"
+        )
+    print(make_debug_token(args.minutes))
@@ -0,0 +1,227 @@
+"""
+Background reclaimer for orphaned Explore images.
+
+Requests never delete stored images; they only drop references (see
+app/services/blobs.py). This sweep diffs what is stored against what the
+Explore collections reference and deletes the rest:
+
+* S3: the bucket is listed one page (≤1000 keys) at a time. Each page is
+  checked against the items' image_url/variants and the image_blobs
+  refcounts, and its orphans go out in a single delete_objects call, so
+  memory stays bounded however many keys the bucket holds. Blobs are
+  claimed atomically first, so one revived in the meantime is kept or
+  re-uploaded by put_blob.
+* GridFS: the files collection is walked in _id order, `batch` files at a
+  time. A variant belongs to its original (metadata.variant_of), so it goes
+  when the original is unreferenced or gone.
+
+Nothing younger than the grace period is touched, which covers uploads
+whose item hasn't been written yet; released blobs are measured from
+`orphaned_at`. With several workers only the one holding the `image_gc`
+lease sweeps.
+"""
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from pymongo.errors import DuplicateKeyError
+
+from app.config import settings
+from app.services.blobs import claim_for_sweep, finish_sweep, is_blob_key, item_keys
+from app.services.images import VARIANT_WIDTHS
+from app.services.metrics import (
+    IMAGE_GC_DELETED,
+    IMAGE_GC_DELETED_BYTES,
+    IMAGE_GC_FAILURES,
+    IMAGE_GC_LAST_SUCCESS,
+    IMAGE_GC_SCANNED,
+)
+
+S3_PAGE_LIMIT = 1000  # list_objects_v2 / delete_objects maximum
+GRIDFS_ROUTE = "/explore/image/"
+_REFERENCE_FIELDS = ["image_url"] + [f"variants.{width}" for width in VARIANT_WIDTHS]
+
+
+def _new_report(store: str, dry_run: bool) -> dict:
+    return {"store": store, "dry_run": dry_run, "scanned": 0, "orphans": 0, "deleted": 0, "bytes": 0, "failed": 0}
+
+
+def _referenced_keys(collections, keys: list[str]) -> set[str]:
+    found = set()
+    query = {"$or": [{field: {"$in": keys}} for field in _REFERENCE_FIELDS]}
+    for col in collections:
+        for doc in col.find(query, {"image_url": 1, "variants": 1}):
+            found.update(item_keys(doc))
+    return found
+
+
+def sweep_s3(s3, bucket: str, collections, blobs, *, grace: timedelta, batch: int = S3_PAGE_LIMIT,
+             dry_run: bool = False) -> dict:
+    report = _new_report("s3", dry_run)
+    cutoff = datetime.now(timezone.utc) - grace
+    pages = s3.get_paginator("list_objects_v2").paginate(
+        Bucket=bucket, PaginationConfig={"PageSize": min(batch, S3_PAGE_LIMIT)}
+    )
+    for page in pages:
+        contents = page.get("Contents", [])
+        report["scanned"] += len(contents)
+        IMAGE_GC_SCANNED.labels("s3").inc(len(contents))
+
+        candidates = {obj["Key"]: obj for obj in contents if obj["LastModified"] < cutoff}
+        if not candidates:
+            continue
+        keys = list(candidates)
+        referenced = _referenced_keys(collections, keys)
+        refcounts = {doc["_id"]: doc for doc in blobs.find({"_id": {"$in": keys}}, {"refs": 1, "orphaned_at": 1})}
+
+        orphans = []
+        for key, obj in candidates.items():
+            if key in referenced:
+                continue
+            blob = refcounts.get(key)
+            if blob is not None:
+                released = blob.get("orphaned_at")
+                if blob.get("refs", 0) > 0 or released is None:
+                    continue
+                if released.tzinfo is None:
+                    released = released.replace(tzinfo=timezone.utc)
+                if released >= cutoff:
+                    continue
+            orphans.append(obj)
+        if not orphans:
+            continue
+        report["orphans"] += len(orphans)
+
+        if dry_run:
+            IMAGE_GC_DELETED.labels("s3", "true").inc(len(orphans))
+            for obj in orphans:
+                print(f"[ImageGC] would delete s3://{bucket}/{obj['Key']} ({obj['Size']} bytes)")
+            continue
+
+        # the refcounts above are a snapshot; a blob is only deleted once this
+        # sweep holds its claim, which put_blob respects (see app/services/blobs.py)
+        token = uuid.uuid4().hex
+        claimed = claim_for_sweep(blobs, [obj["Key"] for obj in orphans], cutoff, token)
+        orphans = [obj for obj in orphans if not is_blob_key(obj["Key"]) or obj["Key"] in claimed]
+        deleted, errors = [], {}
+        try:
+            if orphans:
+                response = s3.delete_objects(
+                    Bucket=bucket, Delete={"Objects": [{"Key": obj["Key"]} for obj in orphans], "Quiet": True}
+                )
+                errors = {err["Key"]: err.get("Code") for err in response.get("Errors", [])}
+                deleted = [obj for obj in orphans if obj["Key"] not in errors]
+        finally:
+            finish_sweep(blobs, claimed, token, [obj["Key"] for obj in deleted if obj["Key"] in claimed])
+        for key, code in errors.items():
+            print(f"[ImageGC] failed to delete s3://{bucket}/{key}: {code}")
+
+        freed = sum(obj["Size"] for obj in deleted)
+        report["deleted"] += len(deleted)
+        report["bytes"] += freed
+        report["failed"] += len(errors)
+        IMAGE_GC_DELETED.labels("s3", "false").inc(len(deleted))
+        IMAGE_GC_DELETED_BYTES.labels("s3").inc(freed)
+        IMAGE_GC_FAILURES.labels("s3").inc(len(errors))
+    return report
+
+
+def sweep_gridfs(db, collections, *, bucket: str = "images", grace: timedelta, batch: int = 1000,
+                 dry_run: bool = False) -> dict:
+    report = _new_report("gridfs", dry_run)
+    files, chunks = db[f"{bucket}.files"], db[f"{bucket}.chunks"]
+    cutoff = datetime.now(timezone.utc) - grace
+    last_id = None
+
+    while True:
+        query = {"uploadDate": {"$lt": cutoff}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        docs = list(files.find(query, {"filename": 1, "length": 1, "metadata.variant_of": 1}).sort("_id", 1).limit(batch))
+        if not docs:
+            break
+        last_id = docs[-1]["_id"]
+        report["scanned"] += len(docs)
+        IMAGE_GC_SCANNED.labels("gridfs").inc(len(docs))
+
+        owners = {doc["_id"]: (doc.get("metadata") or {}).get("variant_of") or doc["_id"] for doc in docs}
+        owner_ids = list({str(owner) for owner in owners.values()})
+        routes = [GRIDFS_ROUTE + owner for owner in owner_ids]
+        referenced = set()
+        for col in collections:
+            for item in col.find(
+                {"$or": [{"image_id": {"$in": owner_ids}}, {"image_url": {"$in": routes}}]},
+                {"image_id": 1, "image_url": 1},
+            ):
+                referenced.add(str(item.get("image_id")))
+                referenced.add((item.get("image_url") or "").removeprefix(GRIDFS_ROUTE))
+
+        orphans = [doc for doc in docs if str(owners[doc["_id"]]) not in referenced]
+        if not orphans:
+            continue
+        report["orphans"] += len(orphans)
+
+        if dry_run:
+            IMAGE_GC_DELETED.labels("gridfs", "true").inc(len(orphans))
+            for doc in orphans:
+                print(f"[ImageGC] would delete GridFS {bucket}/{doc['_id']} ({doc.get('filename')})")
+            continue
+
+        # same order as GridFS.delete: the file disappears before its chunks
+        ids = [doc["_id"] for doc in orphans]
+        files.delete_many({"_id": {"$in": ids}})
+        chunks.delete_many({"files_id": {"$in": ids}})
+
+        freed = sum(doc.get("length", 0) for doc in orphans)
+        report["deleted"] += len(orphans)
+        report["bytes"] += freed
+        IMAGE_GC_DELETED.labels("gridfs", "false").inc(len(orphans))
+        IMAGE_GC_DELETED_BYTES.labels("gridfs").inc(freed)
+    return report
+
+
+def acquire_lease(db, name: str, holder: str, ttl: timedelta) -> bool:
+    """Take or renew a lease in the `locks` collection; False if someone else holds it."""
+    now = datetime.now(timezone.utc)
+    try:
+        db["locks"].find_one_and_update(
+            {"_id": name, "$or": [{"expires_at": {"$lt": now}}, {"holder": holder}]},
+            {"$set": {"holder": holder, "expires_at": now + ttl}},
+            upsert=True,
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+def collect_garbage(db, s3, bucket: str, collections, blobs, *, dry_run: bool = False) -> list[dict]:
+    grace = timedelta(seconds=settings.IMAGE_GC_GRACE_SECONDS)
+    reports = [
+        sweep_s3(s3, bucket, collections, blobs, grace=grace, batch=settings.IMAGE_GC_BATCH, dry_run=dry_run),
+        sweep_gridfs(db, collections, grace=grace, batch=settings.IMAGE_GC_BATCH, dry_run=dry_run),
+    ]
+    if not dry_run:
+        IMAGE_GC_LAST_SUCCESS.set_to_current_time()
+    for report in reports:
+        print(f"[ImageGC] {report}")
+    return reports
+
+
+async def run_periodically(db, s3, bucket: str, collections, blobs):
+    """Sweep every IMAGE_GC_INTERVAL_SECONDS; started from the app lifespan."""
+    holder = f"{socket.gethostname()}:{os.getpid()}"
+    interval = settings.IMAGE_GC_INTERVAL_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            # the lease outlives one interval so a slow sweep isn't picked up twice
+            if await asyncio.to_thread(acquire_lease, db, "image_gc", holder, timedelta(seconds=interval * 2)):
+                await asyncio.to_thread(
+                    collect_garbage, db, s3, bucket, collections, blobs, dry_run=settings.IMAGE_GC_DRY_RUN
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[ImageGC] sweep failed: {e}")
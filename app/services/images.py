@@ -0,0 +1,78 @@
+"""
+Resized WebP variants of Explore images.
+
+Each upload gets one variant per width in VARIANT_WIDTHS (never wider than
+the original). Resizing is CPU-bound, so it runs in a process pool and the
+event loop only awaits the result. S3 variants live next to the original
+(`photo.png` -> `photo-256w.webp`) and are listed in the item's `variants`
+field; GridFS variants are separate files whose metadata points at the
+original (`variant_of`, `width`).
+"""
+import asyncio
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from app.config import settings
+
+VARIANT_WIDTHS = (256, 768, 1600)
+VARIANT_CONTENT_TYPE = "image/webp"
+WEBP_QUALITY = 80
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def render_variants(data: bytes) -> dict[int, bytes]:
+    """width -> WebP bytes. Runs in a worker process; keep it a top-level function."""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+
+        variants = {}
+        for width in VARIANT_WIDTHS:
+            target = min(width, image.width)
+            height = max(1, round(image.height * target / image.width))
+            resized = image if target == image.width else image.resize((target, height), Image.LANCZOS)
+            out = io.BytesIO()
+            resized.save(out, format="WEBP", quality=WEBP_QUALITY, method=4)
+            variants[width] = out.getvalue()
+    return variants
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn, not fork: the server process has the event loop, client
+        # threads and open sockets that a forked child would inherit half-way
+        _pool = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+async def make_variants(data: bytes) -> dict[int, bytes]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool(), render_variants, data)
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def variant_key(key: str, width: int) -> str:
+    return f"{os.path.splitext(key)[0]}-{width}w.webp"
+
+
+def pick_width(size: int | None) -> int | None:
+    """Smallest variant at least `size` wide; the largest one if none is."""
+    if not size:
+        return None
+    for width in VARIANT_WIDTHS:
+        if width >= size:
+            return width
+    return VARIANT_WIDTHS[-1]
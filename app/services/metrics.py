@@ -0,0 +1,271 @@
+"""
+Prometheus instrumentation.
+
+MetricsMiddleware times every request by route template and keeps a
+RequestStats object in a contextvar for the duration of the request. The
+SQLAlchemy, PyMongo and botocore hooks below add to both the global metrics
+and that object, so each route's latency can be split into database, Mongo
+and AWS time. Contextvars follow the request into run_in_threadpool, into
+SQLAlchemy's greenlets and into asyncio.gather tasks, and the stats object is
+shared by reference, so sync PyMongo endpoints are counted too.
+
+Set PROMETHEUS_MULTIPROC_DIR when running several worker processes.
+"""
+import os
+import time
+from contextvars import ContextVar
+
+from fastapi import Request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from pymongo import monitoring
+from sqlalchemy import event
+from starlette.middleware.base import BaseHTTPMiddleware
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "bch_http_request_seconds", "Request latency by route", ["method", "route"], buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "bch_http_requests_in_progress", "Requests being served", ["method"], multiprocess_mode="livesum"
+)
+HTTP_RESPONSES_TOTAL = Counter(
+    "bch_http_responses_total", "Responses by route and status code", ["method", "route", "status"]
+)
+
+REQUEST_DEPENDENCY_SECONDS = Histogram(
+    "bch_request_dependency_seconds",
+    "Time a request spent waiting on each dependency",
+    ["route", "dependency"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_DEPENDENCY_CALLS = Histogram(
+    "bch_request_dependency_calls",
+    "Calls a request made to each dependency",
+    ["route", "dependency"],
+    buckets=COUNT_BUCKETS,
+)
+
+DB_STATEMENT_SECONDS = Histogram(
+    "bch_db_statement_seconds", "SQL statement latency", ["operation"], buckets=LATENCY_BUCKETS
+)
+MONGO_COMMAND_SECONDS = Histogram(
+    "bch_mongo_command_seconds", "MongoDB command latency", ["command", "collection"], buckets=LATENCY_BUCKETS
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "bch_mongo_command_failures_total", "Failed MongoDB commands", ["command", "collection"]
+)
+AWS_CALL_SECONDS = Histogram(
+    "bch_aws_call_seconds", "AWS API call latency, retries included", ["service", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+AWS_CALL_FAILURES = Counter("bch_aws_call_failures_total", "Failed AWS API calls", ["service", "operation"])
+
+IMAGE_GC_SCANNED = Counter("bch_image_gc_scanned_total", "Stored images examined by the orphan sweep", ["store"])
+IMAGE_GC_DELETED = Counter(
+    "bch_image_gc_deleted_total", "Orphaned images deleted (or, in dry-run, found)", ["store", "dry_run"]
+)
+IMAGE_GC_DELETED_BYTES = Counter("bch_image_gc_deleted_bytes_total", "Bytes of orphaned images deleted", ["store"])
+IMAGE_GC_FAILURES = Counter("bch_image_gc_failures_total", "Orphaned images that failed to delete", ["store"])
+IMAGE_GC_LAST_SUCCESS = Gauge(
+    "bch_image_gc_last_success_timestamp_seconds", "When the orphan sweep last finished", multiprocess_mode="max"
+)
+
+SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+
+class RequestStats:
+    """Dependency usage of the current request."""
+
+    __slots__ = ("db_queries", "db_seconds", "mongo_commands", "mongo_seconds", "external_calls", "external_seconds")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.mongo_commands = 0
+        self.mongo_seconds = 0.0
+        self.external_calls = 0
+        self.external_seconds = 0.0
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> RequestStats | None:
+    return _request_stats.get()
+
+
+def _route_label(request: Request) -> str:
+    # the route template, never the raw path, to keep label cardinality bounded
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _observe_dependencies(route: str, stats: RequestStats):
+    for dependency, calls, seconds in (
+        ("db", stats.db_queries, stats.db_seconds),
+        ("mongo", stats.mongo_commands, stats.mongo_seconds),
+        ("aws", stats.external_calls, stats.external_seconds),
+    ):
+        REQUEST_DEPENDENCY_CALLS.labels(route, dependency).observe(calls)
+        REQUEST_DEPENDENCY_SECONDS.labels(route, dependency).observe(seconds)
+
+
+class MetricsMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        method = request.method
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # streamed bodies (e.g. the ICS feed) are timed up to the first byte
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            _request_stats.reset(token)
+
+            route = _route_label(request)
+            HTTP_REQUEST_SECONDS.labels(method, route).observe(elapsed)
+            HTTP_RESPONSES_TOTAL.labels(method, route, str(status)).inc()
+            _observe_dependencies(route, stats)
+
+
+def metrics_payload() -> tuple[bytes, str]:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+# --------------------------
+# SQLAlchemy
+# --------------------------
+
+def instrument_engine(engine):
+    """Count and time every statement run through `engine` (an AsyncEngine or Engine)."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("bch_query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["bch_query_started"].pop()
+        elapsed = time.perf_counter() - started
+
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+        DB_STATEMENT_SECONDS.labels(operation if operation in SQL_OPERATIONS else "OTHER").observe(elapsed)
+
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_seconds += elapsed
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        # after_cursor_execute doesn't fire for failed statements
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("bch_query_started"):
+            conn.info["bch_query_started"].pop()
+
+
+# --------------------------
+# PyMongo
+# --------------------------
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Pass to MongoClient(event_listeners=[mongo_listener])."""
+
+    def __init__(self):
+        # (connection, request id) -> collection; started and finished events
+        # arrive on the same thread, but different requests may interleave
+        self._collections: dict[tuple, str] = {}
+
+    @staticmethod
+    def _key(event) -> tuple:
+        return (event.connection_id, event.request_id)
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else ""
+        self._collections[self._key(event)] = collection
+
+    def _finish(self, event) -> str:
+        collection = self._collections.pop(self._key(event), "")
+        elapsed = event.duration_micros / 1_000_000
+        MONGO_COMMAND_SECONDS.labels(event.command_name, collection).observe(elapsed)
+
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.mongo_commands += 1
+            stats.mongo_seconds += elapsed
+        return collection
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        collection = self._finish(event)
+        MONGO_COMMAND_FAILURES.labels(event.command_name, collection).inc()
+
+
+mongo_listener = MongoCommandListener()
+
+
+# --------------------------
+# botocore (S3, SES)
+# --------------------------
+
+def _aws_before_call(model, context, **kwargs):
+    # after-call-error doesn't carry the operation model, so keep the labels here
+    context["bch_call"] = (time.perf_counter(), model.service_model.service_name, model.name)
+
+
+def _aws_finished(context, failed: bool):
+    call = context.pop("bch_call", None)
+    if call is None:
+        return
+    started, service, operation = call
+    elapsed = time.perf_counter() - started
+    AWS_CALL_SECONDS.labels(service, operation).observe(elapsed)
+    if failed:
+        AWS_CALL_FAILURES.labels(service, operation).inc()
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.external_calls += 1
+        stats.external_seconds += elapsed
+
+
+def _aws_after_call(context, http_response=None, **kwargs):
+    _aws_finished(context, http_response is None or http_response.status_code >= 400)
+
+
+def _aws_after_call_error(context, **kwargs):
+    _aws_finished(context, True)
+
+
+def instrument_boto3_client(client):
+    """Time every API call made through a boto3 client, retries included."""
+    events = client.meta.events
+    events.register("before-call.*.*", _aws_before_call)
+    events.register("after-call.*.*", _aws_after_call)
+    events.register("after-call-error.*.*", _aws_after_call_error)
+    return client
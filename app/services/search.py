@@ -0,0 +1,258 @@
+"""
+Full-text index over organizations and opportunities.
+
+Postgres keeps a weighted tsvector per entity in `search_index` (GIN indexed);
+MySQL/MariaDB use an InnoDB table with a FULLTEXT index and local SQLite runs
+an FTS5 virtual table, both under the same name. Writers call
+index_organization / index_opportunity inside their own transaction, so the
+index is updated incrementally and commits (or rolls back) with the row.
+"""
+import re
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.model import Opportunity, OpportunityCategory, Organization
+
+ORG = "organization"
+OPPORTUNITY = "opportunity"
+
+_PG_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS search_index (
+        entity_type VARCHAR NOT NULL,
+        entity_id VARCHAR NOT NULL,
+        title VARCHAR NOT NULL,
+        document TSVECTOR NOT NULL,
+        PRIMARY KEY (entity_type, entity_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_search_index_document ON search_index USING GIN (document)",
+]
+
+_MYSQL_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS search_index (
+        entity_type VARCHAR(32) NOT NULL,
+        entity_id VARCHAR(64) NOT NULL,
+        title TEXT NOT NULL,
+        body TEXT NOT NULL,
+        extra TEXT NOT NULL,
+        PRIMARY KEY (entity_type, entity_id),
+        FULLTEXT KEY ix_search_index_document (title, body, extra)
+    ) ENGINE = InnoDB
+    """,
+]
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        entity_type UNINDEXED,
+        entity_id UNINDEXED,
+        title,
+        body,
+        extra,
+        tokenize = 'porter unicode61'
+    )
+    """,
+]
+
+_PG_UPSERT = text(
+    """
+    INSERT INTO search_index (entity_type, entity_id, title, document)
+    VALUES (
+        :entity_type, :entity_id, :title,
+        setweight(to_tsvector('english', :title), 'A')
+        || setweight(to_tsvector('english', :body), 'B')
+        || setweight(to_tsvector('english', :extra), 'C')
+    )
+    ON CONFLICT (entity_type, entity_id) DO UPDATE
+    SET title = EXCLUDED.title, document = EXCLUDED.document
+    """
+)
+
+_MYSQL_UPSERT = text(
+    """
+    INSERT INTO search_index (entity_type, entity_id, title, body, extra)
+    VALUES (:entity_type, :entity_id, :title, :body, :extra)
+    ON DUPLICATE KEY UPDATE title = VALUES(title), body = VALUES(body), extra = VALUES(extra)
+    """
+)
+
+_PG_QUERY = """
+    SELECT entity_type, entity_id, ts_rank_cd(document, query) AS rank
+    FROM search_index, websearch_to_tsquery('english', :q) AS query
+    WHERE document @@ query {type_filter}
+    ORDER BY rank DESC
+    LIMIT :limit OFFSET :offset
+"""
+
+# InnoDB scores the three columns as one document, so there are no per-column weights;
+# RANK is a reserved word since MySQL 8
+_MYSQL_QUERY = """
+    SELECT entity_type, entity_id, MATCH (title, body, extra) AGAINST (:q IN BOOLEAN MODE) AS `rank`
+    FROM search_index
+    WHERE MATCH (title, body, extra) AGAINST (:q IN BOOLEAN MODE) {type_filter}
+    ORDER BY `rank` DESC
+    LIMIT :limit OFFSET :offset
+"""
+
+# bm25() is "lower is better"; negate it so both backends rank descending.
+# Column weights: entity_type, entity_id, title, body, extra.
+_SQLITE_QUERY = """
+    SELECT entity_type, entity_id, -bm25(search_index, 0, 0, 10.0, 4.0, 2.0) AS rank
+    FROM search_index
+    WHERE search_index MATCH :q {type_filter}
+    ORDER BY rank DESC
+    LIMIT :limit OFFSET :offset
+"""
+
+_DELETE = text(
+    "DELETE FROM search_index WHERE entity_type = :entity_type AND entity_id = :entity_id"
+)
+_SQLITE_INSERT = text(
+    """
+    INSERT INTO search_index (entity_type, entity_id, title, body, extra)
+    VALUES (:entity_type, :entity_id, :title, :body, :extra)
+    """
+)
+
+
+def _backend(bind) -> str:
+    """Which search_index flavour this bind uses; anything unrecognised gets SQLite's FTS5."""
+    name = bind.dialect.name
+    if name in ("postgresql", "mysql"):
+        return name
+    return "mysql" if name == "mariadb" else "sqlite"
+
+
+_DDL = {"postgresql": _PG_DDL, "mysql": _MYSQL_DDL, "sqlite": _SQLITE_DDL}
+_UPSERT = {"postgresql": _PG_UPSERT, "mysql": _MYSQL_UPSERT}
+
+
+async def ensure_search_index(conn: AsyncConnection):
+    """Create the index table for the current dialect and backfill it once."""
+    backend = _backend(conn)
+    for ddl in _DDL[backend]:
+        await conn.execute(text(ddl))
+
+    if (await conn.execute(text("SELECT 1 FROM search_index LIMIT 1"))).first():
+        return
+
+    orgs = (await conn.execute(select(Organization))).all()
+    for org in orgs:
+        await _write(conn, backend, _org_row(org))
+
+    categories: dict[str, list[str]] = {}
+    for opp_id, category in (
+        await conn.execute(select(OpportunityCategory.opportunity_id, OpportunityCategory.category))
+    ).all():
+        categories.setdefault(opp_id, []).append(category)
+
+    opps = (await conn.execute(select(Opportunity))).all()
+    for opp in opps:
+        await _write(conn, backend, _opportunity_row(opp, categories.get(opp.id, [])))
+
+
+def _org_row(org) -> dict:
+    return {
+        "entity_type": ORG,
+        "entity_id": org.id,
+        "title": org.name or "",
+        "body": org.description or "",
+        "extra": org.location or "",
+    }
+
+
+def _opportunity_row(opp, categories: list[str]) -> dict:
+    return {
+        "entity_type": OPPORTUNITY,
+        "entity_id": opp.id,
+        "title": opp.title or "",
+        "body": opp.description or "",
+        "extra": " ".join(categories),
+    }
+
+
+async def _write(conn, backend: str, row: dict):
+    if backend in _UPSERT:
+        await conn.execute(_UPSERT[backend], row)
+    else:
+        await conn.execute(_DELETE, {"entity_type": row["entity_type"], "entity_id": row["entity_id"]})
+        await conn.execute(_SQLITE_INSERT, row)
+
+
+async def index_organization(session: AsyncSession, org: Organization):
+    await _write(session, _backend(session.get_bind()), _org_row(org))
+
+
+async def index_opportunity(session: AsyncSession, opp: Opportunity, categories: list[str]):
+    await _write(session, _backend(session.get_bind()), _opportunity_row(opp, categories))
+
+
+async def index_opportunities(session: AsyncSession, items: list[tuple[Opportunity, list[str]]]):
+    """Batch form of index_opportunity: one executemany per statement instead of one round trip per row."""
+    rows = [_opportunity_row(opp, categories) for opp, categories in items]
+    if not rows:
+        return
+    backend = _backend(session.get_bind())
+    if backend in _UPSERT:
+        await session.execute(_UPSERT[backend], rows)
+    else:
+        await session.execute(
+            _DELETE, [{"entity_type": r["entity_type"], "entity_id": r["entity_id"]} for r in rows]
+        )
+        await session.execute(_SQLITE_INSERT, rows)
+
+
+async def remove_from_index(session: AsyncSession, entity_type: str, entity_id: str):
+    await session.execute(_DELETE, {"entity_type": entity_type, "entity_id": entity_id})
+
+
+def _boolean_query(q: str) -> str:
+    # MySQL boolean mode: every term required, the last one prefix-matched
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        return ""
+    return " ".join(f"+{t}" for t in terms) + "*"
+
+
+def _fts5_query(q: str) -> str:
+    # quote every term so user input can't inject FTS5 operators; prefix-match the last one
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        return ""
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+async def search(
+    session: AsyncSession,
+    q: str,
+    entity_type: str | None = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> list[tuple[str, str, float]]:
+    """Return (entity_type, entity_id, rank) tuples, best match first."""
+    params = {"limit": limit, "offset": offset}
+    type_filter = ""
+    if entity_type:
+        type_filter = "AND entity_type = :entity_type"
+        params["entity_type"] = entity_type
+
+    backend = _backend(session.get_bind())
+    if backend == "postgresql":
+        sql, params["q"] = _PG_QUERY, q
+    elif backend == "mysql":
+        sql, params["q"] = _MYSQL_QUERY, _boolean_query(q)
+        if not params["q"]:
+            return []
+    else:
+        sql, params["q"] = _SQLITE_QUERY, _fts5_query(q)
+        if not params["q"]:
+            return []
+
+    result = await session.execute(text(sql.format(type_filter=type_filter)), params)
+    return [(row.entity_type, row.entity_id, float(row.rank)) for row in result.all()]
@@ -1,9 +1,26 @@
-import os
+"""
+Sync the Explore images in public/database_images into GridFS.
+
+    python -m app.upload_images_to_gridfs --dry-run     # show what would change
+    python -m app.upload_images_to_gridfs --workers 8
+
+The image directory is indexed once and every referenced file is hashed
+(SHA-256, stored in the GridFS file's metadata). Files whose hash is already
+stored under the same name are skipped, so a re-run only uploads what is new
+or changed, through a bounded thread pool. The content type is sniffed from
+the file's first bytes. Explore documents are relinked in one bulk write.
+Replaced GridFS files are left in place for the orphan cleanup job.
+"""
+import argparse
+import hashlib
 import json
+import mimetypes
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import gridfs
-from bson import ObjectId
-from pymongo import MongoClient
 from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
 
 # --- Load environment variables ---
 load_dotenv()
@@ -13,86 +30,190 @@ BASE_DIR = os.path.dirname(__file__)
 DATA_FILE = os.path.join(BASE_DIR, "explore_data.json")
 IMAGES_DIR = os.path.abspath(os.path.join(BASE_DIR, "public/database_images"))
 
-# --- MongoDB setup ---
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["BitcoinCultureHub"]
-col = db["explore"]
-fs = gridfs.GridFS(db, collection="images")
-
-print("✅ Connected to MongoDB")
-print("📂 Image directory:", IMAGES_DIR)
-print("📄 JSON data file:", DATA_FILE)
-
-# --- Load JSON data ---
-with open(DATA_FILE, "r", encoding="utf-8") as f:
-    explore_data = json.load(f)
-
-# --- Upload each image in JSON ---
-for item in explore_data:
-    image_path = item.get("image_url")
-    if not image_path:
-        print(f"⚠️ No image URL for: {item.get('title', 'Unknown')}")
-        continue
-
-    image_name = os.path.basename(image_path).lstrip("/")
-    found_path = None
-
-    # Look for the file anywhere under IMAGES_DIR
-    for root, _, files in os.walk(IMAGES_DIR):
-        if image_name in files:
-            found_path = os.path.join(root, image_name)
-            break
-
-    if not found_path:
-        print(f"⚠️ Not found: {image_name} for {item.get('title', 'Unknown')}")
-        continue
-
-    # --- Upload to GridFS properly (stream, not read) ---
-    with open(found_path, "rb") as img_file:
-        image_id = fs.put(
+HASH_BLOCK = 1024 * 1024
+
+# (offset, magic bytes, content type)
+SIGNATURES = [
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (8, b"WEBP", "image/webp"),
+    (4, b"ftypavif", "image/avif"),
+    (0, b"BM", "image/bmp"),
+]
+
+
+def sniff_content_type(path: str) -> str:
+    with open(path, "rb") as f:
+        head = f.read(64)
+    for offset, magic, content_type in SIGNATURES:
+        if head[offset:offset + len(magic)] == magic:
+            return content_type
+    if b"<svg" in head or (head.lstrip().startswith(b"<?xml") and path.lower().endswith(".svg")):
+        return "image/svg+xml"
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def sha256_of(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(HASH_BLOCK):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def index_directory(root: str) -> dict[str, str]:
+    """filename -> path, built with a single walk."""
+    index = {}
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            if name in index:
+                print(f"⚠️ Duplicate file name {name}: using {index[name]}, ignoring {os.path.join(dirpath, name)}")
+                continue
+            index[name] = os.path.join(dirpath, name)
+    return index
+
+
+def stored_files(db, bucket: str) -> dict[str, dict]:
+    """filename -> newest GridFS file doc (id, sha256)."""
+    stored = {}
+    cursor = db[f"{bucket}.files"].find({}, {"filename": 1, "metadata.sha256": 1, "uploadDate": 1}).sort("uploadDate", 1)
+    for doc in cursor:
+        stored[doc["filename"]] = doc  # later uploads win
+    return stored
+
+
+def plan_sync(explore_data: list[dict], index: dict[str, str], stored: dict[str, dict], workers: int) -> dict:
+    """Work out what to upload without touching the database."""
+    plan = {"new": [], "changed": [], "unchanged": [], "missing": [], "no_image": []}
+
+    wanted = {}
+    for item in explore_data:
+        image_path = item.get("image_url")
+        if not image_path:
+            plan["no_image"].append(item.get("title", "Unknown"))
+            continue
+        image_name = os.path.basename(image_path).lstrip("/")
+        if image_name not in index:
+            plan["missing"].append((item.get("title", "Unknown"), image_name))
+            continue
+        wanted.setdefault(image_name, []).append(item["title"])
+
+    names = sorted(wanted)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        hashes = dict(zip(names, pool.map(lambda name: sha256_of(index[name]), names)))
+
+    for name in names:
+        entry = {"name": name, "path": index[name], "sha256": hashes[name], "titles": wanted[name]}
+        existing = stored.get(name)
+        if existing is None:
+            plan["new"].append(entry)
+        elif (existing.get("metadata") or {}).get("sha256") != hashes[name]:
+            # also covers files uploaded before hashes were recorded
+            plan["changed"].append(entry)
+        else:
+            entry["file_id"] = existing["_id"]
+            plan["unchanged"].append(entry)
+    return plan
+
+
+def print_plan(plan: dict):
+    print(f"\n📋 {len(plan['new'])} new, {len(plan['changed'])} changed, "
+          f"{len(plan['unchanged'])} unchanged, {len(plan['missing'])} missing")
+    for entry in plan["new"]:
+        print(f"  + {entry['name']}")
+    for entry in plan["changed"]:
+        print(f"  ~ {entry['name']}")
+    for title, name in plan["missing"]:
+        print(f"  ! {name} (for {title}) not found under {IMAGES_DIR}")
+    for title in plan["no_image"]:
+        print(f"  ! no image_url for {title}")
+
+
+def upload(fs: gridfs.GridFS, entry: dict):
+    content_type = sniff_content_type(entry["path"])
+    # stream from disk; GridFS reads one chunk at a time
+    with open(entry["path"], "rb") as img_file:
+        entry["file_id"] = fs.put(
             img_file,
-            filename=image_name,
-            contentType="image/png"
+            filename=entry["name"],
+            contentType=content_type,
+            metadata={"sha256": entry["sha256"], "contentType": content_type},
         )
+    print(f"✅ Uploaded: {entry['name']} ({content_type}, {entry['file_id']})")
+    return entry
+
+
+def check_consistency(db, bucket: str):
+    print("\n📊 Checking GridFS consistency...")
+    num_files = db[f"{bucket}.files"].count_documents({})
+    num_chunks = db[f"{bucket}.chunks"].count_documents({})
+    print(f"   Files in {bucket}.files:  {num_files}")
+    print(f"   Chunks in {bucket}.chunks: {num_chunks}")
+
+    missing_chunks = list(db[f"{bucket}.files"].aggregate([
+        {"$match": {"length": {"$gt": 0}}},
+        {"$lookup": {
+            "from": f"{bucket}.chunks",
+            "let": {"file_id": "$_id"},
+            "pipeline": [{"$match": {"$expr": {"$eq": ["$files_id", "$$file_id"]}}}, {"$limit": 1}],
+            "as": "chunks",
+        }},
+        {"$match": {"chunks": {"$size": 0}}},
+        {"$project": {"filename": 1}},
+    ]))
+    if missing_chunks:
+        print("\n⚠️ Files missing chunks:")
+        for m in missing_chunks:
+            print("  -", m["filename"])
+    else:
+        print("✅ All files have chunks properly stored!")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload changed Explore images to GridFS")
+    parser.add_argument("--dry-run", action="store_true", help="print the diff and exit")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent hashes / uploads")
+    parser.add_argument("--collection", default="explore")
+    parser.add_argument("--bucket", default="images")
+    args = parser.parse_args()
+
+    client = MongoClient(os.getenv("MONGO_URI"))
+    db = client["BitcoinCultureHub"]
+    col = db[args.collection]
+    fs = gridfs.GridFS(db, collection=args.bucket)
+
+    print("✅ Connected to MongoDB")
+    print("📂 Image directory:", IMAGES_DIR)
+    print("📄 JSON data file:", DATA_FILE)
+
+    with open(DATA_FILE, "r", encoding="utf-8") as f:
+        explore_data = json.load(f)
+
+    plan = plan_sync(explore_data, index_directory(IMAGES_DIR), stored_files(db, args.bucket), args.workers)
+    print_plan(plan)
+    if args.dry_run:
+        return
+
+    to_upload = plan["new"] + plan["changed"]
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        uploaded = list(pool.map(lambda entry: upload(fs, entry), to_upload))
+
+    # point every item at its (possibly unchanged) file; one round trip
+    relinks = [
+        UpdateOne(
+            {"title": title, "image_id": {"$ne": str(entry["file_id"])}},
+            {"$set": {"image_id": str(entry["file_id"]), "image_url": f"/explore/image/{entry['file_id']}"}},
+        )
+        for entry in uploaded + plan["unchanged"]
+        for title in entry["titles"]
+    ]
+    relinked = col.bulk_write(relinks, ordered=False).modified_count if relinks else 0
+
+    print(f"\n🎉 Uploaded {len(uploaded)} images, relinked {relinked} explore items")
+    check_consistency(db, args.bucket)
+
 
-    # --- Update or insert explore document ---
-    col.update_one(
-        {"title": item["title"]},
-        {
-            "$set": {
-                "image_id": str(image_id),
-                "image_url": f"/explore/image/{image_id}",
-            }
-        },
-        upsert=True,
-    )
-
-    print(f"✅ Uploaded: {item['title']} → {image_name} ({image_id})")
-
-print("\n🎉 All images uploaded and database updated!")
-
-# --- Verification Summary ---
-print("\n📊 Checking GridFS consistency...")
-num_files = db.images.files.count_documents({})
-num_chunks = db.images.chunks.count_documents({})
-print(f"   Files in images.files:  {num_files}")
-print(f"   Chunks in images.chunks: {num_chunks}")
-
-# --- Optional sanity check: ensure every file has chunks ---
-missing_chunks = list(db.images.files.aggregate([
-    {"$lookup": {
-        "from": "images.chunks",
-        "localField": "_id",
-        "foreignField": "files_id",
-        "as": "chunks"
-    }},
-    {"$match": {"chunks": {"$size": 0}}},
-    {"$project": {"filename": 1}}
-]))
-
-if missing_chunks:
-    print("\n⚠️ Files missing chunks:")
-    for m in missing_chunks:
-        print("  -", m["filename"])
-else:
-    print("✅ All files have chunks properly stored!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,543 @@
+"""
+Offline load benchmark for the whole API.
+
+    python -m benchmarks.api run --scale 1 --concurrency 16 --requests 400 --out bench_api.json
+    python -m benchmarks.api run --save-baseline            # record benchmarks/baselines/api-<dialect>.json
+    python -m benchmarks.api run --compare benchmarks/baselines/api-sqlite.json
+    python -m benchmarks.api compare old.json new.json --threshold 0.15
+
+Boots app.main:app in-process through httpx's ASGITransport, against local
+stand-ins only:
+
+  SQL    BENCH_DATABASE_URL (a throwaway Postgres) or a local SQLite file
+  Mongo  BENCH_MONGO_URI (a local mongod) or mongomock
+  AWS    moto (S3 buckets are created, nothing leaves the process)
+
+The SQL database and the Mongo collections are wiped and reseeded with
+synthetic orgs, opportunities, applications, interview slots, events and
+explore items on every run, so never point the BENCH_* variables at anything
+you want to keep. Each scenario is driven with --concurrency workers for
+--requests requests; throughput and p50/p95/p99 latency go to a JSON report.
+`compare` flags scenarios whose latency or throughput regressed by more than
+--threshold and exits non-zero.
+
+The booking scenario fires several concurrent PATCH /profile/select-time
+calls at the slots of the same application and checks that exactly one of
+them ends up booked.
+
+mongomock has no $text support, so /explore/search is driven without `q`.
+Needs the "bench" extra (mongomock, moto, httpx).
+"""
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+DEFAULT_SQLITE = "sqlite+aiosqlite:///./bench_api.db"
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+# everything below must be in place before the app modules are imported:
+# they build their DB engine, Mongo clients and boto3 clients at import time
+os.environ["DEPLOYED_DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL", DEFAULT_SQLITE)
+os.environ.pop("REDIS_URL", None)
+for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "BITCOIN_AWS_ACCESS_KEY", "BITCOIN_AWS_SECRET_ACCESS_KEY"):
+    os.environ[name] = "testing"
+os.environ["AWS_DEFAULT_REGION"] = "us-east-2"
+
+CATEGORIES = ["Design", "Development", "Education", "Events", "Research", "Writing"]
+EXPLORE_CATEGORIES = ["books", "podcasts", "art", "music", "films", "communities"]
+TAGS = ["lightning", "mining", "privacy", "history", "self-custody", "education", "nostr", "art", "economics"]
+CONTINENTS = {
+    "Europe": ["Germany", "Portugal", "Switzerland", "Czechia"],
+    "North America": ["United States", "El Salvador", "Canada"],
+    "Africa": ["Kenya", "Nigeria", "South Africa"],
+    "Asia": ["Japan", "Thailand", "Vietnam"],
+}
+WORDS = (
+    "bitcoin community builder open source lightning node education meetup privacy design "
+    "research writer podcast wallet mining energy history art culture freedom money"
+).split()
+BUCKETS = ("bitcoin-culture-hub-content-pictures", "bitcoin-culture-hub-resumes")
+SLOTS_PER_BOOKING = 3
+
+
+def _start_stand_ins(use_mongomock: bool):
+    from moto import mock_aws
+
+    aws = mock_aws()
+    aws.start()
+
+    if use_mongomock:
+        import mongomock
+        import mongomock.gridfs
+        import pymongo
+
+        mongomock.gridfs.enable_gridfs_integration()
+        pymongo.MongoClient = mongomock.MongoClient
+    else:
+        os.environ["MONGO_URI"] = os.environ["BENCH_MONGO_URI"]
+    return aws
+
+
+@dataclass
+class World:
+    """Ids and tokens the scenarios pick from."""
+
+    org_ids: list[str] = field(default_factory=list)
+    owner_tokens: dict[str, str] = field(default_factory=dict)  # org id -> owner token
+    opps_by_org: dict[str, list[str]] = field(default_factory=dict)
+    applicant_tokens: list[str] = field(default_factory=list)
+    usernames: list[str] = field(default_factory=list)
+    open_applications: object = None  # iterator of (org id, opp id, token) never applied to
+    bookings: list[tuple[str, str, list[str]]] = field(default_factory=list)  # (token, org id, slot ids)
+
+    @property
+    def opp_pairs(self) -> list[tuple[str, str]]:
+        return [(org_id, opp_id) for org_id, opps in self.opps_by_org.items() for opp_id in opps]
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choices(WORDS, k=n)).capitalize()
+
+
+async def seed(scale: float, rng: random.Random) -> World:
+    from sqlalchemy import insert, text
+    from sqlmodel import SQLModel
+
+    from app.db import engine
+    from app.models.model import (
+        Application,
+        Bitcoin_Events,
+        InterviewSlot,
+        Opportunity,
+        OpportunityCategory,
+        Organization,
+        OrganizationMember,
+        Profile,
+        User,
+    )
+    from app.services.auth_service import create_access_token
+    from app.services.search import ensure_search_index
+
+    n_orgs = max(2, int(20 * scale))
+    opps_per_org = 10
+    n_users = max(20, int(400 * scale))
+    applicants_per_opp = 10
+    n_events = max(10, int(500 * scale))
+    n_bookings = max(4, int(50 * scale))
+
+    world = World()
+    now = datetime.utcnow()
+
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP TABLE IF EXISTS search_index"))
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+        users, profiles = [], []
+        for i in range(n_users):
+            user_id = str(uuid.uuid4())
+            username = f"{rng.choice(WORDS)}{i}"
+            users.append({"id": user_id, "email": f"{username}@bench.local", "hashed_password": "x", "created_at": now})
+            profiles.append({"user_id": user_id, "username": username, "location": rng.choice(list(CONTINENTS))})
+            world.usernames.append(username)
+        await conn.execute(insert(User), users)
+        await conn.execute(insert(Profile), profiles)
+        user_ids = [u["id"] for u in users]
+
+        orgs, members, opps, cats = [], [], [], []
+        owners = user_ids[:n_orgs]
+        for owner_id in owners:
+            org_id = str(uuid.uuid4())
+            orgs.append({
+                "id": org_id, "name": f"{_sentence(rng, 2)} Collective", "type": "Community",
+                "location": rng.choice(list(CONTINENTS)), "description": _sentence(rng, 20),
+                "status": "approved", "owner_id": owner_id, "submitted_at": now,
+            })
+            members.append({"org_id": org_id, "user_id": owner_id, "role": "owner", "joined_at": now})
+            world.org_ids.append(org_id)
+            world.owner_tokens[org_id] = create_access_token({"sub": owner_id})
+            world.opps_by_org[org_id] = []
+            for _ in range(opps_per_org):
+                opp_id = str(uuid.uuid4())
+                opps.append({
+                    "id": opp_id, "org_id": org_id, "title": _sentence(rng, 4), "type": "Collaboration",
+                    "description": _sentence(rng, 30), "location": "Remote", "time_commitment": "5h/week",
+                    "created_at": now - timedelta(minutes=rng.randint(0, 100_000)), "created_by": owner_id,
+                })
+                cats += [{"opportunity_id": opp_id, "category": c} for c in rng.sample(CATEGORIES, 2)]
+                world.opps_by_org[org_id].append(opp_id)
+        await conn.execute(insert(Organization), orgs)
+        await conn.execute(insert(OrganizationMember), members)
+        await conn.execute(insert(Opportunity), opps)
+        await conn.execute(insert(OpportunityCategory), cats)
+
+        applicants = user_ids[n_orgs:]
+        applications, applied = [], set()
+        for org_id, opp_id in world.opp_pairs:
+            for user_id in rng.sample(applicants, min(applicants_per_opp, len(applicants))):
+                applied.add((opp_id, user_id))
+                applications.append({
+                    "id": str(uuid.uuid4()), "opportunity_id": opp_id, "user_id": user_id,
+                    "applied_at": now - timedelta(days=rng.randint(1, 60)), "username": "bench",
+                    "status": rng.choice(["applied", "applied", "interview", "accepted", "rejected"]),
+                })
+        await conn.execute(insert(Application), applications)
+
+        # applications with pending slots for the booking race
+        slots = []
+        org_of = {opp_id: org_id for org_id, opp_id in world.opp_pairs}
+        for application in rng.sample(applications, min(n_bookings, len(applications))):
+            slot_ids = [str(uuid.uuid4()) for _ in range(SLOTS_PER_BOOKING)]
+            slots += [
+                {
+                    "id": slot_id, "opportunity_id": application["opportunity_id"],
+                    "interview_datetime": now + timedelta(days=3, hours=i), "applicant_id": application["id"],
+                    "status": "pending",
+                }
+                for i, slot_id in enumerate(slot_ids)
+            ]
+            world.bookings.append((
+                create_access_token({"sub": application["user_id"]}), org_of[application["opportunity_id"]], slot_ids
+            ))
+        await conn.execute(insert(InterviewSlot), slots)
+
+        events = []
+        for i in range(n_events):
+            continent = rng.choice(list(CONTINENTS))
+            start = date.today() + timedelta(days=rng.randint(-200, 400))
+            events.append({
+                "id": str(uuid.uuid4()), "event_name": f"{_sentence(rng, 2)} Conference {i}",
+                "city": "Somewhere", "country": rng.choice(CONTINENTS[continent]), "continent": continent,
+                "start_date": start, "end_date": start + timedelta(days=rng.randint(0, 3)), "updated_at": now,
+            })
+        await conn.execute(insert(Bitcoin_Events), events)
+
+        await ensure_search_index(conn)
+
+    world.applicant_tokens = [create_access_token({"sub": user_id}) for user_id in applicants[:200]]
+    tokens = {user_id: create_access_token({"sub": user_id}) for user_id in applicants}
+    world.open_applications = (
+        (org_id, opp_id, tokens[user_id])
+        for (org_id, opp_id), user_id in itertools.product(world.opp_pairs, applicants)
+        if (opp_id, user_id) not in applied
+    )
+
+    await asyncio.to_thread(_seed_mongo, scale, rng)
+    print(
+        f"[seed] {n_orgs} orgs, {len(opps)} opportunities, {len(applications)} applications, "
+        f"{n_users} users, {n_events} events, {len(world.bookings)} bookings"
+    )
+    return world
+
+
+def _seed_mongo(scale: float, rng: random.Random):
+    import boto3
+
+    from app.routers import explore
+
+    s3 = boto3.client("s3", region_name="us-east-2")
+    for bucket in BUCKETS:
+        s3.create_bucket(Bucket=bucket, CreateBucketConfiguration={"LocationConstraint": "us-east-2"})
+
+    explore.col.delete_many({})
+    try:
+        explore.ensure_indexes()
+    except Exception as e:  # mongomock can't build text indexes
+        print(f"[seed] skipping explore indexes: {e}")
+
+    items = [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"{_sentence(rng, 3)} {i}",
+            "category": rng.choice(EXPLORE_CATEGORIES),
+            "tags": rng.sample(TAGS, 3),
+            "description": _sentence(rng, 25),
+            "summary": _sentence(rng, 10),
+            "image_url": f"explore/{i}.webp",
+            "status": "accepted",
+        }
+        for i in range(max(20, int(1000 * scale)))
+    ]
+    explore.col.insert_many(items)
+
+
+def _auth(token: str) -> dict:
+    return {"headers": {"Authorization": f"Bearer {token}"}}
+
+
+def scenarios(world: World) -> dict:
+    """name -> fn(rng) returning (method, url, request kwargs)."""
+
+    def org_opportunities(rng):
+        org_id = rng.choice(world.org_ids)
+        return "GET", f"/org/{org_id}/opportunities/", {}
+
+    def analytics(rng):
+        org_id = rng.choice(world.org_ids)
+        return "GET", f"/org/{org_id}/analytics", _auth(world.owner_tokens[org_id])
+
+    def apply(rng):
+        org_id, opp_id, token = next(world.open_applications)
+        body = {"email": "bench@bench.local", "username": "bench", "status": "applied"}
+        return "POST", f"/org/{org_id}/opportunities/{opp_id}/apply", {"json": body, **_auth(token)}
+
+    def patch_opportunity(rng):
+        org_id, opp_id = rng.choice(world.opp_pairs)
+        return "PATCH", f"/org/{org_id}/opportunities/{opp_id}", {"json": {"description": _sentence(rng, 30)}}
+
+    return {
+        "general_orgs": lambda rng: ("GET", "/general/orgs", {}),
+        "general_opportunities": lambda rng: ("GET", "/general/opportunity", {}),
+        "org_opportunities": org_opportunities,
+        "org_analytics": analytics,
+        "events_page": lambda rng: ("GET", f"/events/?page={rng.randint(1, 20)}&page_size=25", {}),
+        "events_feed_ics": lambda rng: ("GET", f"/events/feed.ics?continent={rng.choice(list(CONTINENTS))}", {}),
+        "users_directory": lambda rng: ("GET", "/users?limit=50", {}),
+        "users_typeahead": lambda rng: ("GET", f"/users/typeahead?q={rng.choice(world.usernames)[:2]}", {}),
+        "search": lambda rng: ("GET", f"/search/?q={rng.choice(WORDS)}", {}),
+        "explore_list": lambda rng: ("GET", f"/explore/?category={rng.choice(EXPLORE_CATEGORIES)}", {}),
+        "explore_facets": lambda rng: ("GET", f"/explore/search?tag={rng.choice(TAGS)}&limit=24", {}),
+        "applicant_dashboard": lambda rng: ("GET", "/profile/dashboard", _auth(rng.choice(world.applicant_tokens))),
+        "apply": apply,
+        "patch_opportunity": patch_opportunity,
+    }
+
+
+def percentile(samples: list[float], p: float) -> float:
+    # nearest rank on a sorted list
+    return samples[max(0, min(len(samples) - 1, math.ceil(p * len(samples)) - 1))]
+
+
+def summarize(latencies: list[float], statuses: list[int], wall: float, expected: tuple[int, ...] = (409,)) -> dict:
+    """`expected` 4xx codes are outcomes, not errors (a lost booking race is a 409)."""
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": sum(1 for s in statuses if s >= 500 or (s >= 400 and s not in expected)),
+        "status_counts": {str(s): statuses.count(s) for s in sorted(set(statuses))},
+        "rps": round(len(latencies) / wall, 1) if wall else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered), 2),
+        "p50_ms": round(percentile(ordered, 0.50), 2),
+        "p95_ms": round(percentile(ordered, 0.95), 2),
+        "p99_ms": round(percentile(ordered, 0.99), 2),
+    }
+
+
+async def drive(client, make_request, requests: int, concurrency: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    specs = [make_request(rng) for _ in range(requests)]
+    queue = iter(specs)
+    latencies, statuses = [], []
+
+    async def worker():
+        for method, url, kwargs in queue:
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            await response.aread()
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses.append(response.status_code)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+async def booking_race(client, world: World, contenders: int) -> dict:
+    """Every application gets `contenders` simultaneous picks of its own slots."""
+    from sqlalchemy import func, select
+
+    from app.db import AsyncSessionLocal
+    from app.models.model import InterviewSlot
+
+    latencies, statuses = [], []
+
+    async def pick(token: str, org_id: str, slot_id: str):
+        started = time.perf_counter()
+        body = {"slot_id": slot_id, "org_id": org_id}
+        response = await client.patch("/profile/select-time", json=body, **_auth(token))
+        latencies.append((time.perf_counter() - started) * 1000)
+        statuses.append(response.status_code)
+
+    started = time.perf_counter()
+    for token, org_id, slot_ids in world.bookings:
+        await asyncio.gather(*(pick(token, org_id, slot_ids[i % len(slot_ids)]) for i in range(contenders)))
+    result = summarize(latencies, statuses, time.perf_counter() - started)
+
+    async with AsyncSessionLocal() as session:
+        booked = (
+            await session.execute(
+                select(InterviewSlot.applicant_id, func.count())
+                .where(InterviewSlot.status == "booked")
+                .group_by(InterviewSlot.applicant_id)
+            )
+        ).all()
+    result["applications"] = len(world.bookings)
+    result["booked_once"] = sum(1 for _, n in booked if n == 1)
+    result["double_booked"] = sum(1 for _, n in booked if n > 1)
+    return result
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+async def run(args) -> dict:
+    aws = _start_stand_ins(use_mongomock=not os.environ.get("BENCH_MONGO_URI"))
+    if args.no_cache:
+        os.environ["CACHE_MAX_ENTRIES"] = "0"
+
+    import httpx
+
+    from app.db import engine
+    from app.main import app
+
+    engine.echo = False
+    rng = random.Random(args.seed)
+    world = await seed(args.scale, rng)
+
+    results = {}
+    selected = args.scenario or list(scenarios(world))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        # the app print()s on most requests; keep it out of the report
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for name, make_request in scenarios(world).items():
+                if name not in selected:
+                    continue
+                await drive(client, make_request, min(20, args.requests), args.concurrency, args.seed)  # warm-up
+                results[name] = await drive(client, make_request, args.requests, args.concurrency, args.seed)
+            if "booking_race" in selected or not args.scenario:
+                results["booking_race"] = await booking_race(client, world, args.contenders)
+
+    await engine.dispose()
+    aws.stop()
+
+    dialect = engine.dialect.name
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "database": dialect,
+            "mongo": "mongod" if os.environ.get("BENCH_MONGO_URI") else "mongomock",
+            "scale": args.scale,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "cache": not args.no_cache,
+            "seed": args.seed,
+        },
+        "scenarios": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float, noise_ms: float) -> list[str]:
+    """Return one line per regression; prints the full side-by-side table."""
+    regressions = []
+    print(f"{'scenario':<24}{'metric':<8}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, now in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            print(f"{name:<24}(new)")
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "rps"):
+            old, new = before[metric], now[metric]
+            change = (new - old) / old if old else 0.0
+            if metric == "rps":
+                worse = change < -threshold
+            else:
+                worse = change > threshold and new - old > noise_ms
+            flag = "  <-- regression" if worse else ""
+            print(f"{name:<24}{metric:<8}{old:>12}{new:>12}{change:>+10.1%}{flag}")
+            if worse:
+                regressions.append(f"{name} {metric}: {old} -> {new} ({change:+.1%})")
+        if now["errors"] > before["errors"]:
+            regressions.append(f"{name} errors: {before['errors']} -> {now['errors']}")
+        if now.get("double_booked"):
+            regressions.append(f"{name}: {now['double_booked']} applications booked twice")
+        if "booked_once" in now and now["booked_once"] != now["applications"]:
+            regressions.append(f"{name}: only {now['booked_once']} of {now['applications']} applications got a slot")
+    return regressions
+
+
+def _load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def _report_regressions(regressions: list[str]) -> int:
+    if regressions:
+        print("\nregressions:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\nno regressions")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="seed, drive the endpoints and write a report")
+    run_parser.add_argument("--scale", type=float, default=1.0, help="multiplier for the seeded row counts")
+    run_parser.add_argument("--requests", type=int, default=400, help="requests per scenario")
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--contenders", type=int, default=4, help="simultaneous picks per booking")
+    run_parser.add_argument("--scenario", action="append", help="only run these (repeatable)")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--no-cache", action="store_true", help="disable the response cache")
+    run_parser.add_argument("--out", help="write the JSON report here")
+    run_parser.add_argument("--save-baseline", action="store_true", help="store the report as the dialect's baseline")
+    run_parser.add_argument("--compare", metavar="BASELINE", help="compare against a stored report")
+    run_parser.add_argument("--threshold", type=float, default=0.15)
+    run_parser.add_argument("--noise-ms", type=float, default=1.0, help="ignore latency changes smaller than this")
+
+    compare_parser = sub.add_parser("compare", help="compare two stored reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.15)
+    compare_parser.add_argument("--noise-ms", type=float, default=1.0)
+
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        regressions = compare(_load(args.baseline), _load(args.current), args.threshold, args.noise_ms)
+        return _report_regressions(regressions)
+
+    report = asyncio.run(run(args))
+    body = json.dumps(report, indent=2)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(body + "\n")
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"api-{report['meta']['database']}.json")
+        with open(path, "w") as f:
+            f.write(body + "\n")
+        print(f"[baseline] wrote {path}")
+    if not args.out and not args.save_baseline:
+        print(body)
+
+    if args.compare:
+        return _report_regressions(compare(_load(args.compare), report, args.threshold, args.noise_ms))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+CPU time and allocations of a large /opportunities list response, old path vs fast path.
+
+    python -m benchmarks.serialization --rows 10000
+
+old: ORM rows -> OpportunityRead(**opp.dict()) per row -> response_model
+     validation -> jsonable_encoder -> json.dumps (what FastAPI did before)
+new: load_opportunity_rows() column tuples -> dicts -> orjson (ORJSONResponse)
+
+Both paths read the same seeded database so the query cost is included. The
+seed step wipes the opportunity tables, so it only ever runs against
+BENCH_DATABASE_URL (a local SQLite file by default), never DEPLOYED_DATABASE_URL.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+os.environ["DEPLOYED_DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL", "sqlite+aiosqlite:///./bench_serialization.db")
+
+import orjson  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import delete, insert, select  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+from app.db import AsyncSessionLocal, engine  # noqa: E402
+from app.models.model import (  # noqa: E402
+    Opportunity,
+    OpportunityCategory,
+    OpportunityRead,
+    Organization,
+    User,
+)
+from app.routers.opportunity2 import load_opportunity_rows  # noqa: E402
+
+CATEGORIES = ["Design", "Development", "Education", "Events", "Research", "Writing"]
+
+
+async def seed(rows: int) -> str:
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        for model in (OpportunityCategory, Opportunity, Organization, User):
+            await conn.execute(delete(model))
+
+        user_id, org_id = str(uuid.uuid4()), str(uuid.uuid4())
+        await conn.execute(insert(User), [{"id": user_id, "email": "bench@example.com", "hashed_password": "x"}])
+        await conn.execute(insert(Organization), [{"id": org_id, "name": "Bench Org", "owner_id": user_id}])
+
+        now = datetime.utcnow()
+        opps, cats = [], []
+        for i in range(rows):
+            opp_id = str(uuid.uuid4())
+            opps.append({
+                "id": opp_id,
+                "org_id": org_id,
+                "title": f"Opportunity {i}",
+                "type": "Collaboration",
+                "description": "Help us build something for the Bitcoin community. " * 4,
+                "location": "Remote",
+                "time_commitment": "5h/week",
+                "created_at": now - timedelta(minutes=i),
+                "created_by": user_id,
+            })
+            cats += [{"opportunity_id": opp_id, "category": c} for c in CATEGORIES[i % 3: i % 3 + 2]]
+        await conn.execute(insert(Opportunity), opps)
+        await conn.execute(insert(OpportunityCategory), cats)
+    return org_id
+
+
+async def old_path(org_id: str) -> bytes:
+    async with AsyncSessionLocal() as session:
+        rows = (
+            await session.execute(
+                select(Opportunity, Organization.name)
+                .join(Organization, Organization.id == Opportunity.org_id)
+                .where(Opportunity.org_id == org_id)
+            )
+        ).all()
+        cats_map = defaultdict(list)
+        for oc in (await session.execute(select(OpportunityCategory))).scalars():
+            cats_map[oc.opportunity_id].append(oc.category)
+
+        models = [
+            OpportunityRead(**opp.dict(), org_name=org_name, categories=cats_map.get(opp.id, []))
+            for opp, org_name in rows
+        ]
+    # FastAPI: validate against response_model, encode, then JSONResponse
+    validated = TypeAdapter(list[OpportunityRead]).validate_python(models, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+
+async def new_path(org_id: str) -> bytes:
+    async with AsyncSessionLocal() as session:
+        rows = await load_opportunity_rows(session, Opportunity.org_id == org_id)
+    return orjson.dumps(rows)
+
+
+async def measure(fn, org_id: str, runs: int) -> dict:
+    await fn(org_id)  # warm up connection and caches
+    cpu, peaks, blocks = [], [], []
+    for _ in range(runs):
+        gc.collect()
+        tracemalloc.start()
+        started = time.process_time()
+        body = await fn(org_id)
+        cpu.append(time.process_time() - started)
+        snapshot = tracemalloc.take_snapshot()
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        blocks.append(sum(stat.count for stat in snapshot.statistics("filename")))
+        tracemalloc.stop()
+    return {
+        "cpu_ms": round(min(cpu) * 1000, 1),
+        "peak_mib": round(min(peaks) / 2**20, 2),
+        "live_blocks": min(blocks),
+        "bytes": len(body),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    org_id = await seed(args.rows)
+    before = await measure(old_path, org_id, args.runs)
+    after = await measure(new_path, org_id, args.runs)
+    await engine.dispose()
+
+    print(f"{args.rows} rows (best of {args.runs}, tracemalloc on)")
+    for name, result in (("before", before), ("after", after)):
+        print(f"  {name:<7} " + "  ".join(f"{k}={v}" for k, v in result.items()))
+    print(f"  cpu speedup x{before['cpu_ms'] / after['cpu_ms']:.1f}, "
+          f"peak memory x{before['peak_mib'] / after['peak_mib']:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
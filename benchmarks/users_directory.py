@@ -0,0 +1,122 @@
+"""
+Latency of the /users directory queries against a large profile table.
+
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.users_directory --profiles 1000000
+
+Seeds USER/PROFILE rows once (skipped if the table is already big enough), then
+times the first page, deep cursor pages, prefix searches and typeahead. With the
+prefix index every query should stay flat as --profiles grows.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import string
+import time
+import uuid
+
+os.environ["DEPLOYED_DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL", "sqlite+aiosqlite:///./bench_users.db")
+
+from sqlalchemy import func, insert, select  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+from app.db import AsyncSessionLocal, engine  # noqa: E402
+from app.models.model import Profile, User, lower_bytewise  # noqa: E402
+from app.routers.users import _prefix_range, directory_query  # noqa: E402
+from app.services.pagination import encode_cursor  # noqa: E402
+
+BATCH = 10_000
+CITIES = ["Austin", "Berlin", "Lagos", "Lisbon", "Lugano", "Nairobi", "Prague", "San Salvador", "Tokyo"]
+
+
+def _username(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 12))) + str(rng.randint(0, 9999))
+
+
+async def seed(total: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async with AsyncSessionLocal() as session:
+        existing = await session.scalar(select(func.count()).select_from(Profile))
+    if existing >= total:
+        print(f"[seed] {existing} profiles already present")
+        return
+
+    rng = random.Random(42)
+    seen = set()
+    started = time.perf_counter()
+    async with engine.begin() as conn:
+        for offset in range(existing, total, BATCH):
+            users, profiles = [], []
+            for _ in range(min(BATCH, total - offset)):
+                name = _username(rng)
+                while name in seen:
+                    name = _username(rng)
+                seen.add(name)
+                user_id = str(uuid.uuid4())
+                users.append({"id": user_id, "email": f"{name}@example.com", "hashed_password": "x"})
+                profiles.append({"user_id": user_id, "username": name, "location": rng.choice(CITIES)})
+            await conn.execute(insert(User), users)
+            await conn.execute(insert(Profile), profiles)
+    print(f"[seed] inserted {total - existing} profiles in {time.perf_counter() - started:.1f}s")
+
+
+async def _time(stmt, runs: int) -> list[float]:
+    samples = []
+    async with AsyncSessionLocal() as session:
+        for _ in range(runs):
+            started = time.perf_counter()
+            (await session.execute(stmt)).all()
+            samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _report(name: str, samples: list[float]):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<28} p50={statistics.median(samples):7.2f}ms  p95={p95:7.2f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    await seed(args.profiles)
+
+    async with AsyncSessionLocal() as session:
+        # a cursor roughly in the middle of the table
+        middle = (
+            await session.execute(
+                select(lower_bytewise(Profile.username).label("sort_key"), Profile.user_id)
+                .order_by(lower_bytewise(Profile.username), Profile.user_id)
+                .offset(args.profiles // 2)
+                .limit(1)
+            )
+        ).one()
+    deep_cursor = encode_cursor(middle.sort_key, middle.user_id)
+
+    cases = {
+        "first page": directory_query(limit=50),
+        "deep cursor page": directory_query(cursor=deep_cursor, limit=50),
+        "username prefix 'a'": directory_query(q="a", limit=50),
+        "username prefix 'mar'": directory_query(q="mar", limit=50),
+        "location prefix 'lu'": directory_query(location="lu", limit=50),
+        "typeahead 'bt'": (
+            select(Profile.user_id, Profile.username, Profile.profile_picture)
+            .where(_prefix_range(Profile.username, "bt"))
+            .order_by(lower_bytewise(Profile.username), Profile.user_id)
+            .limit(10)
+        ),
+    }
+    for name, stmt in cases.items():
+        _report(name, await _time(stmt, args.runs))
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
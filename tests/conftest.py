@@ -0,0 +1,141 @@
+"""
+Shared fixtures: the whole app in-process against throwaway stand-ins.
+
+SQL goes to TEST_DATABASE_URL (point it at a scratch Postgres to exercise
+row locking for real) or a temporary SQLite file; Mongo is mongomock. Like
+benchmarks/api.py, the environment has to be in place before any app
+module is imported, since they build their clients at import time.
+"""
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+_DB_DIR = tempfile.mkdtemp(prefix="bch-tests-")
+os.environ["DEPLOYED_DATABASE_URL"] = os.environ.get(
+    "TEST_DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+)
+os.environ.pop("REDIS_URL", None)
+os.environ["IMAGE_GC_INTERVAL_SECONDS"] = "0"
+for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "BITCOIN_AWS_ACCESS_KEY", "BITCOIN_AWS_SECRET_ACCESS_KEY"):
+    os.environ.setdefault(name, "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-2")
+
+import functools  # noqa: E402
+
+import mongomock  # noqa: E402
+import mongomock.gridfs  # noqa: E402
+import pymongo  # noqa: E402
+from mongomock.store import ServerStore  # noqa: E402
+
+mongomock.gridfs.enable_gridfs_integration()
+# every module builds its own client; like the real cluster they all see the
+# same data, so cross-collection $lookups between them work
+pymongo.MongoClient = functools.partial(mongomock.MongoClient, _store=ServerStore())
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from sqlalchemy import event, insert  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def engine():
+    from app.db import engine
+    from app.services.search import ensure_search_index
+
+    engine.echo = False
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await ensure_search_index(conn)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def client(engine):
+    from app.main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@contextmanager
+def count_statements(engine):
+    """Collect every SQL statement `engine` sends, via the same hook as app/services/metrics.py."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+def auth(user_id: str) -> dict:
+    from app.services.auth_service import create_access_token
+
+    return {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+
+
+@pytest.fixture
+async def world(engine):
+    """One org owner, one opportunity and one applicant with three pending interview slots."""
+    from app.models.model import (
+        Application,
+        InterviewSlot,
+        Opportunity,
+        Organization,
+        OrganizationMember,
+        Profile,
+        User,
+    )
+
+    now = datetime.utcnow()
+    ids = {key: str(uuid.uuid4()) for key in ("owner", "applicant", "org", "opportunity", "application")}
+    ids["slots"] = [str(uuid.uuid4()) for _ in range(3)]
+
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), [
+            {"id": ids["owner"], "email": "owner@test.local", "hashed_password": "x", "created_at": now},
+            {"id": ids["applicant"], "email": "applicant@test.local", "hashed_password": "x", "created_at": now},
+        ])
+        await conn.execute(insert(Profile), [
+            {"user_id": ids["owner"], "username": "owner"},
+            {"user_id": ids["applicant"], "username": "applicant"},
+        ])
+        await conn.execute(insert(Organization), [{
+            "id": ids["org"], "name": "Test Collective", "type": "Community", "location": "Europe",
+            "description": "A test organization", "status": "approved", "owner_id": ids["owner"],
+            "submitted_at": now,
+        }])
+        await conn.execute(insert(OrganizationMember), [
+            {"org_id": ids["org"], "user_id": ids["owner"], "role": "owner", "joined_at": now},
+        ])
+        await conn.execute(insert(Opportunity), [{
+            "id": ids["opportunity"], "org_id": ids["org"], "title": "Write docs", "type": "Collaboration",
+            "description": "Help with the docs", "location": "Remote", "time_commitment": "5h/week",
+            "created_at": now, "created_by": ids["owner"],
+        }])
+        await conn.execute(insert(Application), [{
+            "id": ids["application"], "opportunity_id": ids["opportunity"], "user_id": ids["applicant"],
+            "applied_at": now, "username": "applicant", "status": "interview",
+        }])
+        await conn.execute(insert(InterviewSlot), [
+            {
+                "id": slot_id, "opportunity_id": ids["opportunity"], "applicant_id": ids["application"],
+                "interview_datetime": now + timedelta(days=3, hours=i), "status": "pending",
+            }
+            for i, slot_id in enumerate(ids["slots"])
+        ])
+    return ids
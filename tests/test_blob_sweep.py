@@ -0,0 +1,79 @@
+"""The orphan sweep and put_blob racing over the same content-addressed blob."""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+from botocore.exceptions import ClientError
+
+from app.services.blobs import blob_key, claim_for_sweep, finish_sweep, put_blob
+
+BUCKET = "bucket"
+DATA = b"\x89PNG\r\n\x1a\n not really a png"
+
+
+class MemoryS3:
+    """Just the S3 calls put_blob makes."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body
+
+
+def _orphaned_blob(blobs, s3):
+    """A blob whose last reference went two days ago (what release_blobs leaves behind)."""
+    key = put_blob(s3, BUCKET, blobs, DATA, "image/png")
+    released = datetime.now(timezone.utc) - timedelta(days=2)
+    blobs.update_one({"_id": key}, {"$set": {"refs": 0, "orphaned_at": released}})
+    return key
+
+
+def test_revived_blob_is_reuploaded_after_the_sweep_deletes_it():
+    blobs, s3 = mongomock.MongoClient().db.image_blobs, MemoryS3()
+    key = _orphaned_blob(blobs, s3)
+    cutoff = datetime.now(timezone.utc) - timedelta(days=1)
+
+    claimed = claim_for_sweep(blobs, [key], cutoff, "sweep-1")
+    assert claimed == {key}
+
+    # an upload of the same bytes arrives while the sweep holds the claim
+    uploader = threading.Thread(target=put_blob, args=(s3, BUCKET, blobs, DATA, "image/png"))
+    uploader.start()
+    time.sleep(0.3)
+    assert uploader.is_alive()  # waiting for the claim
+
+    del s3.objects[key]
+    finish_sweep(blobs, claimed, "sweep-1", [key])
+    uploader.join(timeout=5)
+
+    assert key in s3.objects
+    doc = blobs.find_one({"_id": key})
+    assert doc["refs"] == 1
+    assert "sweeping" not in doc
+
+
+def test_referenced_blob_cannot_be_claimed():
+    blobs, s3 = mongomock.MongoClient().db.image_blobs, MemoryS3()
+    key = _orphaned_blob(blobs, s3)
+    put_blob(s3, BUCKET, blobs, DATA, "image/png")  # revived before the sweep got to it
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=1)
+    assert claim_for_sweep(blobs, [key], cutoff, "sweep-1") == set()
+
+
+def test_untracked_blob_key_is_claimed_and_forgotten():
+    blobs = mongomock.MongoClient().db.image_blobs
+    key = blob_key(DATA, "image/png")
+    cutoff = datetime.now(timezone.utc) - timedelta(days=1)
+
+    assert claim_for_sweep(blobs, [key], cutoff, "sweep-1") == {key}
+    finish_sweep(blobs, {key}, "sweep-1", [key])
+
+    assert blobs.find_one({"_id": key}) is None
@@ -0,0 +1,79 @@
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+pytestmark = pytest.mark.anyio
+
+EMAIL = "reader@example.com"
+
+
+@pytest.fixture
+def bookmarks():
+    from app.routers import item
+
+    item.bookmark_collection.drop()
+    item.ensure_indexes()
+    yield item.bookmark_collection
+    item.bookmark_collection.drop()
+
+
+def _bookmark(title: str) -> dict:
+    return {"title": title, "user_email": EMAIL, "itemType": "article", "tags": ["bitcoin"]}
+
+
+async def test_second_post_conflicts(client, bookmarks):
+    first = await client.post("/bookmarks/", json=_bookmark("Mempool art"))
+    second = await client.post("/bookmarks/", json=_bookmark("Mempool art"))
+
+    assert first.status_code == 201
+    assert first.json()["user"] == {"email": EMAIL}
+    assert second.status_code == 409
+    assert bookmarks.count_documents({"user_email": EMAIL}) == 1
+
+
+async def test_duplicate_key_error_conflicts(client, bookmarks, monkeypatch):
+    # a click that races past the upsert's lookup is stopped by the unique index
+    def collide(*args, **kwargs):
+        raise DuplicateKeyError("E11000 duplicate key error")
+
+    monkeypatch.setattr(bookmarks, "update_one", collide)
+
+    response = await client.post("/bookmarks/", json=_bookmark("Mempool art"))
+
+    assert response.status_code == 409
+
+
+async def test_listing_without_limit_is_a_plain_list(client, bookmarks):
+    for i in range(3):
+        await client.post("/bookmarks/", json=_bookmark(f"Item {i}"))
+
+    response = await client.get(f"/bookmarks/{EMAIL}")
+
+    assert response.status_code == 200
+    assert sorted(b["title"] for b in response.json()) == ["Item 0", "Item 1", "Item 2"]
+
+
+async def test_pages_cover_every_bookmark_once(client, bookmarks):
+    titles = [f"Item {i}" for i in range(7)]
+    for title in titles:
+        await client.post("/bookmarks/", json=_bookmark(title))
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        page = (await client.get(f"/bookmarks/{EMAIL}", params=params)).json()
+        assert len(page["items"]) <= 3
+        seen += [b["title"] for b in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    # newest first, each exactly once
+    assert seen == titles[::-1]
+
+
+async def test_bad_cursor_is_400(client, bookmarks):
+    from app.services.pagination import encode_cursor
+
+    for cursor in ("not-a-cursor", encode_cursor("not-an-object-id")):
+        response = await client.get(f"/bookmarks/{EMAIL}", params={"cursor": cursor})
+        assert response.status_code == 400, cursor
@@ -0,0 +1,108 @@
+import pytest
+from sqlalchemy import select
+
+from tests.conftest import auth
+
+pytestmark = pytest.mark.anyio
+
+CSV = (
+    "title,categories,tools,output_type,location,location_type,due_date,estimated_hours\n"
+    "Translate the wiki, Writing ; Education ;,Weblate,Docs,Lisbon,hybrid,,10\n"
+    "Record a podcast,Media,,,,remote,2030-01-31T00:00:00,\n"
+    "Bad date,,,,,,not a date,\n"
+)
+
+
+async def _stored(engine, opp_id: str) -> dict:
+    from app.models.model import Opportunity, OpportunityCategory, OutputType, Tools
+
+    async with engine.connect() as conn:
+        opp = (await conn.execute(select(Opportunity).where(Opportunity.id == opp_id))).one()
+        categories = (
+            await conn.execute(select(OpportunityCategory.category).where(OpportunityCategory.opportunity_id == opp_id))
+        ).scalars().all()
+        tools = (await conn.execute(select(Tools.tool_name).where(Tools.opportunity_id == opp_id))).scalars().all()
+        outputs = (
+            await conn.execute(select(OutputType.output_type).where(OutputType.opportunity_id == opp_id))
+        ).scalars().all()
+    return {"opp": opp, "categories": sorted(categories), "tools": tools, "output_type": outputs}
+
+
+async def test_bulk_json_inserts_valid_rows_and_reports_the_rest(client, engine, world):
+    rows = [
+        {"title": "Write docs", "categories": ["Writing", "Writing"], "tools": ["Git"], "estimated_hours": 12},
+        {"description": "no title"},
+        {"title": "Design a logo", "location": {"type": "onsite", "text": "Berlin"}, "due_date": ""},
+    ]
+
+    response = await client.post(
+        f"/org/{world['org']}/opportunities/bulk", json=rows, headers=auth(world["owner"])
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [(c["row"], c["title"]) for c in body["created"]] == [(1, "Write docs"), (3, "Design a logo")]
+    assert [e["row"] for e in body["errors"]] == [2]
+    assert body["errors"][0]["errors"][0]["loc"] == ["title"]
+
+    docs = await _stored(engine, body["created"][0]["id"])
+    assert docs["opp"].estimated_hours == "12"
+    assert docs["opp"].location == "Remote"
+    assert docs["categories"] == ["Writing"]
+    assert docs["tools"] == ["Git"]
+
+    logo = await _stored(engine, body["created"][1]["id"])
+    assert logo["opp"].location == "Berlin"
+    assert logo["opp"].due_date is None
+
+
+async def test_bulk_csv_parses_lists_locations_and_blank_cells(client, engine, world):
+    response = await client.post(
+        f"/org/{world['org']}/opportunities/bulk/csv",
+        files={"file": ("opportunities.csv", CSV.encode("utf-8-sig"), "text/csv")},
+        headers=auth(world["owner"]),
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [(c["row"], c["title"]) for c in body["created"]] == [(1, "Translate the wiki"), (2, "Record a podcast")]
+    assert [(e["row"], e["errors"][0]["loc"]) for e in body["errors"]] == [(3, ["due_date"])]
+
+    wiki = await _stored(engine, body["created"][0]["id"])
+    assert wiki["categories"] == ["Education", "Writing"]
+    assert wiki["tools"] == ["Weblate"]
+    assert wiki["output_type"] == ["Docs"]
+    assert wiki["opp"].location == "Lisbon"
+    assert wiki["opp"].due_date is None
+    assert wiki["opp"].estimated_hours == "10"
+
+    # location_type without a location is dropped, like any other empty cell
+    podcast = await _stored(engine, body["created"][1]["id"])
+    assert podcast["opp"].location == "Remote"
+    assert podcast["opp"].due_date.year == 2030
+    assert podcast["tools"] == []
+
+
+async def test_bulk_rejects_empty_oversized_and_undecodable_input(client, world):
+    from app.routers.opportunity2 import BULK_IMPORT_MAX_ROWS
+
+    url = f"/org/{world['org']}/opportunities/bulk"
+    headers = auth(world["owner"])
+
+    empty = await client.post(url, json=[], headers=headers)
+    oversized = await client.post(url, json=[{"title": "x"}] * (BULK_IMPORT_MAX_ROWS + 1), headers=headers)
+    latin1 = await client.post(
+        f"{url}/csv", files={"file": ("o.csv", "title\nCafé\n".encode("latin-1"), "text/csv")}, headers=headers
+    )
+
+    assert empty.status_code == 400
+    assert oversized.status_code == 413
+    assert latin1.status_code == 400
+
+
+async def test_bulk_requires_membership(client, world):
+    response = await client.post(
+        f"/org/{world['org']}/opportunities/bulk", json=[{"title": "x"}], headers=auth(world["applicant"])
+    )
+
+    assert response.status_code == 403
@@ -0,0 +1,18 @@
+import pytest
+
+from app.config import settings
+from app.services.debug import make_debug_token, verify_debug_token
+
+
+@pytest.mark.parametrize("key", ["", "secret", "super-secret-key", "changeme", "x" * 64, "short-but-random-7f3a"])
+def test_weak_keys_disable_debug_tokens(monkeypatch, key):
+    monkeypatch.setattr(settings, "SECRET_KEY", key)
+
+    assert not verify_debug_token(make_debug_token())
+
+
+def test_strong_key_accepts_its_own_tokens(monkeypatch):
+    monkeypatch.setattr(settings, "SECRET_KEY", "Qm9sZC1yYW5kb20ta2V5LWZvci10ZXN0cy0xMjM0NQ")
+
+    assert verify_debug_token(make_debug_token())
+    assert not verify_debug_token(make_debug_token(minutes=-1))
@@ -0,0 +1,45 @@
+import pytest
+
+from app.services.blobs import IMMUTABLE_CACHE_CONTROL
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def original():
+    from app.routers import explore
+
+    file_id = explore.fs.put(b"original bytes", filename="photo.png", contentType="image/png")
+    yield file_id
+    explore.db["images.files"].delete_many({})
+    explore.db["images.chunks"].delete_many({})
+
+
+async def test_original_is_immutable(client, original):
+    response = await client.get(f"/explore/image/{original}")
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+
+async def test_missing_variant_falls_back_without_long_caching(client, original):
+    from app.routers.explore import FALLBACK_CACHE_CONTROL
+
+    response = await client.get(f"/explore/image/{original}?size=256")
+
+    assert response.status_code == 200
+    assert response.content == b"original bytes"
+    assert response.headers["cache-control"] == FALLBACK_CACHE_CONTROL
+
+
+async def test_existing_variant_is_immutable(client, original):
+    from app.routers import explore
+
+    explore.fs.put(
+        b"variant bytes", filename="photo-256w.webp", contentType="image/webp",
+        metadata={"variant_of": original, "width": 256},
+    )
+    response = await client.get(f"/explore/image/{original}?size=200")
+
+    assert response.content == b"variant bytes"
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from tests.conftest import auth
+
+pytestmark = pytest.mark.anyio
+
+CONTENDERS = 12
+
+
+async def _slot_statuses(engine, slot_ids):
+    from app.models.model import InterviewSlot
+
+    async with engine.connect() as conn:
+        rows = await conn.execute(
+            select(InterviewSlot.id, InterviewSlot.status).where(InterviewSlot.id.in_(slot_ids))
+        )
+        return dict(rows.all())
+
+
+async def test_simultaneous_picks_book_exactly_one_slot(client, engine, world):
+    headers = auth(world["applicant"])
+
+    async def pick(slot_id):
+        return await client.patch(
+            "/profile/select-time", json={"slot_id": slot_id, "org_id": world["org"]}, headers=headers
+        )
+
+    # every slot of the application is contended, several times over
+    slots = world["slots"]
+    responses = await asyncio.gather(*(pick(slots[i % len(slots)]) for i in range(CONTENDERS)))
+    codes = sorted(r.status_code for r in responses)
+
+    assert codes == [200] + [409] * (CONTENDERS - 1)
+
+    winner = next(r.json() for r in responses if r.status_code == 200)
+    assert winner["status"] == "booked"
+    assert winner["cancelled"] == len(slots) - 1
+
+    statuses = await _slot_statuses(engine, slots)
+    assert statuses[winner["id"]] == "booked"
+    assert sorted(statuses.values()) == ["booked", "cancelled", "cancelled"]
+
+
+async def test_picking_again_after_booking_conflicts(client, engine, world):
+    headers = auth(world["applicant"])
+    body = {"slot_id": world["slots"][0], "org_id": world["org"]}
+
+    first = await client.patch("/profile/select-time", json=body, headers=headers)
+    second = await client.patch(
+        "/profile/select-time", json={**body, "slot_id": world["slots"][1]}, headers=headers
+    )
+
+    assert first.status_code == 200
+    assert second.status_code == 409
+
+
+async def test_someone_elses_slot_is_not_found(client, world):
+    response = await client.patch(
+        "/profile/select-time",
+        json={"slot_id": world["slots"][0], "org_id": world["org"]},
+        headers=auth(world["owner"]),
+    )
+
+    assert response.status_code == 404
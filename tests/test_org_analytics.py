@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, select
+
+from tests.conftest import auth, count_statements
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def empty_org(engine, world):
+    """An approved organization with an owner and nothing else."""
+    from app.models.model import Organization, OrganizationMember
+
+    now = datetime.utcnow()
+    async with engine.begin() as conn:
+        await conn.execute(insert(Organization), [{
+            "id": "empty-org", "name": "Quiet Collective", "type": "Community", "location": "Europe",
+            "status": "approved", "owner_id": world["owner"], "submitted_at": now,
+        }])
+        await conn.execute(insert(OrganizationMember), [
+            {"org_id": "empty-org", "user_id": world["owner"], "role": "owner", "joined_at": now},
+        ])
+    return "empty-org"
+
+
+async def test_empty_org_is_rebuilt_once(client, engine, world, empty_org):
+    headers = auth(world["owner"])
+
+    first = await client.get(f"/org/{empty_org}/analytics", headers=headers)
+    with count_statements(engine) as statements:
+        second = await client.get(f"/org/{empty_org}/analytics", headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json()["refreshed_at"] is not None
+    assert second.json()["totals"]["applicants"] == 0
+    assert not [s for s in statements if s.lstrip().upper().startswith(("DELETE", "INSERT"))], statements
+
+
+@pytest.mark.parametrize("returning", [True, False])
+async def test_update_application_status(client, engine, world, monkeypatch, returning):
+    from app.models.model import Application
+
+    monkeypatch.setattr(engine.sync_engine.dialect, "update_returning", returning)
+
+    headers = auth(world["owner"])
+    response = await client.put(
+        f"/general/applications/{world['application']}/status", json={"action": "rejected"}, headers=headers
+    )
+    missing = await client.put(
+        "/general/applications/nope/status", json={"action": "rejected"}, headers=headers
+    )
+
+    assert response.status_code == 200
+    assert missing.status_code == 404
+    async with engine.connect() as conn:
+        status, decided_at = (
+            await conn.execute(
+                select(Application.status, Application.decided_at).where(Application.id == world["application"])
+            )
+        ).one()
+    assert status == "rejected"
+    assert decided_at is not None
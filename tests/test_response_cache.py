@@ -0,0 +1,27 @@
+import pytest
+
+from tests.conftest import auth
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_authenticated_prompts_are_private(client, world):
+    url = f"/org/{world['org']}/prompts"
+    headers = auth(world["owner"])
+
+    first = await client.get(url, headers=headers)
+    # the second answer comes from the cache and must carry the same header
+    second = await client.get(url, headers=headers)
+    revalidated = await client.get(url, headers={**headers, "If-None-Match": first.headers["ETag"]})
+
+    assert first.status_code == second.status_code == 200
+    assert revalidated.status_code == 304
+    for response in (first, second, revalidated):
+        assert response.headers["Cache-Control"] == "private, no-cache"
+
+
+async def test_public_org_stays_public(client, world):
+    response = await client.get(f"/org/{world['org']}/public")
+
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "public, no-cache"
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+EMAIL = "collector@example.com"
+
+
+@pytest.fixture
+def saved(engine):
+    """Three bookmarks, newest first: a GridFS card, a deleted item and an S3 card with variants."""
+    from app.routers import explore, item
+
+    explore.col.drop()
+    item.bookmark_collection.drop()
+    explore.col.insert_many([
+        {
+            "id": "s3-card", "title": "Lightning mural", "summary": "A mural", "category": "Art",
+            "type": "image", "tags": ["art"], "image_url": "mural.png",
+            "variants": {"256": "mural-256w.webp", "768": "mural-768w.webp"},
+            "description": "é" * 1000, "body": "never part of a card",
+        },
+        {
+            "id": "gridfs-card", "title": "Node zine", "summary": "A zine", "category": "Print",
+            "type": "zine", "tags": [], "image_url": "/explore/image/abc123", "description": "Short",
+        },
+    ])
+    now = datetime.utcnow()
+    item.bookmark_collection.insert_many([
+        {"title": title, "user_email": EMAIL, "itemType": "image", "tags": [], "created_at": now + timedelta(i)}
+        for i, title in enumerate(["Lightning mural", "Deleted thing", "Node zine"])
+    ])
+    yield
+    explore.col.drop()
+    item.bookmark_collection.drop()
+
+
+async def test_cards_are_projected_and_deleted_items_are_null(client, saved):
+    from app.routers.item import CARD_DESCRIPTION_CHARS
+
+    response = await client.get(f"/bookmarks/{EMAIL}/items", params={"size": 200})
+
+    assert response.status_code == 200
+    rows = response.json()["items"]
+    assert [row["title"] for row in rows] == ["Node zine", "Deleted thing", "Lightning mural"]
+
+    zine, deleted, mural = (row["item"] for row in rows)
+    assert deleted is None
+    assert zine["image_url"] == "/explore/image/abc123?size=256"
+    assert set(mural) == {"id", "title", "summary", "category", "type", "tags", "image_url", "description"}
+    assert mural["description"] == "é" * CARD_DESCRIPTION_CHARS
+    assert "mural-256w.webp" in mural["image_url"]
+
+
+async def test_cursor_walks_every_bookmark_once(client, saved):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = (await client.get(f"/bookmarks/{EMAIL}/items", params=params)).json()
+        seen += [row["title"] for row in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == ["Node zine", "Deleted thing", "Lightning mural"]
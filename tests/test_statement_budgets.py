@@ -0,0 +1,89 @@
+"""
+Statement budgets for endpoints rewritten to read their result back from
+the UPDATE. The budgets are per dialect: SQLite's search index write is a
+DELETE plus an INSERT where Postgres upserts in one statement.
+"""
+import pytest
+
+from tests.conftest import auth, count_statements
+
+pytestmark = pytest.mark.anyio
+
+
+def _budget(engine, postgres: int, other: int) -> int:
+    return postgres if engine.dialect.name == "postgresql" else other
+
+
+async def test_patch_opportunity_budget(client, engine, world):
+    url = f"/org/{world['org']}/opportunities/{world['opportunity']}"
+
+    with count_statements(engine) as statements:
+        response = await client.patch(url, json={"description": "Rewrite the docs"})
+
+    assert response.status_code == 200
+    assert response.json()["description"] == "Rewrite the docs"
+    assert response.json()["org_name"] == "Test Collective"
+    # UPDATE … RETURNING, categories, search index
+    assert len(statements) <= _budget(engine, 3, 4), statements
+
+
+async def test_patch_opportunity_with_categories_budget(client, engine, world):
+    url = f"/org/{world['org']}/opportunities/{world['opportunity']}"
+
+    with count_statements(engine) as statements:
+        response = await client.patch(url, json={"title": "Docs", "categories": ["Writing", "Education"]})
+
+    assert response.status_code == 200
+    assert response.json()["categories"] == ["Writing", "Education"]
+    # UPDATE … RETURNING, replace categories (DELETE + INSERT), search index
+    assert len(statements) <= _budget(engine, 4, 5), statements
+
+
+async def test_patch_missing_opportunity_is_404(client, world):
+    response = await client.patch(f"/org/{world['org']}/opportunities/nope", json={"description": "x"})
+
+    assert response.status_code == 404
+
+
+async def test_edit_organization_budget(client, engine, world):
+    with count_statements(engine) as statements:
+        response = await client.patch(
+            f"/org/{world['org']}", json={"name": "Renamed Collective", "description": "Renamed"}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["description"] == "Renamed"
+    # UPDATE … RETURNING, search index
+    assert len(statements) <= _budget(engine, 2, 3), statements
+
+
+async def test_add_member_budget(client, engine, world):
+    with count_statements(engine) as statements:
+        response = await client.post(
+            f"/org/{world['org']}/members", json={"user_id": world["applicant"], "role": "member"}
+        )
+
+    assert response.status_code == 201
+    assert response.json()["joined_at"]
+    # membership check, INSERT; nothing read back after the commit
+    assert len(statements) <= 2, statements
+
+
+async def test_create_opportunity_budget(client, engine, world):
+    body = {
+        "title": "Translate the wiki",
+        "categories": ["Writing", "Education"],
+        "tools": ["Weblate"],
+        "output_type": ["Docs"],
+        "estimated_hours": 10,
+    }
+
+    with count_statements(engine) as statements:
+        response = await client.post(
+            f"/org/{world['org']}/opportunities/", json=body, headers=auth(world["owner"])
+        )
+
+    assert response.status_code == 200
+    assert response.json()["estimated_hours"] == "10"
+    # membership check, one INSERT per table, search index
+    assert len(statements) <= _budget(engine, 6, 7), statements
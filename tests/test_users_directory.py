@@ -0,0 +1,46 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert
+
+pytestmark = pytest.mark.anyio
+
+# SQLite's lower() only folds ASCII, Python's folds everything
+USERNAMES = ["Émile", "émile2", "Zed", "alice", "Bob", "ÉCOLE", "carl", "Ölaf"]
+
+
+@pytest.fixture
+async def profiles(engine):
+    from app.models.model import Profile, User
+
+    now = datetime.utcnow()
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), [
+            {"id": f"user-{i}", "email": f"user{i}@test.local", "hashed_password": "x", "created_at": now}
+            for i in range(len(USERNAMES))
+        ])
+        await conn.execute(insert(Profile), [
+            {"user_id": f"user-{i}", "username": name} for i, name in enumerate(USERNAMES)
+        ])
+
+
+async def test_cursor_pages_cover_every_user_once(client, profiles):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = (await client.get("/users", params=params)).json()
+        seen += [profile["username"] for profile in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert sorted(seen) == sorted(USERNAMES)
+
+
+async def test_prefix_is_lowercased_like_the_column(client, profiles):
+    found = {profile["username"] for profile in (await client.get("/users", params={"q": "É"})).json()["items"]}
+    typeahead = {user["username"] for user in (await client.get("/users/typeahead", params={"q": "ÉM"})).json()}
+
+    assert {"Émile", "ÉCOLE"} <= found
+    assert "Zed" not in found
+    assert "Émile" in typeahead